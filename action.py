@@ -1,4 +1,10 @@
 import re
+import socket
+import time
+
+import lshca_parser
+from remote_exec import RemoteCommand
+
 
 # action.py
 class Action:
@@ -6,45 +12,66 @@ class Action:
         self.connection_manager = connection_manager
 
     def parse_output(self, output):
-        devices = []
-        current_device = None
-        device_info = {}
-        pci_lines = []
-
-        lines = output.splitlines()
-        for line in lines:
-            line = line.strip()
-            if line.startswith('Dev #'):
-                if current_device:
-                    self._finalize_device_info(device_info, pci_lines)
-                    devices.append(device_info)
-                    device_info = {}
-                    pci_lines = []
-                current_device = line
-                device_info['Dev'] = current_device
-            elif line:
-                if ':' in line:
-                    key, value = line.split(':', 1)
-                    key = key.strip()
-                    value = value.strip()
-                    if key.startswith('0000'):
-                        pci_lines.append(line)
-                        if 'First_PCI' not in device_info:
-                            device_info['First_PCI'] = value
-                    else:
-                        device_info[key] = value
-                else:
-                    pci_lines.append(line)
-
-        if current_device:
-            self._finalize_device_info(device_info, pci_lines)
-            devices.append(device_info)
-
-        return devices
-
-    def _finalize_device_info(self, device_info, pci_lines):
-        if pci_lines:
-            device_info['PCI'] = '\n'.join(pci_lines)
+        return lshca_parser.parse(output)
+
+    def stream_devices(self, ssh, structured=False, timeout=None, deadline=None):
+        """
+        Run lshca and yield device records while its output is still arriving.
+
+        Text and JSON output are both parsed device by device (see lshca_parser.iter_parse).
+        lshca is bootstrapped in the same round trip; if it is missing, the cached
+        packages are pushed to the host and the script runs once more.
+
+        Args:
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+            structured (bool): Ask lshca for JSON output, falling back to text if unsupported.
+            timeout (float): Seconds lshca may stay silent before socket.timeout is raised.
+            deadline (float): time.monotonic() by which the scan must have finished, even if lshca
+                keeps printing; socket.timeout is raised after it.
+
+        Yields:
+            DeviceRecord: One record per device.
+        """
+        bootstrap = self.connection_manager.lshca_bootstrap
+        install_from = None
+        while True:
+            command = RemoteCommand(ssh, bootstrap.script(structured, install_from), timeout=timeout,
+                                    deadline=deadline)
+            yield from lshca_parser.iter_parse(text for stream, text, _ in command if stream == 'stdout')
+            if command.exit_status != bootstrap.MISSING_EXIT_STATUS or install_from:
+                return
+            self._check_deadline(deadline)
+            install_from = bootstrap.push(ssh)
+
+    async def scan_devices(self, engine, ssh, timeout=None, deadline=None):
+        """
+        Coroutine version of stream_devices(structured=True) for the AsyncEngine.
+
+        Args:
+            engine (AsyncEngine): The engine running the command.
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+            timeout (float): Seconds lshca may stay silent before socket.timeout is raised.
+            deadline (float): time.monotonic() by which the scan must have finished, even if lshca
+                keeps printing; socket.timeout is raised after it.
+
+        Returns:
+            list: One DeviceRecord per device.
+        """
+        bootstrap = self.connection_manager.lshca_bootstrap
+        install_from = None
+        while True:
+            result = await engine.run_command(ssh, bootstrap.script(True, install_from), timeout=timeout,
+                                              deadline=deadline)
+            if result.exit_status != bootstrap.MISSING_EXIT_STATUS or install_from:
+                return lshca_parser.parse(result.stdout)
+            self._check_deadline(deadline)
+            install_from = await engine.blocking(bootstrap.push, ssh)
+
+    @staticmethod
+    def _check_deadline(deadline):
+        # Pushing the lshca packages is not worth starting once the host's time is up
+        if deadline is not None and time.monotonic() > deadline:
+            raise socket.timeout("lshca is missing and there is no time left to install it")
 
     def parser(self, output):
         pattern = re.compile(r"Dev #(\d+)")
@@ -0,0 +1,19 @@
+import os
+
+# Local state (caches, journals, inventories) lives here; override with CARD_CONFIGURATOR_HOME
+APP_DIR = os.path.expanduser(os.environ.get("CARD_CONFIGURATOR_HOME", "~/.card_configurator"))
+
+
+def app_path(*parts):
+    """
+    Return a path inside the application data directory, creating the directory if needed.
+
+    Args:
+        *parts (str): Path components below the application directory.
+
+    Returns:
+        str: The absolute path.
+    """
+    path = os.path.join(APP_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -0,0 +1,201 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+from remote_exec import ChannelReader, CommandResult
+
+
+class AsyncEngine:
+    def __init__(self, connection_manager, max_concurrency=256, max_per_host=4, blocking_workers=16,
+                 poll_interval=0.2):
+        """
+        Run remote operations as coroutines on one event loop.
+
+        Channel output is awaited through the channel's file descriptor, so running commands
+        cost no threads beyond paramiko's one transport thread per connection. Only calls
+        paramiko has no non-blocking form for (connect/authenticate, opening a channel, SFTP)
+        run on a small thread pool.
+
+        The loop either runs headless through run(), or is pumped from the Tk main loop after
+        attach(); coroutines and their done callbacks then run on the Tk thread and may update
+        widgets directly.
+
+        Args:
+            connection_manager (ConnectionManager): Provides the connection pool.
+            max_concurrency (int): Maximum number of hosts worked on at the same time.
+            max_per_host (int): Maximum number of concurrent operations on one host.
+            blocking_workers (int): Threads for blocking paramiko calls.
+            poll_interval (float): Seconds to wait for channel data before checking the exit status again.
+        """
+        self.connection_manager = connection_manager
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.poll_interval = poll_interval
+        self.loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(max_workers=blocking_workers, thread_name_prefix="engine-blocking")
+        self.loop.set_default_executor(self._executor)
+        self._limit = None
+        self._host_limits = {}
+        self._root = None
+        self._after_id = None
+        self._interval_ms = 10
+
+    # Loop integration
+
+    def attach(self, root, interval_ms=10):
+        """Pump the event loop from the Tk main loop every interval_ms milliseconds."""
+        self._root = root
+        self._interval_ms = interval_ms
+        self._pump()
+
+    def _pump(self):
+        # One loop iteration: run ready callbacks and dispatch I/O that is ready now, without blocking Tk
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+        self._after_id = self._root.after(self._interval_ms, self._pump)
+
+    def run(self, coro):
+        """Run a coroutine to completion on a loop that is not attached to Tk."""
+        return self.loop.run_until_complete(coro)
+
+    def submit(self, coro, on_done=None):
+        """
+        Start a coroutine; call from the thread that pumps the loop.
+
+        Args:
+            coro (coroutine): The operation to run.
+            on_done (callable): Called as on_done(task) when it finishes or is cancelled.
+
+        Returns:
+            asyncio.Task: The task; task.cancel() stops it at its next await.
+        """
+        task = self.loop.create_task(coro)
+        if on_done:
+            task.add_done_callback(on_done)
+        return task
+
+    def cancel_all(self):
+        for task in asyncio.all_tasks(self.loop):
+            task.cancel()
+
+    def close(self):
+        if self._after_id is not None:
+            self._root.after_cancel(self._after_id)
+            self._after_id = None
+        self.cancel_all()
+        tasks = asyncio.all_tasks(self.loop)
+        if tasks:
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self.loop.close()
+        self._executor.shutdown(wait=False)
+
+    # Building blocks for remote operations
+
+    @asynccontextmanager
+    async def host_slot(self, host):
+        """Hold one of the global slots and one of the host's slots for the duration of a with-block."""
+        # Semaphores are created here, on the loop thread: before 3.10 they bind to the loop current at creation
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.max_concurrency)
+        host_limit = self._host_limits.get(host)
+        if host_limit is None:
+            host_limit = self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        async with self._limit:
+            async with host_limit:
+                yield
+
+    async def blocking(self, fn, *args, **kwargs):
+        """Run a blocking call on the engine's thread pool."""
+        return await self.loop.run_in_executor(None, partial(fn, *args, **kwargs))
+
+    async def acquire(self, host, username, password, timeout=None):
+        """
+        Check out a pooled connection without blocking the loop; hand it back with connection_manager.pool.
+
+        If the caller is cancelled while the connection is being set up, the thread doing it
+        cannot be stopped; the client it ends up with is returned to the pool instead of
+        holding one of the host's slots forever.
+        """
+        pool = self.connection_manager.pool
+        future = self.loop.run_in_executor(None, partial(pool.acquire, host, username, password,
+                                                         timeout=timeout, connect_timeout=timeout))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            future.add_done_callback(self._release_abandoned)
+            raise
+
+    def _release_abandoned(self, future):
+        if not future.cancelled() and future.exception() is None:
+            self.connection_manager.pool.release(future.result())
+
+    async def run_command(self, ssh, command, on_line=None, timeout=None, keep_output=True, deadline=None):
+        """
+        Run a command and await its output without holding a thread.
+
+        Args:
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+            command (str): The shell command to run.
+            on_line (callable): Called on the loop thread with every stdout and stderr line.
+            timeout (float): Seconds the command may stay silent before socket.timeout is raised.
+            keep_output (bool): Collect stdout/stderr into the result; disable for huge outputs.
+            deadline (float): time.monotonic() by which the command must have finished, even if
+                it keeps printing; socket.timeout is raised after it.
+
+        Returns:
+            CommandResult: The exit status, collected output and timings.
+        """
+        start = time.monotonic()
+        channel = await self.blocking(self._open_channel, ssh, command)
+        start_latency = time.monotonic() - start
+        collected = {'stdout': [], 'stderr': []}
+        ready = asyncio.Event()
+        fd = channel.fileno()
+        self.loop.add_reader(fd, ready.set)
+        try:
+            reader = ChannelReader(channel, command, timeout, start, deadline)
+            while True:
+                chunks = reader.read()
+                for name, text, lines in chunks:
+                    self._collect(collected[name], text, lines, on_line, keep_output)
+                reader.check_timeout()  # Also while output keeps arriving, for the deadline
+                if chunks:
+                    await asyncio.sleep(0)  # Let other commands run between chunks
+                    continue
+                if reader.finished():
+                    break
+                ready.clear()
+                if channel.eof_received:
+                    # The pipe stays readable after EOF; the exit status is only moments away
+                    await asyncio.sleep(0.01)
+                    continue
+                try:
+                    await asyncio.wait_for(ready.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            for name, text, lines in reader.flush():
+                self._collect(collected[name], text, lines, on_line, keep_output)
+            exit_status = channel.recv_exit_status()
+        finally:
+            self.loop.remove_reader(fd)
+            channel.close()
+        return CommandResult(command, exit_status, ''.join(collected['stdout']), ''.join(collected['stderr']),
+                             time.monotonic() - start, start_latency, reader.first_byte)
+
+    @staticmethod
+    def _open_channel(ssh, command):
+        channel = ssh.get_transport().open_session()
+        channel.exec_command(command)
+        channel.setblocking(0)
+        return channel
+
+    @staticmethod
+    def _collect(chunks, text, lines, on_line, keep_output):
+        if keep_output and text:
+            chunks.append(text)
+        if on_line:
+            for line in lines:
+                on_line(line)
@@ -0,0 +1,113 @@
+import base64
+import shlex
+import uuid
+
+from remote_exec import CommandResult, RemoteCommand
+
+# Shell function every batched command runs through; the fake SSH server parses its calls
+BATCH_FUNCTION = "__cc_run"
+
+
+def batch_script(commands, nonce):
+    """
+    Build the shell script that runs several commands over one channel.
+
+    Each command runs in its own subshell with stdin closed, so a failing or exiting
+    command does not stop the ones after it. When it finished, one record line is printed:
+    '<nonce>:<index>:<exit status>:<start ns>:<end ns>:<base64 stdout>:<base64 stderr>'.
+    Output is base64 encoded, so nothing a command prints can break the delimiting, and
+    the random nonce tells the records apart from anything else the shell prints.
+
+    Args:
+        commands (list): The shell commands, in the order to run them.
+        nonce (str): A random token that starts every record line.
+
+    Returns:
+        str: The script.
+    """
+    lines = [
+        f"__cc_nonce={nonce}",
+        "__cc_dir=$(mktemp -d) || exit 1",
+        "trap 'rm -rf \"$__cc_dir\"' EXIT",
+        f"{BATCH_FUNCTION}() {{ "
+        "__cc_start=$(date +%s%N); "
+        "( eval \"$2\" ) >\"$__cc_dir/out\" 2>\"$__cc_dir/err\" </dev/null; __cc_status=$?; "
+        "__cc_end=$(date +%s%N); "
+        "echo \"$__cc_nonce:$1:$__cc_status:$__cc_start:$__cc_end:"
+        "$(base64 -w0 <\"$__cc_dir/out\"):$(base64 -w0 <\"$__cc_dir/err\")\"; }",
+    ]
+    lines.extend(f"{BATCH_FUNCTION} {index} {shlex.quote(command)}" for index, command in enumerate(commands))
+    return "\n".join(lines) + "\n"
+
+
+def parse_record(line, nonce, commands):
+    """
+    Parse one record line printed by a batch script.
+
+    Args:
+        line (str): A line of the batch's stdout.
+        nonce (str): The nonce the batch was built with.
+        commands (list): The batched commands.
+
+    Returns:
+        tuple: (index, CommandResult), or None if the line is not a record of this batch.
+    """
+    fields = line.strip().split(':')
+    if len(fields) != 7 or fields[0] != nonce:
+        return None
+    try:
+        index, status = int(fields[1]), int(fields[2])
+        stdout, stderr = (base64.b64decode(field).decode('utf-8', 'replace') for field in fields[5:7])
+    except ValueError:
+        return None
+    if not 0 <= index < len(commands):
+        return None
+    try:
+        duration = (int(fields[4]) - int(fields[3])) / 1e9
+    except ValueError:
+        duration = 0.0  # date without nanosecond support
+    return index, CommandResult(commands[index], status, stdout, stderr, duration)
+
+
+def iter_batch(ssh, commands, timeout=None):
+    """
+    Run commands in one round trip, yielding each result as soon as its command finished.
+
+    Args:
+        ssh (paramiko.SSHClient): The SSH client for the connection.
+        commands (list): The shell commands, run one after another in this order.
+        timeout (float): Seconds a single command may run before socket.timeout is raised.
+
+    Yields:
+        tuple: (index, CommandResult) for every command that finished.
+    """
+    commands = list(commands)
+    if not commands:
+        return
+    nonce = uuid.uuid4().hex
+    for stream, line in RemoteCommand(ssh, batch_script(commands, nonce), timeout=timeout).lines():
+        if stream == 'stdout':
+            record = parse_record(line, nonce, commands)
+            if record is not None:
+                yield record
+
+
+def run_batch(ssh, commands, timeout=None):
+    """
+    Run several commands over one channel and return a structured result for each.
+
+    Args:
+        ssh (paramiko.SSHClient): The SSH client for the connection.
+        commands (list): The shell commands, run one after another in this order.
+        timeout (float): Seconds a single command may run before socket.timeout is raised.
+
+    Returns:
+        list: One CommandResult per command, in order. A command the batch never reached
+        (e.g. because the shell died) has command and exit_status None.
+    """
+    commands = list(commands)
+    results = [None] * len(commands)
+    for index, result in iter_batch(ssh, commands, timeout=timeout):
+        results[index] = result
+    return [result or CommandResult(None, None, '', f"The batch ended before '{command}' ran", 0.0)
+            for command, result in zip(commands, results)]
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark scanning and provisioning against the in-process fake SSH server.
+
+Scenarios:
+    single-host   scan one host and burn its firmware
+    many-devices  scan one host with --devices devices and burn them all
+    many-hosts    run the headless scan -> firmware -> OFED chain on --hosts hosts
+
+Usage: python benchmarks/bench_fleet.py [scenario ...] [--hosts 64] [--devices 32]
+       [--latency 0.05] [--install-time 1.0] [--failure-rate 0.0] [--workers 16]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep the release index and image caches of a benchmark run away from the user's
+os.environ.setdefault("CARD_CONFIGURATOR_HOME", tempfile.mkdtemp(prefix="bench_fleet_"))
+
+from fake_ssh_server import CommandProfile, FakeSSHServer  # noqa: E402
+
+from action import Action  # noqa: E402
+from cli import HeadlessRunner, JsonLinesWriter  # noqa: E402
+from connection_manager import ConnectionManager  # noqa: E402
+from firmware import Firmware  # noqa: E402
+from rollout import SUCCEEDED, RolloutController  # noqa: E402
+from scheduler import JobScheduler  # noqa: E402
+
+FW_VERSION = "22.39.1002"
+OFED_VERSION = "24.01-0.2.9.0"
+
+
+def start_server(args, hosts, devices):
+    install = CommandProfile(latency=args.latency, duration=args.install_time, output_lines=20,
+                             failure_rate=args.failure_rate)
+    profiles = {
+        'default': CommandProfile(latency=args.latency),
+        'mlxburn': install,
+        'mlnx_ofed_install': install,
+    }
+    server = FakeSSHServer(hosts=hosts, devices=devices, profiles=profiles, seed=1).start()
+    connection_manager = ConnectionManager()
+    connection_manager.SSH_PORT = server.port
+    return server, connection_manager
+
+
+def scan_and_burn(args, devices):
+    server, connection_manager = start_server(args, 1, devices)
+    host = server.addresses[0]
+    try:
+        start = time.monotonic()
+        ssh = connection_manager.pool.acquire(host, "bench", "bench")
+        found = list(Action(connection_manager).stream_devices(ssh, structured=True))
+        scanned = time.monotonic()
+        results = Firmware(connection_manager).install_many(found, FW_VERSION, ssh)
+        connection_manager.pool.release(ssh)
+        finished = time.monotonic()
+    finally:
+        connection_manager.close_connections()
+        server.stop()
+    ok = sum(1 for item in results if item.ok)
+    return {"devices": len(found), "scan_s": scanned - start, "burn_s": finished - scanned,
+            "total_s": finished - start, "burned_ok": ok, "connections": server.stats['connections'],
+            "commands": server.stats['commands']}
+
+
+def single_host(args):
+    return scan_and_burn(args, 4)
+
+
+def many_devices(args):
+    return scan_and_burn(args, args.devices)
+
+
+def many_hosts(args):
+    server, connection_manager = start_server(args, args.hosts, 4)
+    state = {'firmware': FW_VERSION, 'ofed': OFED_VERSION}
+    try:
+        runner = HeadlessRunner(connection_manager, Action(connection_manager), "bench", "bench", state,
+                                JsonLinesWriter(io.StringIO()))
+        scheduler = JobScheduler(max_workers=args.workers, max_nfs_hosts=args.workers)
+        start = time.monotonic()
+        result = RolloutController(runner, scheduler, canaries=0, wave_size=0).run(server.addresses)
+        elapsed = time.monotonic() - start
+        scheduler.shutdown()
+    finally:
+        connection_manager.close_connections()
+        server.stop()
+    return {"hosts": args.hosts, "total_s": elapsed, "hosts_per_s": args.hosts / elapsed,
+            "succeeded": result.count(SUCCEEDED), "connections": server.stats['connections'],
+            "commands": server.stats['commands']}
+
+
+SCENARIOS = {'single-host': single_host, 'many-devices': many_devices, 'many-hosts': many_hosts}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("scenarios", nargs="*", help=f"Any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--hosts", type=int, default=64)
+    parser.add_argument("--devices", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds before each command's first byte")
+    parser.add_argument("--install-time", type=float, default=1.0, help="Seconds an installer runs")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    for name in args.scenarios or SCENARIOS:
+        figures = SCENARIOS[name](args)
+        print(f"{name:14s} " + "  ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                                         for key, value in figures.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark the lshca parser on synthetic fleet-sized outputs.
+
+Usage: python benchmarks/bench_lshca_parser.py [device_count ...]
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lshca_parser  # noqa: E402
+
+SEPARATOR = "-" * 110
+PCI_HEADER = " PCI_Addr     | Dev_Name | Net      | Port | Numa | LnkStat | IpStat | RDMA     | LnkCapWidth"
+
+
+def synthetic_text(device_count, functions=2):
+    lines = []
+    for dev in range(1, device_count + 1):
+        bus = dev % 256
+        lines += [SEPARATOR, f"Dev #{dev}",
+                  " Desc: ConnectX-6 Dx EN adapter card; 100GbE; Dual-port QSFP56; PCIe 4.0 x16; Crypto and Secure Boot",
+                  " PN: MCX623106AC-CDAT", " PSID: MT_0000000436", f" SN: MT2052X{dev:05d}",
+                  " FW: 22.32.1010", " Driver: mlx5_core", " Tempr: 55", " " + SEPARATOR, PCI_HEADER, " " + SEPARATOR]
+        for fn in range(functions):
+            lines.append(f" 0000:{bus:02x}:00.{fn} | mlx5_{fn}   | ens{bus}f{fn} | {fn + 1}    | 0    | up      "
+                         f"| up     | roce_{fn}   | x16")
+    return "\n".join(lines) + "\n"
+
+
+def synthetic_json(device_count, functions=2):
+    devices = []
+    for dev in range(1, device_count + 1):
+        bus = dev % 256
+        devices.append({
+            "Desc": "ConnectX-6 Dx EN adapter card", "PN": "MCX623106AC-CDAT", "PSID": "MT_0000000436",
+            "SN": f"MT2052X{dev:05d}", "FW": "22.32.1010", "Driver": "mlx5_core", "Tempr": "55",
+            "bdf_devices": [{"PCI_Addr": f"0000:{bus:02x}:00.{fn}", "Dev_Name": f"mlx5_{fn}",
+                             "Net": f"ens{bus}f{fn}", "Port": fn + 1} for fn in range(functions)],
+        })
+    return json.dumps(devices)
+
+
+def legacy_parse(output):
+    # The dict-based parser Action.parse_output used before the streaming records, kept for comparison
+    devices = []
+    current_device = None
+    device_info = {}
+    pci_lines = []
+    for line in output.splitlines():
+        line = line.strip()
+        if line.startswith('Dev #'):
+            if current_device:
+                if pci_lines:
+                    device_info['PCI'] = '\n'.join(pci_lines)
+                devices.append(device_info)
+                device_info = {}
+                pci_lines = []
+            current_device = line
+            device_info['Dev'] = current_device
+        elif line:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                key = key.strip()
+                value = value.strip()
+                if key.startswith('0000'):
+                    pci_lines.append(line)
+                    if 'First_PCI' not in device_info:
+                        device_info['First_PCI'] = value
+                else:
+                    device_info[key] = value
+            else:
+                pci_lines.append(line)
+    if current_device:
+        if pci_lines:
+            device_info['PCI'] = '\n'.join(pci_lines)
+        devices.append(device_info)
+    return devices
+
+
+def measure(name, parse, payload):
+    start = time.perf_counter()
+    records = parse(payload)
+    elapsed = time.perf_counter() - start
+    del records
+
+    # Separate pass: tracemalloc slows parsing down too much to time it at the same time
+    tracemalloc.start()
+    records = parse(payload)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size_mb = len(payload) / 1e6
+    print(f"  {name:<22} {len(records):>7} devices  {elapsed * 1000:9.1f} ms  {size_mb / elapsed:8.1f} MB/s  "
+          f"retained {retained / 1e6:7.2f} MB  peak {peak / 1e6:7.2f} MB")
+    return records
+
+
+def main(counts):
+    for count in counts:
+        text = synthetic_text(count)
+        structured = synthetic_json(count)
+        print(f"{count} devices: text {len(text) / 1e6:.2f} MB, json {len(structured) / 1e6:.2f} MB")
+        measure("legacy dict parser", legacy_parse, text)
+        measure("streaming text", lambda payload: list(lshca_parser.iter_records(payload.splitlines())), text)
+        measure("structured (json)", lshca_parser.parse, structured)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000])
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark application startup: time from process launch to the first frame of the main window.
+
+Needs a display (run under Xvfb on headless machines).
+
+Usage: python benchmarks/bench_startup.py [runs]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import time
+t0 = time.perf_counter()
+import json, sys
+import tkinter as tk
+from gui import GUI
+from connection_manager import ConnectionManager
+from action import Action
+t_import = time.perf_counter()
+
+root = tk.Tk()
+connection_manager = ConnectionManager()
+gui = GUI(root, connection_manager, Action(connection_manager))
+t_init = time.perf_counter()
+
+def first_frame(event):
+    if event.widget is not root:
+        return
+    print(json.dumps({
+        "import": t_import - t0,
+        "init": t_init - t_import,
+        "first_frame": time.perf_counter() - t0,
+        "heavy_modules": sorted(m for m in ("paramiko", "sqlite3", "concurrent.futures") if m in sys.modules),
+    }))
+    root.after(0, root.destroy)
+
+root.bind("<Expose>", first_frame)
+root.mainloop()
+"""
+
+
+def run_once(env):
+    start = time.perf_counter()
+    output = subprocess.check_output([sys.executable, "-c", CHILD], cwd=REPO_DIR, env=env, text=True)
+    wall = time.perf_counter() - start
+    result = json.loads(output.strip().splitlines()[-1])
+    result["wall"] = wall
+    return result
+
+
+def main(runs):
+    if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+        print("No DISPLAY set; run under Xvfb, e.g. xvfb-run python benchmarks/bench_startup.py")
+        return 1
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, CARD_CONFIGURATOR_HOME=home)
+        results = [run_once(env) for _ in range(runs)]
+    for key in ("import", "init", "first_frame", "wall"):
+        values = [result[key] * 1000 for result in results]
+        print(f"{key:<12} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms")
+    print(f"heavy modules loaded before first frame: {', '.join(results[-1]['heavy_modules']) or 'none'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
@@ -0,0 +1,287 @@
+"""
+In-process SSH server that emulates the remote tools of a lab host.
+
+It answers the commands the tool sends (the lshca bootstrap script, firmware image
+listings, release index listings, batched pre-flight checks, PCI device IDs, rshim
+devices, image pre-staging, mlxburn, mlnx_ofed_install, bfbinstall and docainstall) with
+synthetic output after a configurable latency, and fails a configurable share of
+installer runs.
+Every emulated host is its own loopback address (127.0.0.1, 127.0.0.2, ...) on the same
+port, and any password is accepted, so the server only ever listens on loopback.
+
+Example:
+    server = FakeSSHServer(hosts=16, devices=8, profiles={'mlxburn': CommandProfile(latency=0.5)})
+    server.start()
+    connection_manager.SSH_PORT = server.port
+    ...
+    server.stop()
+"""
+import base64
+import os
+import random
+import re
+import selectors
+import shlex
+import socket
+import sys
+import threading
+import time
+
+import paramiko
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_exec import BATCH_FUNCTION  # noqa: E402
+from bench_lshca_parser import synthetic_json, synthetic_text  # noqa: E402
+
+_HOST_KEY = None
+_HOST_KEY_LOCK = threading.Lock()
+
+
+def host_key():
+    # Generating an RSA key takes a moment, so every server in the process shares one
+    global _HOST_KEY
+    with _HOST_KEY_LOCK:
+        if _HOST_KEY is None:
+            _HOST_KEY = paramiko.RSAKey.generate(2048)
+        return _HOST_KEY
+
+
+class CommandProfile:
+    __slots__ = ('latency', 'duration', 'output_lines', 'failure_rate')
+
+    def __init__(self, latency=0.0, duration=0.0, output_lines=10, failure_rate=0.0):
+        """
+        Describe how an emulated command behaves.
+
+        Args:
+            latency (float): Seconds before the first output byte.
+            duration (float): Seconds over which the output lines are spread after the first byte.
+            output_lines (int): Progress lines printed by installers.
+            failure_rate (float): Share of runs that exit with status 1, between 0 and 1.
+        """
+        self.latency = latency
+        self.duration = duration
+        self.output_lines = output_lines
+        self.failure_rate = failure_rate
+
+
+# Checked in order; the first pattern found in the command decides how it is emulated
+COMMAND_KINDS = (
+    (BATCH_FUNCTION, 'batch'),
+    ('mlxburn', 'mlxburn'),
+    ('mlnx_ofed_install', 'mlnx_ofed_install'),
+    ('mlnxofedinstall', 'mlnx_ofed_install'),
+    ('bfbinstall', 'bfbinstall'),
+    ('docainstall', 'docainstall'),
+    ('echo "F $f"', 'image_listing'),
+    ('ofed_info', 'version_probe'),
+    ('ls -1 ', 'release_listing'),
+    ('sha256sum', 'prestage'),
+    ('/sys/bus/pci/devices/', 'pci_ids'),
+    ('/dev/rshim*/misc', 'rshim_map'),
+    ('df -Pk', 'disk_free'),
+    ('lshca', 'lshca'),
+)
+INSTALLERS = ('mlxburn', 'mlnx_ofed_install', 'bfbinstall', 'docainstall')
+# paramiko sends the exec reply only after check_channel_exec_request returned, so a command
+# may finish before the client saw the reply. Its exit status and EOF may overtake the reply,
+# but a close would make the client fail with "Channel closed": the client closes first, as
+# RemoteCommand and AsyncEngine always do, and the server only closes channels left open.
+CLIENT_CLOSE_TIMEOUT = 30.0
+
+
+def command_kind(command):
+    for pattern, kind in COMMAND_KINDS:
+        if pattern in command:
+            return kind
+    return 'default'
+
+
+class _Interface(paramiko.ServerInterface):
+    def __init__(self, server):
+        self.server = server
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=self.server.execute, args=(channel, command.decode('utf-8', 'replace')),
+                         daemon=True).start()
+        return True
+
+
+class FakeSSHServer:
+    def __init__(self, hosts=1, port=0, devices=4, profiles=None, seed=None):
+        """
+        Initialize the fake server.
+
+        Args:
+            hosts (int): Number of emulated hosts, i.e. loopback addresses to listen on.
+            port (int): The port to listen on; 0 picks a free one.
+            devices (int): Devices every emulated host reports through lshca.
+            profiles (dict): Command kind ('lshca', 'prestage', 'mlxburn', 'mlnx_ofed_install',
+                'bfbinstall', 'docainstall' or 'default') -> CommandProfile.
+            seed (int): Seed for the failure decisions, for repeatable runs.
+        """
+        self.addresses = [f"127.0.{i // 256}.{i % 256}" for i in range(1, hosts + 1)]
+        self.port = port
+        self.devices = devices
+        self.profiles = profiles or {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._sockets = []
+        self._selector = selectors.DefaultSelector()
+        self._transports = []
+        self._closed = False
+        self.stats = {'connections': 0, 'commands': 0, 'failures': 0}
+
+    def profile(self, kind):
+        return self.profiles.get(kind) or self.profiles.get('default') or CommandProfile()
+
+    def start(self):
+        for address in self.addresses:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((address, self.port))
+            sock.listen(128)
+            self.port = sock.getsockname()[1]  # The first bind picks the port for all hosts
+            self._selector.register(sock, selectors.EVENT_READ)
+            self._sockets.append(sock)
+        threading.Thread(target=self._accept, name="fake-ssh-accept", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._closed = True
+        for sock in self._sockets:
+            sock.close()
+        with self._lock:
+            transports, self._transports = self._transports, []
+        for transport in transports:
+            transport.close()
+
+    def _accept(self):
+        key = host_key()
+        while not self._closed:
+            try:
+                events = self._selector.select(timeout=0.5)
+            except (OSError, ValueError):
+                return
+            for selector_key, _ in events:
+                try:
+                    sock, _ = selector_key.fileobj.accept()
+                except OSError:
+                    continue
+                transport = paramiko.Transport(sock)
+                transport.add_server_key(key)
+                with self._lock:
+                    self.stats['connections'] += 1
+                    self._transports.append(transport)
+                try:
+                    # With an event the handshake runs on the transport's own thread, so hosts
+                    # connecting at once negotiate in parallel instead of one after another
+                    transport.start_server(event=threading.Event(), server=_Interface(self))
+                except (paramiko.SSHException, EOFError, OSError):
+                    transport.close()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _fails(self, profile):
+        with self._lock:
+            return self._random.random() < profile.failure_rate
+
+    def execute(self, channel, command):
+        kind = command_kind(command)
+        profile = self.profile(kind)
+        self._count('commands')
+        try:
+            time.sleep(profile.latency)
+            status = 0
+            if kind in INSTALLERS:
+                status = self._install(channel, kind, command, profile)
+            else:
+                channel.sendall(self.output(kind, command).encode())
+                if kind == 'lshca':
+                    channel.sendall_stderr(b"lshca is already installed.\n")
+            channel.send_exit_status(status)
+            channel.shutdown_write()
+            deadline = time.monotonic() + CLIENT_CLOSE_TIMEOUT
+            while not channel.closed and channel.get_transport().is_active() and time.monotonic() < deadline:
+                time.sleep(0.005)
+        except (OSError, EOFError, paramiko.SSHException):
+            pass  # Client went away
+        finally:
+            channel.close()
+
+    def _install(self, channel, kind, command, profile):
+        pause = profile.duration / profile.output_lines if profile.output_lines else 0
+        for step in range(1, profile.output_lines + 1):
+            channel.sendall(f"{kind}: step {step}/{profile.output_lines} ({command[:60]})\n".encode())
+            if pause:
+                time.sleep(pause)
+        if self._fails(profile):
+            self._count('failures')
+            channel.sendall_stderr(f"-E- {kind} failed\n".encode())
+            return 1
+        channel.sendall(f"{kind}: done\n".encode())
+        return 0
+
+    def _batch(self, command):
+        # Answer every batched command with the record line batch_exec.parse_record expects
+        nonce = re.search(r"__cc_nonce=(\w+)", command).group(1)
+        records = []
+        for line in command.splitlines():
+            if not line.startswith(BATCH_FUNCTION + " "):
+                continue
+            _, index, inner = shlex.split(line)
+            kind = command_kind(inner)
+            stdout = "" if kind in INSTALLERS else self.output(kind, inner)
+            now = time.time_ns()
+            records.append(f"{nonce}:{index}:0:{now}:{now}:{base64.b64encode(stdout.encode()).decode()}:\n")
+        return "".join(records)
+
+    def output(self, kind, command):
+        """Return the stdout of a non-installer command."""
+        if kind == 'lshca':
+            return synthetic_json(self.devices) if 'lshca -j' in command else synthetic_text(self.devices)
+        if kind == 'image_listing':
+            match = re.search(r"(/\S+?-build-001/)etc/bin/", command)
+            if not match:
+                return ""
+            fw_code = re.search(r"fw-(\d+)", match.group(1)).group(1)
+            return f"F {match.group(1)}etc/bin/fw-{fw_code}-rel-MCX623106AC-CDA_Ax-FlexBoot.bin\n"
+        if kind == 'pci_ids':
+            # Every synthetic device is a ConnectX-6 Dx
+            addresses = re.search(r"for p in (.*?); do", command).group(1).split()
+            return "".join(f"{address.strip(chr(39))} 0x101d\n" for address in addresses)
+        if kind == 'prestage':
+            return "STAGED copied\n"
+        if kind == 'version_probe':
+            return ""  # OFED not installed
+        if kind == 'disk_free':
+            return "104857600\n"
+        if kind == 'rshim_map':
+            # One rshim device per synthetic device, on function 2 of its bus
+            return "".join(f"/dev/rshim{i}/misc pcie-0000:{(i + 1) % 256:02x}:00.2\n" for i in range(self.devices))
+        if kind == 'batch':
+            return self._batch(command)
+        if kind == 'release_listing':
+            root = command.split()[-1].strip("'")
+            if '/fw-' in root:
+                code = root.rsplit('-', 1)[-1]
+                return "".join(f"fw-{code}-rel-22_{minor}_1002-build-001\n" for minor in (37, 38, 39))
+            if 'MLNX_OFED' in root:
+                return "MLNX_OFED_LINUX-23.10-1.1.9.0\nMLNX_OFED_LINUX-24.01-0.2.9.0\n"
+            return ""
+        return ""
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Headless front end: scan hosts and bring them to a desired state without the GUI.
+
+Example:
+    CARD_CONFIGURATOR_PASSWORD=... ./cli.py --hosts 'node[01-64].lab' --user root \
+        --state desired.json --workers 16 --output results.jsonl
+
+The desired-state file is JSON; every key is optional:
+    {
+        "firmware": "22.39.1002"  or  {"MT_0000000436": "22.39.1002", "default": "28.39.1002"},
+        "ofed": "24.01-0.2.9.0",
+        "bfb": "...",
+        "doca": "DOCA_2.5.2_BSP_4.5.2_Ubuntu_22.04-9.24-06-LTS.dev"
+    }
+
+Steps whose component is already at the wanted version are skipped; --dry-run only
+reports the plan. With --canaries/--wave-size the hosts are updated in waves and the
+rollout stops once a canary fails or --max-failure-rate is exceeded.
+
+After the scan, the firmware images and BlueField release directories a host needs are
+copied to --stage-dir on the host in the background and checksummed, so the installers
+read them from local disk instead of the release NFS trees.
+
+Every install step is journaled (see job_journal.py). After a crash or an interrupted
+run, --resume continues the most recent run: steps it completed are skipped, and steps
+that were in flight are re-checked against the installed versions before running again.
+"""
+import argparse
+import getpass
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from action import Action
+from connection_manager import ConnectionManager
+from device_jobs import device_label
+from fleet import parse_host_list
+from job_journal import STARTED, JobJournal
+from planner import Planner, preflight
+from prestage import RESERVE_KB, STAGE_ROOT
+from rollout import SUCCEEDED, RolloutController
+from scheduler import JobScheduler
+
+PASSWORD_ENV = "CARD_CONFIGURATOR_PASSWORD"
+COMPONENTS = ("firmware", "ofed", "bfb", "doca")
+
+
+class JsonLinesWriter:
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, sort_keys=True)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def load_desired_state(path):
+    """
+    Load and validate a desired-state file.
+
+    Args:
+        path (str): Path of the JSON file.
+
+    Returns:
+        dict: Component name -> version (or, for firmware, PSID -> version).
+
+    Raises:
+        ValueError: If the file names an unknown component.
+    """
+    with open(path) as f:
+        state = json.load(f)
+    unknown = set(state) - set(COMPONENTS)
+    if unknown:
+        raise ValueError(f"Unknown components in {path}: {', '.join(sorted(unknown))}")
+    return state
+
+
+def output_tail(text, lines=20):
+    return '\n'.join(text.splitlines()[-lines:])
+
+
+class StepResult:
+    __slots__ = ('ok', 'unreachable')
+
+    def __init__(self, ok, unreachable=False):
+        self.ok = ok
+        self.unreachable = unreachable  # The host could not be connected to, so nothing ran on it
+
+
+class HeadlessRunner:
+    def __init__(self, connection_manager, action, username, password, state, writer,
+                 host_timeout=60, full_output=False, dry_run=False, journal=None):
+        """
+        Initialize the HeadlessRunner.
+
+        Args:
+            connection_manager (ConnectionManager): The connection manager instance.
+            action (Action): Used to scan the devices of every host.
+            username (str): The SSH user.
+            password (str): The SSH password.
+            state (dict): The desired state; empty for a scan-only run.
+            writer (JsonLinesWriter): Receives one result record per step.
+            host_timeout (float): Seconds allowed for connecting and for the inventory scan.
+            full_output (bool): Put complete command output into the records instead of the last lines.
+            dry_run (bool): Only scan and record the plan; install nothing.
+            journal (JobJournal): Records every install step; steps it completed are skipped.
+        """
+        self.connection_manager = connection_manager
+        self.action = action
+        self.username = username
+        self.password = password
+        self.state = state
+        self.writer = writer
+        self.host_timeout = host_timeout
+        self.full_output = full_output
+        self.dry_run = dry_run
+        self.journal = journal
+        self.planner = Planner(state)
+        from firmware import Firmware
+        from ofed import OFED
+        from bfb import BFB
+        from doca import DOCA
+        self.firmware = Firmware(connection_manager)
+        self.ofed = OFED(connection_manager)
+        self.bfb = BFB(connection_manager)
+        self.doca = DOCA(connection_manager)
+
+    def record(self, host, step, ok, started, device=None, version=None, result=None, error=None, **extra):
+        record = {"host": host, "step": step, "ok": ok, "started": started, "duration": time.time() - started}
+        metrics = self.connection_manager.metrics
+        pci = device.get('First_PCI') if device is not None else None
+        metrics.observe(step, record["duration"], host=host, device=pci)
+        if result is not None:
+            metrics.observe_command(result, host=host, device=pci, step=step)
+        if device is not None:
+            record["device"] = device.get('First_PCI')
+            record["psid"] = device.get('PSID')
+        if version is not None:
+            record["version"] = version
+        if result is not None:
+            record["exit_status"] = result.exit_status
+            record["output"] = result.output if self.full_output else output_tail(result.output)
+        if error is not None:
+            record["error"] = str(error)
+        record.update(extra)
+        self.writer.write(record)
+        return record
+
+    def add_host_jobs(self, scheduler, host):
+        """
+        Queue the job chain of one host: scan, then firmware -> OFED -> BFB -> DOCA for the components in the state.
+
+        In a dry run only the scan is queued; it records the plan.
+
+        Args:
+            scheduler (JobScheduler): The scheduler shared by all hosts.
+            host (str): The host name or IP address.
+
+        Returns:
+            list: The queued jobs, in dependency order.
+        """
+        context = {}
+        jobs = [scheduler.add(host, "scan", lambda: self.with_connection(host, self.scan, context))]
+        if self.dry_run:
+            return jobs
+        for component in COMPONENTS:
+            if self.state.get(component):
+                step = getattr(self, f"apply_{component}")
+                jobs.append(scheduler.add(host, component,
+                                          lambda step=step: self.with_connection(host, step, context),
+                                          deps=[jobs[-1]], uses_nfs=True))
+        return jobs
+
+    def with_connection(self, host, step, context):
+        pool = self.connection_manager.pool
+        started = time.time()
+        try:
+            ssh = pool.acquire(host, self.username, self.password, timeout=self.host_timeout,
+                               connect_timeout=self.host_timeout)
+        except Exception as e:
+            self.record(host, "connect", False, started, error=e)
+            return StepResult(False, unreachable=True)
+        try:
+            result = step(host, ssh, context)
+        except Exception:
+            pool.discard(ssh)
+            raise
+        pool.release(ssh)
+        return result
+
+    def scan(self, host, ssh, context):
+        started = time.time()
+        try:
+            devices = list(self.action.stream_devices(ssh, structured=True, timeout=self.host_timeout))
+        except Exception as e:
+            self.record(host, "scan", False, started, error=e)
+            return StepResult(False)
+        for device in devices:
+            device.host = host
+        context['devices'] = devices
+        self.record(host, "scan", True, started, devices=[device.to_dict() for device in devices])
+
+        started = time.time()
+        try:
+            checks = preflight(ssh, devices, timeout=self.host_timeout,
+                               stage_root=self.connection_manager.prestager.stage_root)
+        except Exception as e:
+            self.record(host, "preflight", False, started, error=e)
+            return StepResult(False)
+        self.record(host, "preflight", True, started, **checks.to_dict())
+        context['plan'] = self.planner.plan(host, devices, checks.installed)
+        if self.dry_run:
+            for step in context['plan']:
+                self.record(host, "plan", True, started, device=step.device, version=step.target,
+                            component=step.component, action=step.action, current=step.current)
+        else:
+            self.prestage(host, ssh, context['plan'], checks.disk_free_kb)
+        return StepResult(True)
+
+    def prestage(self, host, ssh, plan, disk_free_kb=None):
+        """
+        Start copying the images of the planned steps to the host, so later steps install from local disk.
+
+        Nothing is staged if the pre-flight found less than RESERVE_KB free on the staging
+        filesystem, since every copy would be refused there anyway.
+        """
+        if disk_free_kb is not None and disk_free_kb < RESERVE_KB:
+            stage_root = self.connection_manager.prestager.stage_root
+            self.record(host, "prestage", True, time.time(),
+                        skipped=f"only {disk_free_kb} KB free below {stage_root}; installing from NFS")
+            return
+        for step in plan:
+            pci = device_label(step.device) if step.device is not None else None
+            if not step.needed or (self.journal and self.journal.completed(host, step.component, pci, step.target)):
+                continue
+            try:
+                if step.component == 'firmware':
+                    self.firmware.prestage(step.device, step.target, ssh)
+                elif step.component in ('ofed', 'bfb', 'doca'):
+                    getattr(self, step.component).prestage(step.target, ssh)
+            except Exception as e:
+                print(f"{host}: staging the {step.component} image failed, installing from NFS: {e}",
+                      file=sys.stderr)
+
+    def planned(self, host, context, component):
+        """
+        Return the plan steps of a component that still need work, recording the ones that are skipped.
+
+        Steps the journal completed in this run are skipped. Steps left in flight by an
+        interrupted run were re-checked by the pre-flight: if the host is already at the
+        target they are closed in the journal, otherwise they run again.
+        """
+        needed = []
+        for step in context['plan']:
+            if step.component != component:
+                continue
+            pci = device_label(step.device) if step.device is not None else None
+            entry = self.journal.entry(host, component, pci) if self.journal else None
+            if not step.needed:
+                if entry is not None and entry.state == STARTED:
+                    self.journal.finish(host, component, pci, step.target, ok=True, verified=True)
+                self.record(host, component, True, time.time(), device=step.device, version=step.target,
+                            skipped="already installed")
+            elif self.journal and self.journal.completed(host, component, pci, step.target):
+                self.record(host, component, True, time.time(), device=step.device, version=step.target,
+                            skipped=f"completed in run {self.journal.run_id}")
+            else:
+                needed.append(step)
+        return needed
+
+    def journaled(self, host, component, device, version, install):
+        """Run install() between journal start and end events; returns its CommandResult."""
+        pci = device_label(device) if device is not None else None
+        if self.journal:
+            self.journal.begin(host, component, pci, version)
+        ok = False
+        try:
+            result = install()
+            ok = result.ok
+            return result
+        finally:
+            if self.journal:
+                self.journal.finish(host, component, pci, version, ok=ok)
+
+    def journal_finish(self, host, component, version):
+        """
+        Return an on_done callback for install_many that journals each device's end event.
+
+        Every device is journaled as soon as its own install finishes, so a crash while
+        slower devices are still installing does not leave finished ones marked as started.
+        """
+        if not self.journal:
+            return None
+        return lambda item: self.journal.finish(host, component, device_label(item.device), version, ok=item.ok)
+
+    def apply_firmware(self, host, ssh, context):
+        ok = True
+        burns = {}
+        for step in self.planned(host, context, 'firmware'):
+            burns.setdefault(step.target, []).append(step.device)
+        for version, targets in burns.items():
+            if self.journal:
+                for device in targets:
+                    self.journal.begin(host, 'firmware', device_label(device), version)
+            for item in self.firmware.install_many(targets, version, ssh,
+                                                   on_done=self.journal_finish(host, 'firmware', version)):
+                started = time.time() - item.elapsed
+                ok &= self.record(host, "firmware", item.ok, started, device=item.device, version=version,
+                                  result=item.result, error=item.error)["ok"]
+        return StepResult(ok)
+
+    def apply_ofed(self, host, ssh, context):
+        if not self.planned(host, context, 'ofed'):
+            return StepResult(True)
+        started = time.time()
+        version = self.state['ofed']
+        result = self.journaled(host, 'ofed', None, version, lambda: self.ofed.install(version, ssh))
+        return StepResult(self.record(host, "ofed", result.ok, started, version=version, result=result)["ok"])
+
+    def apply_bfb(self, host, ssh, context):
+        return self.apply_bluefield(host, ssh, context, 'bfb', self.bfb)
+
+    def apply_doca(self, host, ssh, context):
+        return self.apply_bluefield(host, ssh, context, 'doca', self.doca)
+
+    def apply_bluefield(self, host, ssh, context, component, installer):
+        started = time.time()
+        version = self.state[component]
+        if not any(step.component == component for step in context['plan']):
+            self.record(host, component, True, started, version=version, skipped="no BlueField device")
+            return StepResult(True)
+        ok = True
+        targets = [step.device for step in self.planned(host, context, component)]
+        if self.journal:
+            for device in targets:
+                self.journal.begin(host, component, device_label(device), version)
+        for item in installer.install_many(targets, version, ssh,
+                                           on_done=self.journal_finish(host, component, version)):
+            started = time.time() - item.elapsed
+            ok &= self.record(host, component, item.ok, started, device=item.device, version=version,
+                              result=item.result, error=item.error)["ok"]
+        return StepResult(ok)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Scan and provision ConnectX/BlueField hosts without the GUI.")
+    parser.add_argument("--hosts", required=True, help="Host list file, or hosts/ranges such as 'node[01-16].lab'")
+    parser.add_argument("--user", required=True, help="SSH user")
+    parser.add_argument("--state", help="Desired-state JSON file; omit to only scan")
+    parser.add_argument("--workers", type=int, default=16, help="Jobs run at the same time across all hosts")
+    parser.add_argument("--max-nfs-hosts", type=int, default=4,
+                        help="Hosts allowed to read images from the release NFS trees at the same time")
+    parser.add_argument("--host-timeout", type=float, default=60, help="Seconds for connecting and scanning")
+    parser.add_argument("--output", help="JSON-lines result file (default: stdout)")
+    parser.add_argument("--full-output", action="store_true", help="Keep complete command output in results")
+    parser.add_argument("--canaries", type=int, default=0,
+                        help="Hosts updated first; the rollout stops if any of them fails")
+    parser.add_argument("--wave-size", type=int, default=0,
+                        help="Hosts per wave after the canaries (default: all remaining hosts at once)")
+    parser.add_argument("--max-failure-rate", type=float, default=1.0,
+                        help="Stop before the next wave once this share of attempted hosts failed, e.g. 0.05")
+    parser.add_argument("--metrics-jsonl", help="Append per-phase latency samples to this JSON-lines file")
+    parser.add_argument("--metrics-prom", help="Write per-phase latency summaries to this Prometheus text file")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Scan and report which steps would run, without installing anything")
+    parser.add_argument("--stage-dir", default=STAGE_ROOT,
+                        help="Directory on the hosts that images are copied to before installing (default: %(default)s)")
+    parser.add_argument("--no-prestage", action="store_true",
+                        help="Install straight from the release NFS trees instead of staging images locally")
+    parser.add_argument("--journal", help="Step journal file (default: journal.jsonl in the application directory)")
+    parser.add_argument("--resume", nargs="?", const=True, metavar="RUN",
+                        help="Continue the most recent run (or RUN) from the journal, skipping completed steps")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # stdout carries the JSON records, so log messages go to stderr
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    hosts = parse_host_list(args.hosts)
+    if not hosts:
+        print(f"No hosts in {args.hosts}", file=sys.stderr)
+        return 2
+    state = load_desired_state(args.state) if args.state else {}
+    password = os.environ.get(PASSWORD_ENV) or getpass.getpass(f"Password for {args.user}: ")
+
+    try:
+        journal = None if args.dry_run else JobJournal(args.journal, resume=args.resume,
+                                                        description=" ".join(sys.argv))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if journal and args.resume:
+        for entry in journal.interrupted(include_current=True):
+            if entry.run == journal.run_id and entry.step == 'bfb':
+                # Nothing on the host tells which BFB a DPU runs, so an interrupted flash is always redone
+                print(f"Installing interrupted step {entry.describe()} again", file=sys.stderr)
+            elif entry.run == journal.run_id:
+                print(f"Re-checking interrupted step {entry.describe()}", file=sys.stderr)
+
+    connection_manager = ConnectionManager()
+    connection_manager.prestager.stage_root = args.stage_dir
+    connection_manager.prestager.enabled = not args.no_prestage
+    action = Action(connection_manager)
+    stream = open(args.output, 'a') if args.output else sys.stdout
+    try:
+        runner = HeadlessRunner(connection_manager, action, args.user, password, state, JsonLinesWriter(stream),
+                                host_timeout=args.host_timeout, full_output=args.full_output, dry_run=args.dry_run,
+                                journal=journal)
+        scheduler = JobScheduler(max_workers=args.workers, max_nfs_hosts=args.max_nfs_hosts)
+
+        def on_wave(wave):
+            runner.writer.write({"step": "wave", "wave": wave.index, "hosts": wave.hosts, "duration": wave.elapsed,
+                                 "outcomes": wave.outcomes})
+            for jobs in wave.chains.values():
+                for job in jobs:
+                    if job.error is not None:
+                        print(f"{job.host}: {job.name} raised {job.error}", file=sys.stderr)
+
+        controller = RolloutController(runner, scheduler, canaries=args.canaries, wave_size=args.wave_size,
+                                       max_failure_rate=args.max_failure_rate, on_wave=on_wave)
+        result = controller.run(hosts)
+        scheduler.shutdown()
+    finally:
+        connection_manager.close_connections()
+        if journal:
+            journal.close()
+        if args.output:
+            stream.close()
+        if args.metrics_jsonl:
+            connection_manager.metrics.write_jsonl(args.metrics_jsonl)
+        if args.metrics_prom:
+            connection_manager.metrics.write_prometheus(args.metrics_prom)
+
+    if journal:
+        print(f"Journal run {journal.run_id} in {journal.path}", file=sys.stderr)
+    print(result.summary(), file=sys.stderr)
+    return 0 if result.count(SUCCEEDED) == len(result.outcomes) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,34 +1,78 @@
+import importlib
+import importlib.util
 import re
+import socket
 import subprocess
 import sys
-import time
-from tkinter import messagebox
+import threading
+
+from connection_pool import ConnectionPool
+from lshca_bootstrap import LshcaBootstrap
+from metrics import Metrics
+from prestage import Prestager
+from release_index import ReleaseIndex
 
 
 class ConnectionManager:
+    KEEPALIVE_INTERVAL = 30
+    SSH_PORT = 22
+
     def __init__(self):
-        self.install_paramiko_if_needed()
-        import paramiko
-        self.paramiko = paramiko
+        self._paramiko = None
+        self.pool = ConnectionPool(self.open_connection)
+        self.lshca_bootstrap = LshcaBootstrap()
+        self.release_index = ReleaseIndex()
+        self.metrics = Metrics()
+        self.prestager = Prestager()
 
-    def install_paramiko_if_needed(self):
-        try:
+    @property
+    def paramiko(self):
+        # Imported on first use so the window can appear before paramiko/cryptography load
+        if self._paramiko is None:
             import paramiko
-        except ImportError:
+            self._paramiko = paramiko
+        return self._paramiko
+
+    def dependencies_available(self):
+        return self._paramiko is not None or importlib.util.find_spec("paramiko") is not None
+
+    def install_paramiko_if_needed(self):
+        if not self.dependencies_available():
             self.install_paramiko()
 
     def install_paramiko(self):
-        try:
-            # Upgrade pip first
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "--upgrade", "pip"])
-            # Install required packages for cryptography
-            subprocess.check_call(
-                [sys.executable, "-m", "pip", "install", "--upgrade", "setuptools", "setuptools-rust", "wheel"])
-            # Install paramiko
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "paramiko"])
-        except subprocess.CalledProcessError as e:
-            messagebox.showerror("Installation Error", f"Failed to install paramiko: {e}")
-            sys.exit(1)
+        """
+        Install paramiko and its build requirements with pip. This blocks for a long time;
+        interactive callers should use install_dependencies_async().
+
+        Raises:
+            subprocess.CalledProcessError: If one of the pip commands fails.
+        """
+        # Upgrade pip first
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "--upgrade", "pip"])
+        # Install required packages for cryptography
+        subprocess.check_call(
+            [sys.executable, "-m", "pip", "install", "--upgrade", "setuptools", "setuptools-rust", "wheel"])
+        # Install paramiko
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "paramiko"])
+        importlib.invalidate_caches()
+
+    def install_dependencies_async(self, on_done):
+        """
+        Install missing dependencies on a background thread.
+
+        Args:
+            on_done (callable): Called from the background thread with None on success or the exception.
+        """
+        def install():
+            try:
+                self.install_paramiko_if_needed()
+            except Exception as e:
+                on_done(e)
+            else:
+                on_done(None)
+
+        threading.Thread(target=install, daemon=True).start()
 
     def is_valid_ip(self, value):
         ip_pattern = re.compile(
@@ -48,43 +92,83 @@ class ConnectionManager:
     def is_valid_hostname_or_ip(self, value):
         return self.is_valid_ip(value) or self.is_valid_hostname(value)
 
+    def open_connection(self, server_name, username, password, timeout=None):
+        ssh = self.paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(self.paramiko.AutoAddPolicy())
+        # Open the socket ourselves so TCP connect and SSH handshake/auth are timed separately
+        with self.metrics.timed('connect', host=server_name):
+            sock = socket.create_connection((server_name, self.SSH_PORT), timeout=timeout)
+        try:
+            with self.metrics.timed('auth', host=server_name):
+                ssh.connect(server_name, username=username, password=password, sock=sock,
+                            timeout=timeout, banner_timeout=timeout, auth_timeout=timeout)
+        except Exception:
+            sock.close()
+            raise
+        # Keep idle pooled transports alive across NAT/firewall timeouts
+        ssh.get_transport().set_keepalive(self.KEEPALIVE_INTERVAL)
+        return ssh
+
     def ssh_connect(self, server_name, username, password):
         try:
-            ssh = self.paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(self.paramiko.AutoAddPolicy())
-            ssh.connect(server_name, username=username, password=password)
-            return ssh  # Return the SSH client object on successful connection
-        except self.paramiko.AuthenticationException:
-            messagebox.showerror("Authentication Error", "Authentication failed, please verify your credentials.")
-        except self.paramiko.SSHException as sshException:
-            messagebox.showerror("SSH Error", f"Unable to establish SSH connection: {sshException}")
-        except self.paramiko.BadHostKeyException as badHostKeyException:
-            messagebox.showerror("SSH Error", f"Unable to verify server's host key: {badHostKeyException}")
+            return self.open_connection(server_name, username, password)
         except Exception as e:
-            messagebox.showerror("Connection Error", f"Operation error: {e}")
+            self.report_connection_error(e)
         return None  # Return None on failure
 
-    def install_and_run_lhca(self, ssh):
+    def get_connection(self, server_name, username, password):
+        """Check out a pooled connection; give it back with release_connection()."""
         try:
-            # Check if lshca is already installed
-            stdin, stdout, stderr = ssh.exec_command("pip3 show lshca")
-            stdout.channel.recv_exit_status()  # Wait for the command to complete
-            check_output = stdout.read().decode('utf-8')
-
-            if "Name: lshca" not in check_output:
-                # lshca is not installed, so install it
-                stdin, stdout, stderr = ssh.exec_command("pip3 install lshca")
-                stdout.channel.recv_exit_status()  # Wait for the command to complete
-                install_output = stdout.read().decode('utf-8') + stderr.read().decode('utf-8')
-            else:
-                install_output = "lshca is already installed."
+            return self.pool.acquire(server_name, username, password)
+        except Exception as e:
+            self.report_connection_error(e)
+        return None
+
+    def release_connection(self, ssh):
+        self.pool.release(ssh)
+
+    def discard_connection(self, ssh):
+        """Close a checked-out connection instead of returning it, e.g. after it failed mid-command."""
+        self.pool.discard(ssh)
+
+    def close_connections(self):
+        self.prestager.shutdown()
+        self.pool.close_all()
 
-            # Run the lshca command
-            stdin, stdout, stderr = ssh.exec_command("lshca")
-            stdout.channel.recv_exit_status()  # Wait for the command to complete
-            lhca_output = stdout.read().decode('utf-8') + stderr.read().decode('utf-8')
+    def report_connection_error(self, error):
+        # GUI-only reporter: tkinter is imported here so headless front ends never need it
+        from tkinter import messagebox
+        if isinstance(error, self.paramiko.AuthenticationException):
+            messagebox.showerror("Authentication Error", "Authentication failed, please verify your credentials.")
+        elif isinstance(error, self.paramiko.BadHostKeyException):
+            messagebox.showerror("SSH Error", f"Unable to verify server's host key: {error}")
+        elif isinstance(error, self.paramiko.SSHException):
+            messagebox.showerror("SSH Error", f"Unable to establish SSH connection: {error}")
+        else:
+            messagebox.showerror("Connection Error", f"Operation error: {error}")
 
-            return install_output + "\n\n" + lhca_output
+    def install_and_run_lhca(self, ssh):
+        try:
+            return self.run_lhca(ssh)
         except Exception as e:
+            from tkinter import messagebox
             messagebox.showerror("Execution Error", f"Failed to execute commands: {e}")
             return None
+
+    def run_lhca(self, ssh, timeout=None, on_line=None):
+        """
+        Install lshca on the remote host if needed and return its output.
+
+        The check, install and run happen in one remote script; packages are pushed
+        from the local cache only when lshca is missing.
+
+        Args:
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+            timeout (float): Seconds a command may stay silent before socket.timeout is raised.
+            on_line (callable): Called with every output line while the commands run.
+
+        Returns:
+            str: The install message followed by the lshca output.
+        """
+        result = self.lshca_bootstrap.run(ssh, on_line=on_line, timeout=timeout)
+        return result.stderr + "\n\n" + result.stdout
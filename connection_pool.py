@@ -0,0 +1,194 @@
+import threading
+import time
+
+
+class ConnectionPool:
+    def __init__(self, connect, max_per_host=4, idle_timeout=300):
+        """
+        Initialize a pool of authenticated SSH clients keyed by (host, user).
+
+        Args:
+            connect (callable): Opens a new client, called as connect(server_name, username, password, timeout=...).
+            max_per_host (int): Maximum number of open clients per (host, user) key.
+            idle_timeout (float): Seconds an unused client may stay in the pool before it is closed.
+        """
+        self._connect = connect
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self._cond = threading.Condition()
+        self._idle = {}  # key -> list of (ssh, released_at)
+        self._open = {}  # key -> number of open clients, idle or in use
+        self._keys = {}  # id(ssh) -> key of clients currently checked out
+        self._closed = False
+
+    def acquire(self, server_name, username, password, timeout=None, connect_timeout=None):
+        """
+        Check out a healthy client for the host, reusing an idle one when possible.
+
+        Args:
+            server_name (str): The host name or IP address.
+            username (str): The user to authenticate as.
+            password (str): The password used if a new connection has to be opened.
+            timeout (float): Seconds to wait for a free slot when the host is at max_per_host.
+            connect_timeout (float): Seconds allowed for TCP connect, banner and authentication.
+
+        Returns:
+            paramiko.SSHClient: A connected client; hand it back with release().
+
+        Raises:
+            TimeoutError: If no slot became free within the timeout.
+            RuntimeError: If the pool was closed with close_all().
+        """
+        key = (server_name, username)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                self._evict_idle_locked()
+                ssh = None
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed")
+                    idle = self._idle.get(key)
+                    if idle:
+                        ssh, _ = idle.pop()
+                        break
+                    if self._open.get(key, 0) < self.max_per_host:
+                        self._open[key] = self._open.get(key, 0) + 1
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No free connection to {server_name} within {timeout}s")
+                    self._cond.wait(remaining)
+
+            if ssh is not None:
+                if self.is_healthy(ssh):
+                    self._checkout(key, ssh)
+                    return ssh
+                # Stale transport: drop it and try the next idle client or a new connection
+                self._discard(key, ssh)
+                continue
+
+            try:
+                ssh = self._connect(server_name, username, password, timeout=connect_timeout)
+            except Exception:
+                self._release_slot(key)
+                raise
+            with self._cond:
+                closed = self._closed
+            if closed:
+                self._discard(key, ssh)
+                raise RuntimeError("Connection pool is closed")
+            self._checkout(key, ssh)
+            return ssh
+
+    def release(self, ssh):
+        """
+        Return a client to the pool. Clients that are no longer healthy, or returned after
+        close_all(), are closed.
+
+        Args:
+            ssh (paramiko.SSHClient): A client obtained from acquire().
+        """
+        with self._cond:
+            key = self._keys.pop(id(ssh), None)
+        if key is None:
+            ssh.close()
+            return
+        if not self.is_healthy(ssh):
+            self._discard(key, ssh)
+            return
+        with self._cond:
+            if not self._closed:
+                self._idle.setdefault(key, []).append((ssh, time.monotonic()))
+                self._cond.notify()
+                return
+        self._discard(key, ssh)
+
+    def discard(self, ssh):
+        """
+        Close a checked-out client instead of returning it, e.g. after a transport error.
+
+        Args:
+            ssh (paramiko.SSHClient): A client obtained from acquire().
+        """
+        with self._cond:
+            key = self._keys.pop(id(ssh), None)
+        if key is None:
+            ssh.close()
+        else:
+            self._discard(key, ssh)
+
+    def checked_out(self, ssh):
+        """Return True if the client was obtained from acquire() and not yet released or discarded."""
+        with self._cond:
+            return id(ssh) in self._keys
+
+    def evict_idle(self):
+        """Close idle clients that have not been used for idle_timeout seconds."""
+        with self._cond:
+            self._evict_idle_locked()
+
+    def close_all(self):
+        """
+        Close every idle client and stop handing out clients.
+
+        Clients still checked out are closed when they are released or discarded, and
+        acquire() raises RuntimeError from now on.
+        """
+        with self._cond:
+            self._closed = True
+            idle = self._idle
+            self._idle = {}
+            for key, clients in idle.items():
+                self._open[key] -= len(clients)
+            self._cond.notify_all()
+        for clients in idle.values():
+            for ssh, _ in clients:
+                ssh.close()
+
+    def is_healthy(self, ssh):
+        """
+        Check that the client's transport is still usable.
+
+        Args:
+            ssh (paramiko.SSHClient): The client to check.
+
+        Returns:
+            bool: True if the transport is active and accepts a packet.
+        """
+        transport = ssh.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            transport.send_ignore()
+        except Exception:
+            return False
+        return True
+
+    def _checkout(self, key, ssh):
+        with self._cond:
+            self._keys[id(ssh)] = key
+
+    def _discard(self, key, ssh):
+        try:
+            ssh.close()
+        finally:
+            self._release_slot(key)
+
+    def _release_slot(self, key):
+        with self._cond:
+            self._open[key] -= 1
+            self._cond.notify()
+
+    def _evict_idle_locked(self):
+        now = time.monotonic()
+        for key, clients in self._idle.items():
+            expired = [ssh for ssh, released_at in clients if now - released_at > self.idle_timeout]
+            if not expired:
+                continue
+            clients[:] = [(ssh, released_at) for ssh, released_at in clients
+                          if now - released_at <= self.idle_timeout]
+            self._open[key] -= len(expired)
+            for ssh in expired:
+                ssh.close()
+            self._cond.notify_all()
@@ -0,0 +1,242 @@
+import json
+import logging
+import os
+import re
+import shlex
+import threading
+import time
+
+from app_paths import APP_DIR
+from remote_exec import run_command
+
+logger = logging.getLogger(__name__)
+
+# A catalog in the application directory is merged over the bundled one, e.g. to add new models
+CATALOG_FILES = (os.path.join(APP_DIR, "device_catalog.json"),
+                 os.path.join(os.path.dirname(os.path.abspath(__file__)), "device_catalog.json"))
+RELOAD_CHECK_INTERVAL = 5.0
+
+
+def normalize_device_id(value):
+    """Return a PCI device ID such as '0xA2DC', 'a2dc' or '41692' as '0xa2dc', or None if it is not one."""
+    value = str(value or '').strip().lower()
+    try:
+        number = int(value, 16) if value.startswith('0x') or re.search(r"[a-f]", value) else int(value)
+    except ValueError:
+        return None
+    return f"0x{number:04x}"
+
+
+class DeviceModel:
+    __slots__ = ('name', 'device_id', 'fw_code', 'image_family', 'family', 'signed', 'psids', 'descriptions')
+
+    def __init__(self, name, device_id, family, signed=False, fw_code=None, image_family=None, psids=(),
+                 descriptions=()):
+        """
+        Describe one card model.
+
+        Args:
+            name (str): The model name, e.g. 'ConnectX-7'.
+            device_id (str): The PCI device ID of the physical function, e.g. '0x1021'.
+            family (str): 'connectx' or 'bluefield'.
+            signed (bool): The card only accepts signed firmware images.
+            fw_code (str): The firmware code; defaults to the device ID in decimal.
+            image_family (str): The firmware release tree below the release root, whose release
+                directories are named '<image_family>-rel-<version>-build-001'; defaults to 'fw-<fw_code>'.
+            psids (iterable): PSIDs known to belong to this model.
+            descriptions (iterable): Substrings of the lshca description that identify the model.
+        """
+        self.name = name
+        self.device_id = normalize_device_id(device_id)
+        self.family = family
+        self.signed = signed
+        self.fw_code = str(fw_code or int(self.device_id, 16))
+        self.image_family = image_family or f"fw-{self.fw_code}"
+        self.psids = tuple(psids)
+        self.descriptions = tuple(descriptions)
+
+    @property
+    def is_bluefield(self):
+        return self.family == 'bluefield'
+
+    def __repr__(self):
+        return f"DeviceModel({self.name!r}, {self.device_id})"
+
+
+class DeviceCatalog:
+    def __init__(self, paths=CATALOG_FILES, check_interval=RELOAD_CHECK_INTERVAL):
+        """
+        Identify card models from a JSON catalog, indexed by PCI device ID and PSID.
+
+        All existing files in paths are loaded, each merged over the ones after it. Lookups
+        check their modification times at most every check_interval seconds and reload them
+        when one changed, so models can be added while the application runs.
+
+        Args:
+            paths (iterable): Catalog files, in order of preference.
+            check_interval (float): Minimum seconds between modification time checks.
+        """
+        self.paths = tuple(paths)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._loaded = None  # Modification time of every file in paths when loaded, None for missing files
+        self._checked = 0.0
+        # (by device ID, by PSID, description pattern, by description), replaced as a whole on reload
+        self._indexes = ({}, {}, None, {})
+        self.reload()
+
+    def reload(self):
+        """
+        Load the catalog files, merging each over the ones after it in paths.
+
+        A model in a preferred file replaces the model with the same PCI device ID from the
+        later files, so the application directory's catalog only needs the models it adds or
+        changes. A broken file (e.g. saved half-edited) keeps the catalog that is loaded until
+        the file changes again; only on the first load are the other files used without it.
+
+        Returns:
+            bool: True if a catalog was loaded.
+        """
+        stamps = self._stamps()
+        by_device_id = {}
+        loaded = False
+        for path in reversed(self.paths):
+            try:
+                with open(path) as f:
+                    models = [DeviceModel(**entry) for entry in json.load(f)['models']]
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning("Ignoring device catalog %s: %s", path, e)
+                if self._loaded is not None:
+                    self._loaded = stamps
+                    return False
+                continue
+            by_device_id.update((model.device_id, model) for model in models)
+            loaded = True
+        self._loaded = stamps
+        if loaded:
+            self._index(list(by_device_id.values()))
+        return loaded
+
+    def lookup(self, device):
+        """
+        Identify the model of a device.
+
+        The PCI device ID ('DevID', see identify()) decides if known, then the PSID, then
+        the longest model name found in the description.
+
+        Args:
+            device (dict): The device information dictionary.
+
+        Returns:
+            DeviceModel: The model, or None if the catalog does not know the device.
+        """
+        self._reload_if_changed()
+        by_device_id, by_psid, pattern, by_description = self._indexes
+        model = by_device_id.get(normalize_device_id(device.get('DevID')))
+        if model is None:
+            model = by_psid.get(device.get('PSID', ''))
+        if model is None and pattern is not None:
+            match = pattern.search(device.get('Desc', ''))
+            if match:
+                model = by_description.get(match.group(0).lower())
+        return model
+
+    def by_device_id(self, device_id):
+        self._reload_if_changed()
+        return self._indexes[0].get(normalize_device_id(device_id))
+
+    def models(self):
+        self._reload_if_changed()
+        return list(self._indexes[0].values())
+
+    def identify(self, ssh, devices):
+        """
+        Read the PCI device IDs of devices from sysfs in one round trip and store them as 'DevID'.
+
+        Devices that already have a 'DevID' are not queried again; devices whose ID cannot be
+        read get 'unknown', so they are identified by PSID and description without asking again.
+
+        Args:
+            ssh (paramiko.SSHClient): The SSH client for the host.
+            devices (list): The device information dictionaries.
+        """
+        script, pending = self.identify_script(devices)
+        if script:
+            self.store_ids(pending, run_command(ssh, script).stdout)
+
+    @staticmethod
+    def identify_script(devices):
+        """
+        Build the command reading the PCI device IDs of the devices that have no 'DevID' yet.
+
+        Args:
+            devices (list): The device information dictionaries.
+
+        Returns:
+            tuple: (script, pending) to hand to store_ids with the script's output; script is
+            None if every device already has a 'DevID'.
+        """
+        pending = {}
+        for device in devices:
+            pci = device.get('First_PCI')
+            if pci and not device.get('DevID'):
+                pending.setdefault(pci if pci.count(':') == 2 else f"0000:{pci}", []).append(device)
+        if not pending:
+            return None, pending
+        addresses = " ".join(shlex.quote(address) for address in pending)
+        return f"for p in {addresses}; do echo \"$p $(cat /sys/bus/pci/devices/$p/device 2>/dev/null)\"; done", pending
+
+    @staticmethod
+    def store_ids(pending, output):
+        """Store the device IDs printed by an identify_script as 'DevID'; devices missing from it get 'unknown'."""
+        found = {}
+        for line in output.splitlines():
+            address, _, device_id = line.partition(' ')
+            found[address] = normalize_device_id(device_id)
+        for address, waiting in pending.items():
+            for device in waiting:
+                device['DevID'] = found.get(address) or 'unknown'
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return
+        with self._lock:
+            if now - self._checked < self.check_interval:
+                return
+            self._checked = now
+            if self._stamps() != self._loaded:
+                self.reload()
+
+    def _stamps(self):
+        stamps = []
+        for path in self.paths:
+            try:
+                stamps.append(os.stat(path).st_mtime)
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def _index(self, models):
+        by_device_id = {model.device_id: model for model in models}
+        by_psid = {psid: model for model in models for psid in model.psids}
+        by_description = {text.lower(): model for model in models for text in model.descriptions}
+        # Longest names first, so 'ConnectX-6 Dx' wins over 'ConnectX-6'
+        names = sorted(by_description, key=len, reverse=True)
+        pattern = re.compile("|".join(re.escape(name) for name in names), re.IGNORECASE) if names else None
+        self._indexes = (by_device_id, by_psid, pattern, by_description)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def catalog():
+    """Return the catalog shared by the whole application, loading it on first use."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = DeviceCatalog()
+        return _catalog
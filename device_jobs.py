@@ -0,0 +1,86 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DeviceJobResult:
+    __slots__ = ('device', 'result', 'error', 'elapsed')
+
+    def __init__(self, device, result=None, error=None, elapsed=0.0):
+        self.device = device
+        self.result = result
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None and self.result is not None and self.result.ok
+
+    @property
+    def status(self):
+        if self.error is not None:
+            return f"ERROR: {self.error}"
+        return "OK" if self.ok else f"FAILED (exit {self.result.exit_status})"
+
+
+def device_label(device):
+    """Return the first PCI address of a device, which identifies it in logs, results and the journal."""
+    return device.get('First_PCI') or 'Unknown PCI'
+
+
+def run_device_jobs(devices, job, max_workers=4, on_done=None):
+    """
+    Run job(device) for every device concurrently, at most max_workers at a time.
+
+    Each job is expected to open its own channel, so jobs on the same host share one
+    SSH transport but never block each other.
+
+    Args:
+        devices (list): The device information dictionaries.
+        job (callable): Called as job(device); returns a CommandResult.
+        max_workers (int): Maximum number of jobs running at the same time.
+        on_done (callable): Called on the worker thread with each DeviceJobResult as soon as
+            its job finishes, e.g. to journal it before slower devices are done.
+
+    Returns:
+        list: One DeviceJobResult per device, in the order of devices.
+    """
+    def timed(device):
+        start = time.monotonic()
+        try:
+            item = DeviceJobResult(device, result=job(device), elapsed=time.monotonic() - start)
+        except Exception as e:
+            item = DeviceJobResult(device, error=e, elapsed=time.monotonic() - start)
+        if on_done:
+            on_done(item)
+        return item
+
+    if not devices:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(devices))) as executor:
+        return list(executor.map(timed, devices))
+
+
+def format_results_table(results, total_elapsed=None):
+    """
+    Format per-device results as a fixed-width text table.
+
+    Args:
+        results (list): DeviceJobResult objects.
+        total_elapsed (float): Wall-clock seconds for the whole run, shown in the footer.
+
+    Returns:
+        str: The table.
+    """
+    rows = [("Device", "PCI", "Result", "Time (s)")]
+    for item in results:
+        rows.append((item.device.get('Desc', 'Unknown Desc')[:50], device_label(item.device),
+                     item.status, f"{item.elapsed:.1f}"))
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = ["  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows]
+    lines.insert(1, "  ".join("-" * width for width in widths))
+    if total_elapsed is not None:
+        serial = sum(item.elapsed for item in results)
+        lines.append("")
+        lines.append(f"{sum(item.ok for item in results)}/{len(results)} succeeded in {total_elapsed:.1f}s "
+                     f"(serial total {serial:.1f}s)")
+    return "\n".join(lines)
@@ -0,0 +1,277 @@
+import tkinter as tk
+from bisect import bisect_left
+from tkinter import ttk
+
+
+def device_values(device):
+    return (device.get('Host', ''), device.get('Desc', ''), device.get('PN', ''), device.get('PSID', ''),
+            device.get('FW', ''), device.get('First_PCI', ''), device.get('Tempr', ''))
+
+
+def _sort_key(value):
+    # Numbers (temperatures, counts) sort numerically and before text
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = None
+    if number is None or number != number:  # NaN would break the bisected row order
+        return (1, 0.0, str(value).lower())
+    return (0, number, '')
+
+
+class _Descending:
+    """Wraps a sort key so that larger values sort first."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+class DeviceTable:
+    COLUMNS = (('Host', 140), ('Desc', 320), ('PN', 150), ('PSID', 130), ('FW', 100), ('PCI', 120), ('Tempr', 60))
+
+    def __init__(self, parent, on_activate=None, visible_rows=20):
+        """
+        Build a sortable, filterable device table that only renders the rows in view.
+
+        Rows live in a dict keyed by DeviceRecord.key; the Treeview holds a fixed set of
+        visible_rows items whose values are rewritten when the view scrolls, so the widget cost
+        does not grow with the inventory. Updates are coalesced and applied once per idle cycle:
+        changed rows are moved within the sorted view with bisect, and only slots showing a
+        different row than before are rewritten. Only a new filter or sort order re-sorts all rows.
+
+        Args:
+            parent (tk.Widget): The parent widget; pack or grid self.frame.
+            on_activate (callable): Called with the device when a row is double-clicked or Enter is pressed.
+            visible_rows (int): Number of rows shown at once.
+        """
+        self.on_activate = on_activate
+        self.visible_rows = visible_rows
+        self._devices = {}  # key -> device
+        self._values = {}  # key -> row values
+        self._seq = {}  # key -> insertion number, the tie breaker that keeps equal rows in insertion order
+        self._next_seq = 0
+        self._view = []  # keys after filtering and sorting
+        self._order = []  # row order key of every key in _view, ascending
+        self._row_order = {}  # key in _view -> its row order key
+        self._changed = set()  # keys upserted or removed since the last refresh
+        self._rebuild = True  # the filter or sort order changed; rebuild the view from scratch
+        self._shown = [None] * visible_rows  # (key, values) rendered in each slot
+        self._offset = 0
+        self._sort_column = None
+        self._sort_index = 0
+        self._sort_reverse = False
+        self._filter = ''
+        self._selected = set()
+        self._refresh_pending = False
+
+        self.frame = tk.Frame(parent)
+        filter_bar = tk.Frame(self.frame)
+        filter_bar.pack(fill='x')
+        tk.Label(filter_bar, text="Filter:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add('write', lambda *args: self.set_filter(self.filter_var.get()))
+        tk.Entry(filter_bar, textvariable=self.filter_var).pack(side=tk.LEFT, fill='x', expand=True)
+        self.count_label = tk.Label(filter_bar, text="0 devices")
+        self.count_label.pack(side=tk.RIGHT, padx=5)
+
+        names = [name for name, _ in self.COLUMNS]
+        self.tree = ttk.Treeview(self.frame, columns=names, show='headings', height=visible_rows,
+                                 selectmode='extended')
+        for name, width in self.COLUMNS:
+            self.tree.heading(name, text=name, command=lambda column=name: self.sort_by(column))
+            self.tree.column(name, width=width)
+        for slot in range(visible_rows):
+            self.tree.insert('', tk.END, iid=f"slot{slot}", values=())
+        self.scrollbar = ttk.Scrollbar(self.frame, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill='y')
+        self.tree.pack(expand=True, fill='both')
+
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+        self.tree.bind('<Double-1>', self._on_activate)
+        self.tree.bind('<Return>', self._on_activate)
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll(-1 if event.delta > 0 else 1, 'units'))
+        self.tree.bind('<Button-4>', lambda event: self.scroll(-1, 'units'))
+        self.tree.bind('<Button-5>', lambda event: self.scroll(1, 'units'))
+        self.tree.bind('<Prior>', lambda event: self.scroll(-1, 'pages'))
+        self.tree.bind('<Next>', lambda event: self.scroll(1, 'pages'))
+
+    # Data
+
+    def __len__(self):
+        return len(self._devices)
+
+    def get(self, key):
+        return self._devices.get(key)
+
+    def devices(self):
+        """Return the devices in the current view order (filtered and sorted)."""
+        return [self._devices[key] for key in self._view]
+
+    def upsert(self, devices):
+        """Add or update devices by key; rows already in view are rewritten in place."""
+        for device in devices:
+            key = device.key
+            if key not in self._seq:
+                self._seq[key] = self._next_seq
+                self._next_seq += 1
+            self._devices[key] = device
+            self._values[key] = device_values(device)
+            self._changed.add(key)
+        self._schedule_refresh()
+
+    def remove(self, keys):
+        for key in keys:
+            if self._devices.pop(key, None) is not None:
+                self._values.pop(key)
+                self._seq.pop(key)
+                self._selected.discard(key)
+                self._changed.add(key)
+        self._schedule_refresh()
+
+    def replace(self, devices):
+        """Show exactly the given devices, keeping the selection of devices that remain."""
+        devices = list(devices)
+        keep = {device.key for device in devices}
+        self.remove([key for key in self._devices if key not in keep])
+        self.upsert(devices)
+
+    def selected(self):
+        return [self._devices[key] for key in self._view if key in self._selected]
+
+    def select(self, keys):
+        self._selected = {key for key in keys if key in self._devices}
+        self._render()
+
+    # View
+
+    def set_filter(self, text):
+        self._filter = text.strip().lower()
+        self._offset = 0
+        self._rebuild = True
+        self._schedule_refresh()
+
+    def sort_by(self, column):
+        if self._sort_column == column:
+            self._sort_reverse = not self._sort_reverse
+        else:
+            self._sort_column, self._sort_reverse = column, False
+        for name, _ in self.COLUMNS:
+            arrow = (' ▼' if self._sort_reverse else ' ▲') if name == self._sort_column else ''
+            self.tree.heading(name, text=name + arrow)
+        self._rebuild = True
+        self._schedule_refresh()
+
+    def scroll(self, amount, what='units'):
+        step = self.visible_rows if what == 'pages' else 1
+        self._scroll_to(self._offset + int(amount) * step)
+        return 'break'
+
+    def _on_scrollbar(self, *args):
+        if args[0] == 'moveto':
+            self._scroll_to(round(float(args[1]) * len(self._view)))
+        elif args[0] == 'scroll':
+            self.scroll(int(args[1]), args[2])
+
+    def _scroll_to(self, offset):
+        self._offset = max(0, min(offset, len(self._view) - self.visible_rows))
+        self._render()
+
+    def _schedule_refresh(self):
+        # Many upserts in one event (e.g. a batch of scan results) cost a single refresh
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.frame.after_idle(self._refresh)
+
+    def _refresh(self):
+        self._refresh_pending = False
+        if not self.frame.winfo_exists():
+            return
+        if self._rebuild:
+            self._rebuild_view()
+        else:
+            self._update_view()
+        self._changed.clear()
+        self.count_label.config(text=f"{len(self._view)} of {len(self._devices)} devices")
+        self._scroll_to(self._offset)
+
+    def _matches(self, values):
+        return not self._filter or any(self._filter in str(value).lower() for value in values)
+
+    def _order_key(self, key):
+        if self._sort_column is None:
+            return (self._seq[key],)
+        value = _sort_key(self._values[key][self._sort_index])
+        return (_Descending(value) if self._sort_reverse else value, self._seq[key])
+
+    def _rebuild_view(self):
+        self._rebuild = False
+        if self._sort_column is not None:
+            self._sort_index = [name for name, _ in self.COLUMNS].index(self._sort_column)
+        rows = sorted((self._order_key(key), key) for key, values in self._values.items() if self._matches(values))
+        self._order = [order for order, _ in rows]
+        self._view = [key for _, key in rows]
+        self._row_order = dict(zip(self._view, self._order))
+
+    def _update_view(self):
+        # Order keys are unique (they end in the insertion number), so bisect finds a row's exact position
+        for key in self._changed:
+            order = self._row_order.pop(key, None)
+            if order is not None:
+                index = bisect_left(self._order, order)
+                del self._order[index]
+                del self._view[index]
+            values = self._values.get(key)
+            if values is not None and self._matches(values):
+                order = self._row_order[key] = self._order_key(key)
+                index = bisect_left(self._order, order)
+                self._order.insert(index, order)
+                self._view.insert(index, key)
+
+    def _render(self):
+        visible = self._view[self._offset:self._offset + self.visible_rows]
+        selection = []
+        for slot in range(self.visible_rows):
+            iid = f"slot{slot}"
+            if slot < len(visible):
+                key = visible[slot]
+                shown = (key, self._values[key])
+                if key in self._selected:
+                    selection.append(iid)
+            else:
+                shown = None
+            # Only rewrite slots that show a different row, or the same row with new values
+            if shown != self._shown[slot]:
+                self._shown[slot] = shown
+                if shown is None:
+                    self.tree.item(iid, values=(), tags=('empty',))
+                else:
+                    self.tree.item(iid, values=shown[1], tags=())
+        self.tree.selection_set(selection)
+        total = len(self._view)
+        if total > self.visible_rows:
+            self.scrollbar.set(self._offset / total, (self._offset + len(visible)) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _slot_key(self, iid):
+        index = self._offset + int(iid[len("slot"):])
+        return self._view[index] if index < len(self._view) else None
+
+    def _on_select(self, event):
+        # Keep the selection of rows scrolled out of view; replace it for the rows in view
+        visible = set(self._view[self._offset:self._offset + self.visible_rows])
+        self._selected -= visible
+        self._selected.update(key for key in map(self._slot_key, self.tree.selection()) if key is not None)
+
+    def _on_activate(self, event):
+        focus = self.tree.focus()
+        key = self._slot_key(focus) if focus else None
+        if key is not None and self.on_activate:
+            self.on_activate(self._devices[key])
@@ -0,0 +1,117 @@
+from device_jobs import device_label, run_device_jobs
+from remote_exec import CommandResult, run_command
+from rshim import assign_rshims
+
+
+class DpuInstaller:
+    """
+    Installs a release on BlueField DPUs through their rshim devices.
+
+    Subclasses name the component and provide its release directory (source) and the
+    command that installs it (INSTALL_COMMAND); rshim assignment, staging and running
+    installations on several DPUs at once live here.
+    """
+    MAX_PARALLEL_INSTALLS = 4
+    NAME = None  # e.g. 'BFB', used in messages
+    COMPONENT = None  # e.g. 'bfb', the component in the release index
+    INSTALL_COMMAND = None  # e.g. 'bfbinstall'; called with --prefix <release directory> --rshim <device>
+
+    def __init__(self, connection_manager):
+        """
+        Initialize the installer with a connection manager.
+
+        Args:
+            connection_manager (ConnectionManager): The connection manager instance.
+        """
+        self.connection_manager = connection_manager
+
+    def source(self, version):
+        raise NotImplementedError
+
+    def prestage(self, version, ssh):
+        """
+        Start staging the release directory to the host's local storage.
+
+        Args:
+            version (str): The release version.
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+
+        Returns:
+            Future: Resolves to a StagedCopy; None if staging is disabled.
+        """
+        return self.connection_manager.prestager.stage(ssh, self.source(version))
+
+    def install(self, device, version, ssh, on_line=None, keep_output=True):
+        """
+        Install the release on the given BlueField through its own rshim device.
+
+        Args:
+            device (dict): The device information dictionary.
+            version (str): The release version.
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+            on_line (callable): Called with every output line while the installation runs.
+            keep_output (bool): Keep the output in the result; disable when on_line already shows it.
+
+        Returns:
+            CommandResult: The exit status and output of the installation command.
+        """
+        first_pci = device_label(device)
+        assign_rshims(ssh, [device])
+        rshim = device.get('RShim')
+        if rshim == 'unknown':
+            return CommandResult(None, None, '', f"No rshim device found for the BlueField at {first_pci}", 0.0)
+
+        # Command to execute on the remote machine to install the release
+        prefix = self.connection_manager.prestager.local(ssh, self.source(version), on_line)
+        command = (
+            f"{self.INSTALL_COMMAND} --prefix {prefix} --rshim /dev/{rshim}"
+        )
+
+        # Execute the command on the remote machine
+        return run_command(ssh, command, on_line=on_line, keep_output=keep_output)
+
+    def install_many(self, devices, version, ssh, on_line=None, max_workers=MAX_PARALLEL_INSTALLS, keep_output=True,
+                     on_done=None):
+        """
+        Install the release on several BlueFields of the same host concurrently, one rshim device each.
+
+        Args:
+            devices (list): The BlueField device information dictionaries.
+            version (str): The release version.
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+            on_line (callable): Called with every output line, prefixed with the device PCI address.
+            max_workers (int): Maximum number of installations running at the same time.
+            keep_output (bool): Keep the output in the result; disable when on_line already shows it.
+            on_done (callable): Called with each DeviceJobResult as soon as its device is done.
+
+        Returns:
+            list: One DeviceJobResult per device, in the order of devices.
+        """
+        def install(device):
+            pci = device_label(device)
+            device_on_line = (lambda line: on_line(f"[{pci}] {line}")) if on_line else None
+            return self.install(device, version, ssh, on_line=device_on_line, keep_output=keep_output)
+
+        # One round trip maps all DPUs to their rshim devices instead of one per install
+        assign_rshims(ssh, devices)
+        return run_device_jobs(devices, install, max_workers=max_workers, on_done=on_done)
+
+    def install_latest(self, device, ssh, on_line=None, keep_output=True):
+        """
+        Install the newest release found in the release index.
+
+        Args:
+            device (dict): The device information dictionary.
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+            on_line (callable): Called with every output line while the installation runs.
+            keep_output (bool): Keep the output in the result; disable when on_line already shows it.
+
+        Returns:
+            CommandResult: The exit status and output of the installation command.
+        """
+        version = self.connection_manager.release_index.latest(ssh, self.COMPONENT)
+        if not version:
+            return CommandResult(None, None, '', f"No {self.NAME} release found", 0.0)
+        if on_line:
+            on_line(f"Latest {self.NAME} release: {version}")
+        return self.install(device, version, ssh, on_line=on_line, keep_output=keep_output)
@@ -1,4 +1,15 @@
+import posixpath
+
+from device_catalog import catalog
+from device_jobs import device_label, run_device_jobs
+from fw_image_resolver import FirmwareImageResolver
+from planner import is_current
+from remote_exec import CommandResult, run_command
+
+
 class Firmware:
+    MAX_PARALLEL_BURNS = 4
+
     def __init__(self, connection_manager):
         """
         Initialize the Firmware class with a connection manager.
@@ -7,30 +18,31 @@ class Firmware:
             connection_manager (ConnectionManager): The connection manager instance.
         """
         self.connection_manager = connection_manager
+        self.image_resolver = FirmwareImageResolver()
 
-    def get_fw_code(self, desc):
+    def get_model(self, device, ssh=None):
         """
-        Get the firmware code based on the device description.
+        Identify the device's model in the device catalog.
 
         Args:
-            desc (str): The description of the device.
+            device (dict): The device information dictionary.
+            ssh (paramiko.SSHClient): If given and the device's PCI device ID is not known yet,
+                it is read from the host first, which identifies cards with generic descriptions.
 
         Returns:
-            str: The firmware code if found, otherwise None.
+            DeviceModel: The model with its fw code and signing requirement, or None if unknown.
         """
-        fw_code_map = {
-            'Bluefield-3': '41692',
-            'Bluefield-2': '41686',
-            'ConnectX-7': '4129',
-            'ConnectX-6 Lx': '4127',
-            'ConnectX-6 Dx': '4125'
-        }
-        for key in fw_code_map:
-            if key in desc:
-                return fw_code_map[key]
-        return None
-
-    def install(self, device, version, ssh):
+        if ssh is not None and not device.get('DevID'):
+            catalog().identify(ssh, [device])
+        return catalog().lookup(device)
+
+    @staticmethod
+    def unknown_device(device):
+        message = (f"Unknown device: {device.get('Desc', '')} (PSID {device.get('PSID', '')}); "
+                   f"add it to device_catalog.json")
+        return CommandResult(None, None, '', message, 0.0)
+
+    def install(self, device, version, ssh, on_line=None, force=False, keep_output=True):
         """
         Install the firmware for the given device and version.
 
@@ -38,46 +50,111 @@ class Firmware:
             device (dict): The device information dictionary.
             version (str): The version of the firmware.
             ssh (paramiko.SSHClient): The SSH client for the connection.
+            on_line (callable): Called with every output line while mlxburn runs.
+            force (bool): Burn even if the device already reports the requested version.
+            keep_output (bool): Keep the output in the result; disable when on_line already shows it.
 
         Returns:
-            str: The output of the installation command.
+            CommandResult: The exit status and output of mlxburn.
         """
-        fw_code = self.get_fw_code(device.get('Desc', ''))
-        if not fw_code:
-            return f"Unknown device description: {device.get('Desc', '')}"
+        model = self.get_model(device, ssh)
+        if model is None:
+            return self.unknown_device(device)
+        image_family = model.image_family
+
+        first_pci = device_label(device)
+
+        if not force and is_current('firmware', device.get('FW'), version):
+            return CommandResult(None, 0, f"Firmware {version} is already installed on {first_pci}, skipping burn.\n",
+                                 '', 0.0)
 
-        # Format version by replacing dots with underscores
-        version_formatted = version.replace('.', '_')
-        first_pci = device.get('First_PCI', 'Unknown PCI').split('|')[0]
+        # Pick the image directory up front so a wrong guess never costs a failed burn
+        image = self.image_resolver.resolve(ssh, image_family, version, device, signed=model.signed)
+        if image is None:
+            return CommandResult(None, None, '',
+                                 f"No firmware image for part number {device.get('PN', '')} or PSID "
+                                 f"{device.get('PSID', '')} in {self.image_resolver.release_dir(image_family, version)}",
+                                 0.0)
+        if on_line:
+            on_line(f"Using {image.image} (matched by {image.reason})")
+        image_dir = posixpath.dirname(self.connection_manager.prestager.local(ssh, image.image, on_line)) + '/'
 
         # Command to execute on the remote machine to install firmware
-        base_command = (
-            f"mlxburn -y -d {first_pci} "
-            f"-img_dir /mswg/release/host_fw/fw-{fw_code}/fw-{fw_code}-rel-{version_formatted}-build-001/etc/bin/"
-        )
-        command = base_command
-
-        max_attempts = 3  # Maximum number of retry attempts
-        attempt = 0
-        output = ""
-
-        while attempt < max_attempts:
-            if attempt > 0:
-                print(f"Retry attempt {attempt + 1}")
-
-            # Execute the command on the remote machine
-            stdin, stdout, stderr = ssh.exec_command(command)
-            stdout.channel.recv_exit_status()
-            output = stdout.read().decode('utf-8') + stderr.read().decode('utf-8')
-
-            # Check if output contains the error message
-            if 'does not contain an image' in output or 'failed' in output or 'error' in output:
-                attempt += 1
-                if attempt == 1:
-                    command = base_command.replace("/etc/bin/", "/etc/bin/need_to_be_signed/")
-                elif attempt == 2:
-                    command = base_command.replace("/etc/bin/", "/etc/bin/signed/")
-            else:
-                break
-
-        return output
+        command = f"mlxburn -y -d {first_pci} -img_dir {image_dir}"
+
+        # Execute the command on the remote machine
+        return run_command(ssh, command, on_line=on_line, keep_output=keep_output)
+
+    def prestage(self, device, version, ssh):
+        """
+        Resolve the device's image and start staging it to the host's local storage.
+
+        Devices resolving to the same image share one copy.
+
+        Args:
+            device (dict): The device information dictionary.
+            version (str): The version of the firmware.
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+
+        Returns:
+            Future: Resolves to a StagedCopy; None if there is nothing to stage.
+        """
+        model = self.get_model(device, ssh)
+        image = self.image_resolver.resolve(ssh, model.image_family, version, device, signed=model.signed) if model else None
+        if image is None:
+            return None
+        return self.connection_manager.prestager.stage(ssh, image.image)
+
+    def install_latest(self, device, ssh, on_line=None, keep_output=True):
+        """
+        Install the newest firmware release of the device's image family found in the release index.
+
+        Args:
+            device (dict): The device information dictionary.
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+            on_line (callable): Called with every output line while mlxburn runs.
+            keep_output (bool): Keep the output in the result; disable when on_line already shows it.
+
+        Returns:
+            CommandResult: The exit status and output of mlxburn.
+        """
+        model = self.get_model(device, ssh)
+        if model is None:
+            return self.unknown_device(device)
+        image_family = model.image_family
+
+        version = self.connection_manager.release_index.latest(ssh, 'firmware', image_family)
+        if not version:
+            return CommandResult(None, None, '', f"No firmware release found for {image_family}", 0.0)
+        if on_line:
+            on_line(f"Latest firmware release for {image_family}: {version}")
+        return self.install(device, version, ssh, on_line=on_line, keep_output=keep_output)
+
+    def install_many(self, devices, version, ssh, on_line=None, max_workers=MAX_PARALLEL_BURNS, force=False,
+                     keep_output=True, on_done=None):
+        """
+        Burn the firmware on several devices of the same host concurrently.
+
+        Every burn runs mlxburn on its own channel of the shared SSH transport.
+
+        Args:
+            devices (list): The device information dictionaries.
+            version (str): The version of the firmware.
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+            on_line (callable): Called with every output line, prefixed with the device PCI address.
+            max_workers (int): Maximum number of burns running at the same time.
+            force (bool): Burn even devices that already report the requested version.
+            keep_output (bool): Keep the output in the result; disable when on_line already shows it.
+            on_done (callable): Called with each DeviceJobResult as soon as its device is done.
+
+        Returns:
+            list: One DeviceJobResult per device, in the order of devices.
+        """
+        def burn(device):
+            pci = device_label(device)
+            device_on_line = (lambda line: on_line(f"[{pci}] {line}")) if on_line else None
+            return self.install(device, version, ssh, on_line=device_on_line, force=force, keep_output=keep_output)
+
+        # One round trip identifies all devices instead of one per burn
+        catalog().identify(ssh, devices)
+        return run_device_jobs(devices, burn, max_workers=max_workers, on_done=on_done)
@@ -0,0 +1,279 @@
+import asyncio
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+def expand_host_token(token):
+    """
+    Expand a single host token into host names.
+
+    Supports bracket ranges such as 'node[01-16].lab' (zero padding is kept)
+    and IPv4 last-octet ranges such as '10.0.0.1-32'.
+
+    Args:
+        token (str): The host token.
+
+    Returns:
+        list: The expanded host names.
+    """
+    bracket = re.match(r"^(.*)\[(\d+)-(\d+)\](.*)$", token)
+    if bracket:
+        prefix, start, end, suffix = bracket.groups()
+        width = len(start)
+        return [f"{prefix}{str(i).zfill(width)}{suffix}" for i in range(int(start), int(end) + 1)]
+
+    ip_range = re.match(r"^(\d{1,3}\.\d{1,3}\.\d{1,3}\.)(\d{1,3})-(\d{1,3})$", token)
+    if ip_range:
+        prefix, start, end = ip_range.groups()
+        return [f"{prefix}{i}" for i in range(int(start), int(end) + 1)]
+
+    return [token]
+
+
+def parse_host_list(spec):
+    """
+    Parse a host list given either as a file path or as a comma/space separated list of hosts and ranges.
+
+    Files contain one host token per line; blank lines and '#' comments are ignored.
+
+    Args:
+        spec (str): A file path or a host list such as 'node[01-04].lab, 10.0.0.1-8'.
+
+    Returns:
+        list: The unique host names, in the order they were given.
+    """
+    if os.path.isfile(spec):
+        with open(spec) as f:
+            tokens = []
+            for line in f:
+                line = line.split('#', 1)[0]
+                tokens.extend(line.replace(',', ' ').split())
+    else:
+        tokens = spec.replace(',', ' ').split()
+
+    hosts = []
+    seen = set()
+    for token in tokens:
+        for host in expand_host_token(token):
+            if host not in seen:
+                seen.add(host)
+                hosts.append(host)
+    return hosts
+
+
+class HostScanResult:
+    __slots__ = ('host', 'devices', 'output', 'error', 'elapsed', 'cached')
+
+    def __init__(self, host, devices=None, output=None, error=None, elapsed=0.0, cached=False):
+        self.host = host
+        self.devices = devices or []
+        self.output = output
+        self.error = error
+        self.elapsed = elapsed
+        self.cached = cached
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class FleetScanResult:
+    def __init__(self):
+        self.hosts = {}  # host -> HostScanResult
+        self.devices = []
+        self.elapsed = 0.0
+
+    def add(self, host_result):
+        self.hosts[host_result.host] = host_result
+        self.devices.extend(host_result.devices)
+
+    @property
+    def failed(self):
+        return {host: result.error for host, result in self.hosts.items() if not result.ok}
+
+    @property
+    def hosts_per_sec(self):
+        return len(self.hosts) / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def cached(self):
+        return [host for host, result in self.hosts.items() if result.cached]
+
+    def summary(self):
+        return (f"Scanned {len(self.hosts)} hosts ({len(self.failed)} failed, {len(self.cached)} from cache), "
+                f"{len(self.devices)} devices in {self.elapsed:.1f}s "
+                f"({self.hosts_per_sec:.2f} hosts/sec)")
+
+
+class FleetScanner:
+    def __init__(self, connection_manager, action, max_workers=32, host_timeout=60, inventory=None,
+                 host_deadline=300):
+        """
+        Initialize the FleetScanner.
+
+        Args:
+            connection_manager (ConnectionManager): The connection manager instance.
+            action (Action): Used to parse the lshca output of every host.
+            max_workers (int): Maximum number of hosts scanned at the same time.
+            host_timeout (float): Seconds allowed for connecting to a host and for each silent period
+                of its commands before the host is reported as timed out.
+            inventory (InventoryStore): Cache of earlier scans; hosts with fresh entries are not re-scanned.
+            host_deadline (float): Seconds a host may take in total, connecting included, so a host
+                that keeps trickling output cannot hold a worker forever; None for no limit.
+        """
+        self.connection_manager = connection_manager
+        self.action = action
+        self.max_workers = max_workers
+        self.host_timeout = host_timeout
+        self.inventory = inventory
+        self.host_deadline = host_deadline
+
+    def scan_host(self, host, username, password):
+        """
+        Run the lshca inventory on one host.
+
+        Args:
+            host (str): The host name or IP address.
+            username (str): The SSH user.
+            password (str): The SSH password.
+
+        Returns:
+            HostScanResult: The device records, tagged with the host, or the error.
+        """
+        start = time.monotonic()
+        pool = self.connection_manager.pool
+        try:
+            ssh = pool.acquire(host, username, password, timeout=self.host_timeout,
+                               connect_timeout=self.host_timeout)
+        except Exception as e:
+            return HostScanResult(host, error=f"connect: {e}", elapsed=time.monotonic() - start)
+
+        try:
+            devices = list(self.action.stream_devices(ssh, structured=True, timeout=self.host_timeout,
+                                                      deadline=self._deadline(start)))
+        except Exception as e:
+            pool.discard(ssh)
+            return HostScanResult(host, error=f"lshca: {e}", elapsed=time.monotonic() - start)
+        pool.release(ssh)
+
+        return self._host_scanned(host, devices, start)
+
+    async def scan_host_async(self, engine, host, username, password):
+        """
+        Coroutine version of scan_host for the AsyncEngine.
+
+        Args:
+            engine (AsyncEngine): Bounds the number of hosts scanned at once.
+            host (str): The host name or IP address.
+            username (str): The SSH user.
+            password (str): The SSH password.
+
+        Returns:
+            HostScanResult: The device records, tagged with the host, or the error.
+        """
+        start = time.monotonic()
+        pool = self.connection_manager.pool
+        async with engine.host_slot(host):
+            deadline = self._deadline(time.monotonic())  # Waiting for a slot does not count
+            try:
+                ssh = await engine.acquire(host, username, password, timeout=self.host_timeout)
+            except Exception as e:
+                return HostScanResult(host, error=f"connect: {e}", elapsed=time.monotonic() - start)
+
+            try:
+                devices = await self.action.scan_devices(engine, ssh, timeout=self.host_timeout, deadline=deadline)
+            except BaseException as e:
+                # Also on cancellation: the channel may still be busy, so the client is not reusable
+                pool.discard(ssh)
+                if not isinstance(e, Exception):
+                    raise
+                return HostScanResult(host, error=f"lshca: {e}", elapsed=time.monotonic() - start)
+            pool.release(ssh)
+        return self._host_scanned(host, devices, start)
+
+    def _deadline(self, start):
+        return None if self.host_deadline is None else start + self.host_deadline
+
+    def _host_scanned(self, host, devices, start):
+        for device in devices:
+            device.host = host
+        if self.inventory is not None:
+            self.inventory.put(host, devices)
+        return HostScanResult(host, devices, elapsed=time.monotonic() - start)
+
+    def scan(self, hosts, username, password, on_result=None, refresh_all=False):
+        """
+        Scan all hosts through a bounded worker pool.
+
+        Args:
+            hosts (list): The host names to scan.
+            username (str): The SSH user.
+            password (str): The SSH password.
+            on_result (callable): Called from the scanning thread with each HostScanResult as the host answers.
+            refresh_all (bool): Re-scan every host even if the inventory cache holds a fresh entry.
+
+        Returns:
+            FleetScanResult: The merged device table and per-host results.
+        """
+        result = FleetScanResult()
+        start = time.monotonic()
+        to_scan = self._use_cache(hosts, result, on_result, refresh_all)
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(len(to_scan), 1))) as executor:
+            futures = [executor.submit(self.scan_host, host, username, password) for host in to_scan]
+            for future in as_completed(futures):
+                host_result = future.result()
+                result.add(host_result)
+                result.elapsed = time.monotonic() - start
+                if on_result:
+                    on_result(host_result)
+        result.elapsed = time.monotonic() - start
+        return result
+
+    async def scan_async(self, engine, hosts, username, password, on_result=None, refresh_all=False):
+        """
+        Coroutine version of scan: every host is a coroutine, bounded by the engine's limits.
+
+        Args:
+            engine (AsyncEngine): The engine running the scans.
+            hosts (list): The host names to scan.
+            username (str): The SSH user.
+            password (str): The SSH password.
+            on_result (callable): Called on the loop thread with each HostScanResult as the host answers.
+            refresh_all (bool): Re-scan every host even if the inventory cache holds a fresh entry.
+
+        Returns:
+            FleetScanResult: The merged device table and per-host results.
+        """
+        result = FleetScanResult()
+        start = time.monotonic()
+        to_scan = self._use_cache(hosts, result, on_result, refresh_all)
+
+        tasks = [engine.loop.create_task(self.scan_host_async(engine, host, username, password)) for host in to_scan]
+        try:
+            for future in asyncio.as_completed(tasks):
+                host_result = await future
+                result.add(host_result)
+                result.elapsed = time.monotonic() - start
+                if on_result:
+                    on_result(host_result)
+        finally:
+            for task in tasks:
+                task.cancel()
+        result.elapsed = time.monotonic() - start
+        return result
+
+    def _use_cache(self, hosts, result, on_result, refresh_all):
+        # Adds the fresh cached hosts to result and returns the hosts that still need a scan
+        if self.inventory is None or refresh_all:
+            return hosts
+        entries = self.inventory.get_many(hosts)
+        for host, entry in entries.items():
+            if not entry.stale:
+                host_result = HostScanResult(host, entry.devices, cached=True)
+                result.add(host_result)
+                if on_result:
+                    on_result(host_result)
+        return [host for host in hosts if host not in entries or entries[host].stale]
@@ -0,0 +1,141 @@
+import json
+import os
+import shlex
+import threading
+
+from app_paths import app_path
+from remote_exec import run_command
+
+FW_RELEASE_ROOT = "/mswg/release/host_fw"
+# Searched in this order; the first directory holding an image for the device wins
+IMAGE_SUBDIRS = ("etc/bin/", "etc/bin/need_to_be_signed/", "etc/bin/signed/")
+UNSIGNED_SUBDIR = "etc/bin/need_to_be_signed/"
+IMAGE_EXTENSIONS = (".bin", ".mlx")
+
+
+class ResolvedImage:
+    __slots__ = ('directory', 'image', 'reason')
+
+    def __init__(self, directory, image, reason):
+        self.directory = directory
+        self.image = image
+        self.reason = reason
+
+
+class FirmwareImageResolver:
+    def __init__(self, cache_file=None):
+        """
+        Initialize the resolver with an in-memory cache backed by a JSON file.
+
+        Release trees never change once published, so listings are cached without expiry.
+
+        Args:
+            cache_file (str): Path of the on-disk cache; defaults to the application directory.
+        """
+        self.cache_file = cache_file or app_path("fw_image_cache.json")
+        self._lock = threading.Lock()
+        self._cache = self._load()
+
+    def release_dir(self, image_family, version):
+        version_formatted = version.replace('.', '_')
+        return f"{FW_RELEASE_ROOT}/{image_family}/{image_family}-rel-{version_formatted}-build-001/"
+
+    def resolve(self, ssh, image_family, version, device, signed=False):
+        """
+        Pick the image directory for the device before any burn is attempted.
+
+        All candidate directories are listed with a single remote command. Images are matched
+        by the device part number in the file name, then by the PSID embedded in the image.
+        An image matching neither is never picked, since burning a guessed image is what
+        resolving up front is meant to prevent.
+
+        Args:
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+            image_family (str): The firmware release directory of the device family, e.g. 'fw-4125'.
+            version (str): The version of the firmware.
+            device (dict): The device information dictionary.
+            signed (bool): The device only accepts signed images; skip need_to_be_signed/.
+
+        Returns:
+            ResolvedImage: The chosen image, or None if no image matches the part number or PSID.
+        """
+        key = f"{image_family}/{version}"
+        pn = device.get('PN', '')
+        psid = device.get('PSID', '')
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is None or (psid and psid not in entry['psid_hits'] and not self._match_pn(entry['files'], pn)):
+            entry = self._list(ssh, image_family, version, pn, psid, entry)
+            if entry['files']:
+                with self._lock:
+                    self._cache[key] = entry
+                    self._save()
+
+        files = [path for path in entry['files'] if self._usable(path, signed)]
+        match = self._match_pn(files, pn)
+        if match:
+            return ResolvedImage(os.path.dirname(match) + '/', match, f"part number {pn}")
+        for image in entry['psid_hits'].get(psid, []):
+            if self._usable(image, signed):
+                return ResolvedImage(os.path.dirname(image) + '/', image, f"PSID {psid}")
+        return None
+
+    def _list(self, ssh, image_family, version, pn, psid, entry):
+        base = self.release_dir(image_family, version)
+        dirs = " ".join(shlex.quote(base + subdir) for subdir in IMAGE_SUBDIRS)
+        model = pn.split('-')[0]
+        # Grepping images for the PSID reads them over NFS, so only do it when no file name matches the model
+        script = (
+            f"found=0; for d in {dirs}; do for f in \"$d\"*; do [ -f \"$f\" ] || continue; "
+            f"echo \"F $f\"; case \"${{f##*/}}\" in *{self._case_pattern(model) if model else '__none__'}*) found=1;; esac; "
+            f"done; done; "
+            f"if [ $found = 0 ] && [ -n {shlex.quote(psid)} ]; then for d in {dirs}; do "
+            f"grep -l -a -F -- {shlex.quote(psid)} \"$d\"*.bin \"$d\"*.mlx 2>/dev/null | sed 's/^/P /'; done; fi"
+        )
+        files = []
+        hits = []
+        for line in run_command(ssh, script).stdout.splitlines():
+            kind, _, path = line.partition(' ')
+            if kind == 'F' and path.endswith(IMAGE_EXTENSIONS):
+                files.append(path)
+            elif kind == 'P':
+                hits.append(path)
+        psid_hits = dict(entry['psid_hits']) if entry else {}
+        if psid:
+            psid_hits[psid] = hits
+        return {'files': files, 'psid_hits': psid_hits}
+
+    @staticmethod
+    def _case_pattern(text):
+        # Case-insensitive shell pattern, e.g. 'MCX6' -> '[mM][cC][xX]6', to agree with _match_pn
+        return "".join(f"[{ch.lower()}{ch.upper()}]" if ch.isalpha() else ch if ch.isalnum() else shlex.quote(ch)
+                       for ch in text)
+
+    @staticmethod
+    def _usable(path, signed):
+        return not (signed and f"/{UNSIGNED_SUBDIR}" in path)
+
+    def _match_pn(self, files, pn):
+        # lshca reports e.g. MCX623106AN-CDAT while images are named ...-MCX623106AN-CDA_Ax-...;
+        # prefer the longest part number prefix found in a file name
+        pn = pn.upper()
+        model = pn.split('-')[0]
+        for length in range(len(pn), len(model) - 1, -1):
+            prefix = pn[:length]
+            for path in files:
+                if prefix and prefix in os.path.basename(path).upper():
+                    return path
+        return None
+
+    def _load(self):
+        try:
+            with open(self.cache_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp_file = self.cache_file + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self._cache, f, indent=1)
+        os.replace(tmp_file, self.cache_file)
@@ -1,11 +1,58 @@
+import logging
+import threading
 import tkinter as tk
 from tkinter import messagebox, simpledialog, ttk
-import threading
-from action import Action
-from firmware import Firmware
-from connection_manager import ConnectionManager
-from bfb import BFB
-from ofed import OFED
+import time
+from functools import partial
+from ui_dispatcher import UIDispatcher
+
+logger = logging.getLogger(__name__)
+
+# Installer, fleet and inventory modules are imported on first use to keep startup fast
+
+
+class ProgressWindow:
+    def __init__(self, root, title):
+        from log_viewer import LogViewer, new_log_path
+        self.window = tk.Toplevel(root)
+        self.window.title(title)
+        self.window.geometry("700x400")
+        self.heading = tk.Label(self.window, text="Installation in progress...")
+        self.heading.pack(pady=10)
+
+        self.label = tk.Label(self.window, text="", anchor='w')
+        self.label.pack(fill='x', padx=10)
+
+        self.viewer = LogViewer(self.window, spill_path=new_log_path(title))
+        self.viewer.frame.pack(expand=True, fill='both', padx=10, pady=10)
+        self.lines = 0
+
+    def append_lines(self, lines):
+        if not self.window.winfo_exists():
+            return
+        self.lines += len(lines)
+        self.viewer.append(lines)
+        self.label.config(text=f"{self.lines} lines | {lines[-1][:100]}")
+
+    def finish(self, heading, text=''):
+        """
+        Turn the window into the result window: the streamed log stays and text is appended.
+
+        Returns:
+            bool: False if the user already closed the window.
+        """
+        if not self.window.winfo_exists():
+            return False
+        self.heading.config(text=heading)
+        lines = text.splitlines()
+        if lines:
+            self.append_lines(lines)
+        return True
+
+    def destroy(self):
+        self.viewer.close()
+        if self.window.winfo_exists():
+            self.window.destroy()
 
 
 class GUI:
@@ -13,15 +60,80 @@ class GUI:
         self.root = root
         self.connection_manager = connection_manager
         self.action = action
+        self.dispatcher = UIDispatcher(root)
+        self.dispatcher.start()
         self.devices = []
-        self.firmware = Firmware(self.connection_manager)
-        self.bfb = BFB(self.connection_manager)
+        self._inventory = None
+        self._firmware = None
+        self._bfb = None
+        self._doca = None
+        self._ofed = None
+        self._scheduler = None
+        self._engine = None
+        self._journal = None
         self.setup_ui()
-        self.ofed = OFED(self.connection_manager)
         self.username = ''
         self.password = ''
         self.server_name = ''
 
+    @property
+    def inventory(self):
+        if self._inventory is None:
+            from inventory_store import InventoryStore
+            self._inventory = InventoryStore()
+        return self._inventory
+
+    @property
+    def scheduler(self):
+        if self._scheduler is None:
+            from scheduler import JobScheduler
+            self._scheduler = JobScheduler(max_workers=8, max_nfs_hosts=4)
+        return self._scheduler
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from async_engine import AsyncEngine
+            self._engine = AsyncEngine(self.connection_manager)
+            self._engine.attach(self.root)
+        return self._engine
+
+    @property
+    def journal(self):
+        if self._journal is None:
+            from app_paths import app_path
+            from job_journal import JobJournal
+            self._journal = JobJournal(app_path("gui_journal.jsonl"), description="gui")
+        return self._journal
+
+    @property
+    def firmware(self):
+        if self._firmware is None:
+            from firmware import Firmware
+            self._firmware = Firmware(self.connection_manager)
+        return self._firmware
+
+    @property
+    def bfb(self):
+        if self._bfb is None:
+            from bfb import BFB
+            self._bfb = BFB(self.connection_manager)
+        return self._bfb
+
+    @property
+    def doca(self):
+        if self._doca is None:
+            from doca import DOCA
+            self._doca = DOCA(self.connection_manager)
+        return self._doca
+
+    @property
+    def ofed(self):
+        if self._ofed is None:
+            from ofed import OFED
+            self._ofed = OFED(self.connection_manager)
+        return self._ofed
+
     def setup_ui(self):
         self.root.title("Card Configurator")
         self.center_window(self.root)
@@ -30,11 +142,141 @@ class GUI:
                                         command=self.show_server_name_input)
         self.request_button.pack(pady=10)
 
+        self.fleet_button = tk.Button(self.root, text="Fleet Scan", command=self.show_fleet_scan_input)
+        self.fleet_button.pack(pady=10)
+
         self.close_button = tk.Button(self.root, text="Close Application", command=self.close_application)
         self.close_button.pack(pady=10)
 
+        if not self.connection_manager.dependencies_available():
+            self.show_dependency_installer()
+        self.root.after_idle(self.report_interrupted_jobs)
+
+    def report_interrupted_jobs(self):
+        # Steps of another instance that is still running are not interrupted; the journal skips them
+        interrupted = self.journal.interrupted()
+        if not interrupted:
+            return
+        lines = [entry.describe() for entry in interrupted[:20]]
+        if len(interrupted) > 20:
+            lines.append(f"... and {len(interrupted) - 20} more")
+        resume = messagebox.askyesno("Interrupted installations",
+                                     "These installations were interrupted when the application last stopped and "
+                                     "may have left the devices half-updated:\n\n" + "\n".join(lines) +
+                                     "\n\nRe-check the hosts now and install again what did not complete?")
+        if resume and self.resume_interrupted_jobs(interrupted):
+            return
+        for entry in interrupted:
+            # Reported once; the steps count as failed from now on
+            self.journal.finish(entry.host, entry.step, entry.device, entry.version, ok=False, interrupted=True)
+
+    def resume_interrupted_jobs(self, entries):
+        """
+        Re-check the hosts of interrupted journal entries and run again the steps that did not complete.
+
+        Returns:
+            bool: False if the user gave no credentials, so nothing was resumed.
+        """
+        username = simpledialog.askstring("Resume", "Username for the hosts:", parent=self.root)
+        if not username:
+            return False
+        password = simpledialog.askstring("Resume", "Password:", show='*', parent=self.root)
+        if password is None:
+            return False
+        by_host = {}
+        for entry in entries:
+            by_host.setdefault(entry.host, []).append(entry)
+        for host, host_entries in by_host.items():
+            progress = self.show_progress_window(f"Resuming installations on {host}")
+            self.scheduler.add(host, "resume", partial(self.resume_host, host, host_entries, username, password,
+                                                       progress), uses_nfs=True)
+        return True
+
+    def resume_host(self, host, entries, username, password, progress):
+        # Runs on a scheduler worker. Entries are only closed in the journal once they are settled, so a
+        # failure here leaves the rest to be offered again on the next start.
+        from planner import preflight, recheck
+        on_line = self.progress_callback(progress)
+        pool = self.connection_manager.pool
+        try:
+            ssh = pool.acquire(host, username, password)
+        except Exception as e:
+            self.dispatcher.post(self.show_installation_text, f"Cannot connect to {host}: {e}", None, progress,
+                                 heading="Resume failed")
+            return
+        failed = 0
+        try:
+            on_line(f"Re-checking {len(entries)} interrupted installations")
+            devices = list(self.action.stream_devices(ssh, structured=True))
+            checks = preflight(ssh, devices, stage_root=self.connection_manager.prestager.stage_root)
+            steps = recheck(host, entries, devices, checks.installed)
+            # Later steps' payloads copy while the earlier steps install
+            for step in steps:
+                if step is not None and step.needed and step.target:
+                    self.stage_payloads(step.component, step.target, ssh,
+                                        [step.device] if step.component == 'firmware' else ())
+            for entry, step in zip(entries, steps):
+                if step is None:
+                    on_line(f"{entry.describe()}: the device is no longer found")
+                    self.journal.finish(host, entry.step, entry.device, entry.version, ok=False, interrupted=True)
+                    failed += 1
+                elif not step.needed:
+                    on_line(f"{entry.describe()}: already at {step.current}")
+                    self.journal.finish(host, entry.step, entry.device, entry.version, ok=True, verified=True)
+                else:
+                    on_line(f"{entry.describe()}: installing again")
+                    self.journal.begin(host, entry.step, entry.device, entry.version)
+                    ok = False
+                    try:
+                        result = self.resume_step(step, ssh, on_line)
+                        ok = result.ok
+                    finally:
+                        self.journal.finish(host, entry.step, entry.device, entry.version, ok=ok)
+                    failed += not ok
+        except Exception as e:
+            pool.discard(ssh)
+            self.dispatcher.post(self.show_installation_text, f"Resuming on {host} failed: {e}", None, progress,
+                                 heading="Resume failed")
+            raise
+        pool.release(ssh)
+        self.inventory.mark_dirty(host)
+        heading = f"Resume finished: {failed} of {len(entries)} failed" if failed else "Resume finished"
+        self.dispatcher.post(self.show_installation_text, "", None, progress, heading=heading)
+
+    def resume_step(self, step, ssh, on_line):
+        installer = {'firmware': self.firmware, 'ofed': self.ofed, 'bfb': self.bfb, 'doca': self.doca}[step.component]
+        args = () if step.component == 'ofed' else (step.device,)
+        if step.target:
+            return installer.install(*args, step.target, ssh, on_line=on_line, keep_output=False)
+        return installer.install_latest(*args, ssh, on_line=on_line, keep_output=False)
+
+    def show_dependency_installer(self):
+        self.request_button.config(state=tk.DISABLED)
+        self.fleet_button.config(state=tk.DISABLED)
+        self.dependency_label = tk.Label(self.root, text="paramiko is not installed.")
+        self.dependency_label.pack(pady=5)
+        self.dependency_button = tk.Button(self.root, text="Install Dependencies", command=self.install_dependencies)
+        self.dependency_button.pack(pady=5)
+
+    def install_dependencies(self):
+        self.dependency_button.config(state=tk.DISABLED)
+        self.dependency_label.config(text="Installing paramiko, this may take a few minutes...")
+        self.connection_manager.install_dependencies_async(
+            lambda error: self.dispatcher.post(self.finish_dependency_install, error))
+
+    def finish_dependency_install(self, error):
+        if error:
+            self.dependency_label.config(text=f"Failed to install paramiko: {error}")
+            self.dependency_button.config(state=tk.NORMAL)
+            return
+        self.dependency_label.destroy()
+        self.dependency_button.destroy()
+        self.request_button.config(state=tk.NORMAL)
+        self.fleet_button.config(state=tk.NORMAL)
+
     def show_server_name_input(self):
         self.request_button.pack_forget()
+        self.fleet_button.pack_forget()
         self.close_button.pack_forget()
 
         self.message_label = tk.Label(self.root, text="Please enter the server machine name or IP address:")
@@ -63,16 +305,11 @@ class GUI:
                 if self.username:
                     self.password = simpledialog.askstring("Input", "Please enter your password:", show='*')
                     if self.password:
-                        ssh = self.connection_manager.ssh_connect(self.server_name, self.username, self.password)
-                        if ssh:
-                            self.show_message(f"Connected successfully to {self.server_name}")
-                            output = self.connection_manager.install_and_run_lhca(ssh)
-                            if output is not None:
-                                self.display_output(output)
-                                self.create_device_buttons(output)
-                            ssh.close()
+                        entry = self.inventory.get(self.server_name)
+                        if entry:
+                            self.show_cached_inventory(entry)
                         else:
-                            self.show_message(f"Failed to connect to {self.server_name}")
+                            self.scan_machine()
                         self.show_main_window()
                     else:
                         self.show_message("No password entered.")
@@ -87,40 +324,161 @@ class GUI:
             self.show_message("No server machine name entered.")
             self.show_main_window()
 
-    def display_output(self, output):
-        self.output_frame = tk.Frame(self.root)
-        self.output_frame.pack(expand=True, fill='both', padx=10, pady=10)
+    def scan_machine(self):
+        ssh = self.connection_manager.get_connection(self.server_name, self.username, self.password)
+        if ssh:
+            self.show_message(f"Connected successfully to {self.server_name}")
+            output = self.connection_manager.install_and_run_lhca(ssh)
+            if output is not None:
+                self.display_output(output)
+                devices = self.action.parse_output(output)
+                for device in devices:
+                    device.host = self.server_name
+                from device_catalog import catalog
+                try:
+                    catalog().identify(ssh, devices)
+                except Exception as e:
+                    logger.warning("Could not read the PCI device IDs of %s: %s", self.server_name, e)
+                self.inventory.put(self.server_name, devices)
+                self.show_device_table(devices)
+            self.connection_manager.release_connection(ssh)
+        else:
+            self.show_message(f"Failed to connect to {self.server_name}")
 
-        self.output_text = tk.Text(self.output_frame, wrap=tk.WORD)
-        self.output_text.pack(side=tk.LEFT, expand=True, fill='both')
-
-        self.scrollbar = tk.Scrollbar(self.output_frame, command=self.output_text.yview)
-        self.scrollbar.pack(side=tk.RIGHT, fill='y')
-
-        self.output_text.config(yscrollcommand=self.scrollbar.set)
-        self.output_text.insert(tk.END, output)
-        self.output_text.config(state=tk.DISABLED)
-
-    def create_device_buttons(self, output):
-        self.devices = self.action.parse_output(output)
-        for device in self.devices:
-            desc = device.get('Desc', 'Unknown Desc')
-            if desc == 'Mellanox Technologies Device':
-                desc = 'Mellanox Technologies Device [Bluefield-3]'
-            pn = device.get('PN', 'Unknown PN')
-            fw = device.get('FW', 'Unknown FW')
-            driver = device.get('Driver', 'Unknown Driver')
-            first_pci = device.get('First_PCI', 'Unknown PCI').split('|')[0]
-            button_text = f"{desc}\nPN: {pn}\nFW: {fw}\nDriver: {driver}\nPCI: {first_pci}"
-            button = tk.Button(self.root, text=button_text, command=lambda dev=device: self.show_device_info(dev))
-            button.pack(pady=5)
+    def show_cached_inventory(self, entry):
+        scanned = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry.scanned_at))
+        note = " Refreshing in the background..." if entry.stale else ""
+        self.display_output(f"Cached inventory of {entry.host} from {scanned}.{note}")
+        self.show_device_table(entry.devices)
+        if entry.stale:
+            self.engine.submit(self.refresh_inventory(entry.host, self.username, self.password))
+
+    async def refresh_inventory(self, host, username, password):
+        # Runs on the engine loop, pumped by Tk; a failed refresh keeps the cached devices on screen
+        from fleet import FleetScanner
+        scanner = FleetScanner(self.connection_manager, self.action, inventory=self.inventory)
+        result = await scanner.scan_host_async(self.engine, host, username, password)
+        if not result.ok:
+            logger.warning("Background refresh of %s failed: %s", host, result.error)
+            return
+        self.apply_refreshed_inventory(host, result.devices)
 
-        self.add_installation_buttons()
+    def apply_refreshed_inventory(self, host, devices):
+        if host == self.server_name:
+            self.show_device_table(devices)
+
+    def show_fleet_scan_input(self):
+        spec = simpledialog.askstring("Fleet Scan",
+                                      "Enter a host list file or hosts/ranges (e.g. node[01-16].lab, 10.0.0.1-32):")
+        if not spec:
+            self.show_message("No host list entered.")
+            return
+        from fleet import parse_host_list
+        hosts = parse_host_list(spec)
+        invalid = [host for host in hosts if not self.connection_manager.is_valid_hostname_or_ip(host)]
+        if not hosts or invalid:
+            self.show_message(f"The host list is invalid: {', '.join(invalid[:10]) or spec}")
+            return
+
+        username = simpledialog.askstring("Input", "Please enter your username:")
+        if not username:
+            self.show_message("No username entered.")
+            return
+        password = simpledialog.askstring("Input", "Please enter your password:", show='*')
+        if not password:
+            self.show_message("No password entered.")
+            return
+
+        self.username = username
+        self.password = password
+        self.show_fleet_window(hosts, username, password)
+
+    def show_fleet_window(self, hosts, username, password):
+        fleet_window = tk.Toplevel(self.root)
+        fleet_window.title(f"Fleet Scan ({len(hosts)} hosts)")
+        fleet_window.geometry("1200x600")
+
+        status_label = tk.Label(fleet_window, text=f"Scanning 0/{len(hosts)} hosts...")
+        status_label.pack(pady=5)
+
+        failed_label = tk.Label(fleet_window, text="", fg='red', anchor='w', justify=tk.LEFT)
+        failed_label.pack(fill='x', padx=10)
+
+        from device_table import DeviceTable
+        table = DeviceTable(fleet_window, on_activate=self.show_device_info, visible_rows=25)
+        table.frame.pack(expand=True, fill='both')
+
+        from fleet import FleetScanner
+        scanner = FleetScanner(self.connection_manager, self.action, inventory=self.inventory)
+        scanned = []
+        failed = []
+
+        def add_results(host_results):
+            if not fleet_window.winfo_exists():
+                return
+            for item in host_results:
+                scanned.append(item)
+                table.upsert(item.devices)
+                if not item.ok:
+                    failed.append(f"{item.host}: {item.error}")
+            status_label.config(text=f"Scanning {len(scanned)}/{len(hosts)} hosts...")
+            if failed:
+                failed_label.config(text=f"{len(failed)} hosts failed: " + "; ".join(failed[:5])
+                                         + (" ..." if len(failed) > 5 else ""))
+
+        def finish_scan(task):
+            if task.cancelled():
+                return
+            summary = task.result()
+            if fleet_window.winfo_exists():
+                status_label.config(text=summary.summary())
+
+        # Every host is a coroutine on the engine loop; results are still batched into the table per frame
+        scan = self.engine.submit(scanner.scan_async(self.engine, hosts, username, password,
+                                                     on_result=lambda item: self.dispatcher.post_batched(add_results,
+                                                                                                         item)),
+                                  on_done=finish_scan)
+
+        def close_fleet_window():
+            scan.cancel()
+            fleet_window.destroy()
+
+        fleet_window.protocol("WM_DELETE_WINDOW", close_fleet_window)
+
+    def display_output(self, output):
+        if not hasattr(self, 'output_viewer'):
+            from log_viewer import LogViewer
+            self.output_viewer = LogViewer(self.root)
+            self.output_frame = self.output_viewer.frame
+        self.output_frame.pack(expand=True, fill='both', padx=10, pady=10)
+        self.output_viewer.append_text(output)
+
+    def show_device_table(self, devices):
+        self.devices = list(devices)
+        if not hasattr(self, 'device_table'):
+            from device_table import DeviceTable
+            self.device_table = DeviceTable(self.root, on_activate=self.show_device_info)
+            self.device_table.frame.pack(expand=True, fill='both', padx=10, pady=5)
+            self.add_installation_buttons()
+        self.device_table.replace(self.devices)
+
+    def device_choice(self, device):
+        from device_catalog import catalog
+        desc = device.get('Desc', 'Unknown Desc')
+        model = catalog().lookup(device)
+        if model is not None and model.name.lower() not in desc.lower():
+            # e.g. 'Mellanox Technologies Device' when the host's pci.ids predates the card
+            desc = f"{desc} [{model.name}]"
+        return f"{desc} | PSID: {device.get('PSID', '')} | PCI: {device.get('First_PCI', 'Unknown PCI')}"
 
     def add_installation_buttons(self):
         install_fw_button = tk.Button(self.root, text="Install FW", command=self.install_fw)
         install_fw_button.pack(pady=5)
 
+        burn_all_button = tk.Button(self.root, text="Install FW on Multiple Devices",
+                                    command=self.show_multi_device_burn_window)
+        burn_all_button.pack(pady=5)
+
         install_ofed_button = tk.Button(self.root, text="Install OFED", command=self.show_ofed_installation_window)
         install_ofed_button.pack(pady=5)
 
@@ -130,6 +488,10 @@ class GUI:
         install_driver_button = tk.Button(self.root, text="Install DOCA", command=self.install_driver)
         install_driver_button.pack(pady=5)
 
+        bluefield_all_button = tk.Button(self.root, text="Install BFB/DOCA on Multiple DPUs",
+                                         command=self.show_multi_dpu_window)
+        bluefield_all_button.pack(pady=5)
+
     # def show_ofed_installation_window(self):
     #     ofed_install_window = tk.Toplevel(self.root)
     #     ofed_install_window.title("Install OFED")
@@ -179,32 +541,31 @@ class GUI:
     def apply_version_ofed(self, version, parent_window):
         self.show_message(f"Applying OFED version {version}")
 
-        ssh = self.connection_manager.ssh_connect(self.server_name, self.username, self.password)
+        ssh = self.connection_manager.get_connection(self.server_name, self.username, self.password)
         if not ssh:
             self.show_message(f"Failed to connect to {self.server_name}")
             return
 
-        self.show_progress_window()
-        threading.Thread(target=self.install_ofed, args=(version, ssh, parent_window)).start()
+        self.prestage("ofed", version, ssh)
+        progress = self.show_progress_window("Installing OFED")
+        self.run_install("ofed", self.install_ofed, version, ssh, parent_window, progress, version=version)
 
     def update_ofed(self, parent_window):
         self.show_message("Updating OFED to latest version")
 
-        ssh = self.connection_manager.ssh_connect(self.server_name, self.username, self.password)
+        ssh = self.connection_manager.get_connection(self.server_name, self.username, self.password)
         if not ssh:
             self.show_message(f"Failed to connect to {self.server_name}")
             return
 
-        self.show_progress_window()
-        threading.Thread(target=self.install_ofed_latest, args=(ssh, parent_window)).start()
-
-    def install_ofed_latest(self, ssh, parent_window):
-        output = self.ofed.install_latest(ssh)
-        self.show_message(output, text_flag=True)
-        self.progress_window.destroy()
-        parent_window.destroy()
-        ssh.close()
+        progress = self.show_progress_window("Installing OFED")
+        self.run_install("ofed", self.install_ofed_latest, ssh, parent_window, progress)
 
+    def install_ofed_latest(self, ssh, parent_window, progress):
+        result = self.ofed.install_latest(ssh, on_line=self.progress_callback(progress),
+                                          keep_output=False)
+        self.finish_installation(result, ssh, parent_window, progress)
+        return result
 
     def apply_ofed_installation(self, version, ofed_install_window):
         ofed_install_window.destroy()
@@ -214,18 +575,20 @@ class GUI:
     def install_fw(self):
         self.show_device_dropdown("Install FW")
 
+    def install_bfb(self):
+        self.show_device_dropdown("Install BFB")
+
     def install_driver(self):
         self.show_device_dropdown("Install DOCA")
 
     def show_device_dropdown(self, action):
-        device_names = [device.get('Desc', 'Unknown Desc') if device.get('Desc',
-                                                                         'Unknown Desc') != 'Mellanox Technologies Device' else 'Mellanox Technologies Device [Bluefield-3]'
-                        for device in self.devices]
+        # Choices map to DeviceRecord keys, so identical cards stay distinguishable
+        choices = {self.device_choice(device): device.key for device in self.devices}
 
         dropdown_window = tk.Toplevel(self.root)
         dropdown_window.title(f"Select Device for {action}")
 
-        window_width = 500
+        window_width = 700
         window_height = 500
         screen_width = self.root.winfo_screenwidth()
         screen_height = self.root.winfo_screenheight()
@@ -237,20 +600,29 @@ class GUI:
         label.pack(pady=10)
 
         selected_device = tk.StringVar()
-        dropdown = ttk.Combobox(dropdown_window, textvariable=selected_device, values=device_names, width=70)
+        dropdown = ttk.Combobox(dropdown_window, textvariable=selected_device, values=list(choices), width=100,
+                                state='readonly')
         dropdown.pack(pady=10)
+        selected = self.device_table.selected() if hasattr(self, 'device_table') else []
+        if selected:
+            selected_device.set(self.device_choice(selected[0]))
 
         select_button = tk.Button(dropdown_window, text="Select",
-                                  command=lambda: self.show_installation_form(dropdown_window, selected_device.get(),
+                                  command=lambda: self.show_installation_form(dropdown_window,
+                                                                              choices.get(selected_device.get()),
                                                                               action))
         select_button.pack(pady=10)
 
-    def show_installation_form(self, parent_window, device_name, action):
+    def show_installation_form(self, parent_window, device_key, action):
+        device = self.device_table.get(device_key) if device_key else None
+        if device is None:
+            self.show_message("No device selected.")
+            return
         if parent_window:
             for widget in parent_window.winfo_children():
                 widget.destroy()
 
-        label = tk.Label(parent_window or self.root, text=f"{action} for {device_name}")
+        label = tk.Label(parent_window or self.root, text=f"{action} for {self.device_choice(device)}")
         label.pack(pady=10)
 
         version_label = tk.Label(parent_window or self.root, text="Enter specific version:")
@@ -264,7 +636,7 @@ class GUI:
             version_entry.insert(tk.END, "DOCA_2.5.2_BSP_4.5.2_Ubuntu_22.04-9.24-06-LTS.dev")
 
         apply_button = tk.Button(parent_window or self.root, text="Apply",
-                                 command=lambda: self.apply_version(device_name, version_entry.get(), action,
+                                 command=lambda: self.apply_version(device_key, version_entry.get(), action,
                                                                     parent_window))
         apply_button.pack(pady=10)
 
@@ -272,85 +644,332 @@ class GUI:
         or_label.pack(pady=5)
 
         auto_update_button = tk.Button(parent_window or self.root, text="Automatic update to latest",
-                                       command=lambda: self.update_device(device_name, action, parent_window))
+                                       command=lambda: self.update_device(device_key, action, parent_window))
         auto_update_button.pack(pady=10)
 
-    def apply_version(self, device_name, version, action, parent_window):
-        self.show_message(f"Applying version {version} to {device_name} for {action}")
+    def show_multi_device_burn_window(self, component="firmware"):
+        from device_jobs import device_label
+        from planner import is_bluefield
+        devices = [device for device in self.devices if component == "firmware" or is_bluefield(device)]
+        if not devices:
+            self.show_message("No BlueField devices found.")
+            return
+        title = {"firmware": "Install FW on Multiple Devices", "bfb": "Install BFB on Multiple DPUs",
+                 "doca": "Install DOCA on Multiple DPUs"}[component]
+        burn_window = tk.Toplevel(self.root)
+        burn_window.title(title)
+        burn_window.geometry("700x500")
 
-        device = next((d for d in self.devices if d.get('Desc', '') == device_name), None)
-        if not device:
-            self.show_message(f"Device {device_name} not found.")
+        label = tk.Label(burn_window, text="Select devices (Ctrl/Shift-click for several):")
+        label.pack(pady=10)
+
+        device_list = tk.Listbox(burn_window, selectmode=tk.EXTENDED, width=90, height=12, exportselection=False)
+        for device in devices:
+            device_list.insert(tk.END, f"{device.get('Desc', 'Unknown Desc')} | PSID: {device.get('PSID', '')} | "
+                                       f"FW: {device.get('FW', '')} | PCI: {device_label(device)}")
+        device_list.pack(pady=5)
+
+        def select_all_matching():
+            psids = {devices[i].get('PSID') for i in device_list.curselection()}
+            for i, device in enumerate(devices):
+                if device.get('PSID') in psids:
+                    device_list.selection_set(i)
+
+        matching_button = tk.Button(burn_window, text="Select All Matching PSID", command=select_all_matching)
+        matching_button.pack(pady=5)
+
+        version_label = tk.Label(burn_window, text="Enter specific version:")
+        version_label.pack(pady=5)
+        version_entry = tk.Entry(burn_window, width=50)
+        version_entry.pack(pady=5)
+        if component == "firmware":
+            version_entry.insert(tk.END, "12.22.1994")
+        elif component == "doca":
+            version_entry.insert(tk.END, "DOCA_2.5.2_BSP_4.5.2_Ubuntu_22.04-9.24-06-LTS.dev")
+
+        button_text = "Burn Selected" if component == "firmware" else "Install Selected"
+        apply_button = tk.Button(burn_window, text=button_text,
+                                 command=lambda: self.apply_version_many(
+                                     [devices[i] for i in device_list.curselection()], version_entry.get(),
+                                     burn_window, component))
+        apply_button.pack(pady=10)
+
+    def show_multi_dpu_window(self):
+        choice_window = tk.Toplevel(self.root)
+        choice_window.title("Install on Multiple DPUs")
+
+        label = tk.Label(choice_window, text="Every selected DPU is installed through its own rshim device, "
+                                             "all at the same time.")
+        label.pack(pady=10, padx=10)
+
+        def choose(component):
+            choice_window.destroy()
+            self.show_multi_device_burn_window(component)
+
+        for component, text in (("bfb", "BFB"), ("doca", "DOCA")):
+            button = tk.Button(choice_window, text=text, width=20,
+                               command=lambda component=component: choose(component))
+            button.pack(pady=5)
+
+    def apply_version_many(self, devices, version, parent_window, component="firmware"):
+        if not devices:
+            self.show_message("No devices selected.")
             return
 
-        ssh = self.connection_manager.ssh_connect(self.server_name, self.username, self.password)
+        ssh = self.connection_manager.get_connection(self.server_name, self.username, self.password)
         if not ssh:
             self.show_message(f"Failed to connect to {self.server_name}")
             return
 
-        if action == "Install FW":
-            self.show_progress_window()
-            threading.Thread(target=self.install_firmware, args=(device, version, ssh, parent_window)).start()
-        elif action == "Install OFED":
+        if not self.confirm_reinstall(component, devices, version):
+            self.connection_manager.release_connection(ssh)
+            return
+        installer = {"firmware": self.firmware, "bfb": self.bfb, "doca": self.doca}[component]
+        name = {"firmware": "Firmware", "bfb": "BFB", "doca": "DOCA"}[component]
+        self.prestage(component, version, ssh, devices)
+        progress = self.show_progress_window(f"Installing {name} on {len(devices)} devices")
+        self.run_install(component, self.install_many, installer, devices, version, ssh, parent_window, progress,
+                         devices=devices, version=version)
+
+    def apply_version(self, device_key, version, action, parent_window):
+        device = self.device_table.get(device_key)
+        if not device:
+            self.show_message(f"Device {device_key} not found.")
+            return
+        self.show_message(f"Applying version {version} to {self.device_choice(device)} for {action}")
+
+        if action == "Install OFED":
             # Directly show OFED installation window, no need to create a separate thread
             self.show_ofed_installation_window()
-        elif action == "Install BFB":
-            threading.Thread(target=self.install_bfb, args=(device, version, ssh, parent_window)).start()
-        elif action == "Install DOCA":
-            threading.Thread(target=self.install_driver, args=(device, version, ssh, parent_window)).start()
+            return
 
-    def install_firmware(self, device, version, ssh, parent_window):
-        output = self.firmware.install(device, version, ssh)
-        self.show_message(output, text_flag=True)
-        self.progress_window.destroy()
-        if parent_window:
-            parent_window.destroy()
-        ssh.close()
+        ssh = self.connection_manager.get_connection(self.server_name, self.username, self.password)
+        if not ssh:
+            self.show_message(f"Failed to connect to {self.server_name}")
+            return
 
-    def install_bfb(self, device, version, ssh, parent_window):
-        output = self.bfb.install(device, version, ssh)
-        self.show_message(output, text_flag=True)
-        if parent_window:
-            parent_window.destroy()
-        ssh.close()
+        step = {"Install FW": "firmware", "Install BFB": "bfb", "Install DOCA": "doca"}.get(action)
+        if step and not self.confirm_reinstall(step, [device], version):
+            self.connection_manager.release_connection(ssh)
+            return
 
-    def install_ofed(self, version, ssh, parent_window):
-        output = self.ofed.install(version, ssh)
-        self.show_message(output, text_flag=True)
-        self.progress_window.destroy()
-        if parent_window:
+        if action == "Install FW":
+            self.prestage("firmware", version, ssh, [device])
+            progress = self.show_progress_window("Installing Firmware")
+            self.run_install("firmware", self.install_firmware, device, version, ssh, parent_window, progress,
+                             devices=[device], version=version)
+        elif action == "Install BFB":
+            self.prestage("bfb", version, ssh)
+            progress = self.show_progress_window("Installing BFB")
+            self.run_install("bfb", self.install_bfb_image, device, version, ssh, parent_window, progress,
+                             devices=[device], version=version)
+        elif action == "Install DOCA":
+            self.prestage("doca", version, ssh)
+            progress = self.show_progress_window("Installing DOCA")
+            self.run_install("doca", self.install_doca, device, version, ssh, parent_window, progress,
+                             devices=[device], version=version)
+
+    def prestage(self, component, version, ssh, devices=()):
+        # Starts copying the release payloads to the host while the install waits for the scheduler;
+        # devices sharing an image then read one local copy. Firmware images are resolved over SSH
+        # first, so staging is started from its own thread to keep the UI responsive.
+        threading.Thread(target=self.stage_payloads, args=(component, version, ssh, devices), name="prestage",
+                         daemon=True).start()
+
+    def stage_payloads(self, component, version, ssh, devices=()):
+        """
+        Start staging the payloads of an installation; a failure only means installing from NFS.
+
+        Args:
+            component (str): 'firmware', 'ofed', 'bfb' or 'doca'.
+            version (str): The version to be installed.
+            ssh (paramiko.SSHClient): The SSH client for the host.
+            devices (list): The devices whose firmware images are staged; unused for other components.
+        """
+        try:
+            if component == 'firmware':
+                for device in devices:
+                    self.firmware.prestage(device, version, ssh)
+            else:
+                {'ofed': self.ofed, 'bfb': self.bfb, 'doca': self.doca}[component].prestage(version, ssh)
+        except Exception as e:
+            logger.warning("Staging %s %s failed, installing from NFS: %s", component, version, e)
+
+    def confirm_reinstall(self, step, devices, version):
+        """Ask before repeating an installation the journal records as completed on this host."""
+        from device_jobs import device_label
+        from job_journal import DONE
+        done = []
+        for device in devices:
+            entry = self.journal.last(self.server_name, step, device_label(device))
+            if entry is not None and entry.state == DONE and entry.version == version:
+                done.append(device_label(device))
+        if not done:
+            return True
+        return messagebox.askyesno("Already installed",
+                                   f"{step} {version} was already installed on {', '.join(done)} of "
+                                   f"{self.server_name}. Install it again?")
+
+    def run_install(self, name, worker, *args, devices=(), version=None):
+        """
+        Queue an installation worker on the shared scheduler and journal it.
+
+        All installs share one scheduler, which bounds the number of jobs and of hosts reading
+        NFS at once. Every device (or the host, for host-wide installs) gets a journal start
+        event before the worker runs and an end event with its result afterwards.
+
+        If the worker raises, its connection is discarded and the error replaces the progress
+        window, so a broken transport never leaves the window open or the connection checked out.
+
+        Args:
+            name (str): The step name: 'firmware', 'ofed', 'bfb' or 'doca'.
+            worker (callable): Called with args on a worker thread; returns a CommandResult or
+                a list of DeviceJobResult. Like all install_* workers, its last three arguments
+                are the SSH client, the parent window and the ProgressWindow.
+            devices (list): The devices the worker installs on.
+            version (str): The version installed; None for the latest release.
+        """
+        from device_jobs import device_label
+        host = self.server_name
+
+        def job():
+            targets = [device_label(device) for device in devices] or [None]
+            for pci in targets:
+                self.journal.begin(host, name, pci, version)
+            outcomes = {}
+            ok = False
+            try:
+                result = worker(*args)
+                if isinstance(result, list):
+                    outcomes = {device_label(item.device): item.ok for item in result}
+                else:
+                    ok = result.ok
+                return result
+            except Exception as e:
+                self.abort_installation(e, *args[-3:])
+                raise
+            finally:
+                for pci in targets:
+                    self.journal.finish(host, name, pci, version, ok=outcomes.get(pci, ok))
+
+        self.scheduler.add(host, name, job, uses_nfs=True)
+
+    # The install_* workers run off the main thread: they only talk to the UI through self.dispatcher
+
+    def install_firmware(self, device, version, ssh, parent_window, progress):
+        result = self.firmware.install(device, version, ssh, on_line=self.progress_callback(progress),
+                                       keep_output=False)
+        self.finish_installation(result, ssh, parent_window, progress)
+        return result
+
+    def install_bfb_image(self, device, version, ssh, parent_window, progress):
+        result = self.bfb.install(device, version, ssh, on_line=self.progress_callback(progress),
+                                  keep_output=False)
+        self.finish_installation(result, ssh, parent_window, progress)
+        return result
+
+    def install_ofed(self, version, ssh, parent_window, progress):
+        result = self.ofed.install(version, ssh, on_line=self.progress_callback(progress),
+                                   keep_output=False)
+        self.finish_installation(result, ssh, parent_window, progress)
+        return result
+
+    def install_doca(self, device, version, ssh, parent_window, progress):
+        result = self.doca.install(device, version, ssh, on_line=self.progress_callback(progress),
+                                   keep_output=False)
+        self.finish_installation(result, ssh, parent_window, progress)
+        return result
+
+    def install_many(self, installer, devices, version, ssh, parent_window, progress):
+        start = time.monotonic()
+        results = installer.install_many(devices, version, ssh, on_line=self.progress_callback(progress),
+                                         keep_output=False)
+        self.connection_manager.release_connection(ssh)
+        self.inventory.mark_dirty(self.server_name)
+        from device_jobs import device_label, format_results_table
+        table = format_results_table(results, total_elapsed=time.monotonic() - start)
+        # The installer output is already in the progress log; only errors and messages are added
+        notes = [f"{device_label(item.device)}: {item.error or item.result.output.strip()}" for item in results
+                 if item.error or item.result.output.strip()]
+        heading = f"Installation finished: {sum(item.ok for item in results)} of {len(results)} devices succeeded"
+        self.dispatcher.post(self.show_installation_text, "\n".join([table] + notes), parent_window, progress,
+                             heading=heading)
+        return results
+
+    def progress_callback(self, progress):
+        return lambda line: self.dispatcher.post_batched(progress.append_lines, line)
+
+    def finish_installation(self, result, ssh, parent_window, progress):
+        self.connection_manager.metrics.observe_command(result, host=self.server_name)
+        self.connection_manager.release_connection(ssh)
+        self.inventory.mark_dirty(self.server_name)
+        self.dispatcher.post(self.show_installation_result, result, parent_window, progress)
+
+    def abort_installation(self, error, ssh, parent_window, progress):
+        # The transport may be left mid-command, so the connection is not reused
+        if self.connection_manager.pool.checked_out(ssh):
+            self.connection_manager.discard_connection(ssh)
+        self.inventory.mark_dirty(self.server_name)
+        self.dispatcher.post(self.show_installation_text, f"Installation failed: {error}", parent_window, progress,
+                             heading="Installation failed")
+
+    def show_installation_result(self, result, parent_window, progress):
+        # Installer output was streamed into the progress log and not kept; result.output only
+        # holds messages of installs that never ran a command
+        if result.ok:
+            heading = f"Installation finished in {result.duration:.1f} s"
+        elif result.exit_status is None:
+            heading = "Installation failed"
+        else:
+            heading = f"Installation failed (exit status {result.exit_status})"
+        self.show_installation_text(result.output, parent_window, progress, heading=heading)
+
+    def show_installation_text(self, text, parent_window, progress, heading="Installation finished"):
+        # The progress window becomes the result window, so the log is held and spilled only once
+        if not progress.finish(heading, text):
+            tail = "\n".join(text.splitlines()[-20:])
+            self.show_message(f"{heading}\n\n{tail}" if tail.strip() else heading)
+        if parent_window and parent_window.winfo_exists():
             parent_window.destroy()
-        ssh.close()
 
-    def install_driver(self, device, version, ssh, parent_window):
-        output = self.connection_manager.install_driver(device, version, ssh)
-        self.show_message(output)
-        if parent_window:
-            parent_window.destroy()
-        ssh.close()
+    def show_progress_window(self, title="Installing Firmware"):
+        return ProgressWindow(self.root, title)
 
-    def show_progress_window(self):
-        self.progress_window = tk.Toplevel(self.root)
-        self.progress_window.title("Installing Firmware")
-        self.progress_window.geometry("400x200")
-        label = tk.Label(self.progress_window, text="Installation in progress...")
-        label.pack(pady=40)
+    def update_device(self, device_key, action, parent_window):
+        device = self.device_table.get(device_key)
+        if not device:
+            self.show_message(f"Device {device_key} not found.")
+            return
+        self.show_message(f"Updating {self.device_choice(device)} to latest version for {action}")
 
-        self.progress_label = tk.Label(self.progress_window, text="")
-        self.progress_label.pack(pady=40)
+        if action == "Install OFED":
+            self.show_ofed_installation_window()
+            return
 
-        self.update_progress()
+        ssh = self.connection_manager.get_connection(self.server_name, self.username, self.password)
+        if not ssh:
+            self.show_message(f"Failed to connect to {self.server_name}")
+            return
 
-    def update_progress(self):
-        current_text = self.progress_label.cget("text")
-        new_text = current_text + "." if len(current_text) < 3 else ""
-        self.progress_label.config(text=new_text)
-        self.progress_label.after(500, self.update_progress)
+        if action == "Install FW":
+            progress = self.show_progress_window("Installing Latest Firmware")
+            self.run_install("firmware", self.install_latest, self.firmware, device, ssh, parent_window, progress,
+                             devices=[device])
+        elif action == "Install BFB":
+            progress = self.show_progress_window("Installing Latest BFB")
+            self.run_install("bfb", self.install_latest, self.bfb, device, ssh, parent_window, progress,
+                             devices=[device])
+        elif action == "Install DOCA":
+            progress = self.show_progress_window("Installing Latest DOCA")
+            self.run_install("doca", self.install_latest, self.doca, device, ssh, parent_window, progress,
+                             devices=[device])
 
-    def update_device(self, device_name, action, parent_window):
-        self.show_message(f"Updating {device_name} to latest version for {action}")
-        if parent_window:
-            parent_window.destroy()
+    def install_latest(self, installer, device, ssh, parent_window, progress):
+        # The version is looked up from the cached release index on the worker thread
+        result = installer.install_latest(device, ssh, on_line=self.progress_callback(progress),
+                                          keep_output=False)
+        self.finish_installation(result, ssh, parent_window, progress)
+        return result
 
     def show_device_info(self, device):
         device_window = tk.Toplevel(self.root)
@@ -396,6 +1015,7 @@ class GUI:
             self.output_frame.pack_forget()
 
         self.request_button.pack(pady=10)
+        self.fleet_button.pack(pady=10)
         self.close_button.pack(pady=10)
 
     def center_window(self, window):
@@ -405,23 +1025,29 @@ class GUI:
 
     def show_message(self, message, text_flag=False):
         if text_flag:
+            from log_viewer import LogViewer, new_log_path
             message_window = tk.Toplevel(self.root)
             message_window.title("Message")
             message_window.geometry("700x700")
 
-            text_widget = tk.Text(message_window, wrap=tk.WORD)
-            text_widget.pack(side=tk.LEFT, expand=True, fill='both')
-
-            scrollbar = tk.Scrollbar(message_window, command=text_widget.yview)
-            scrollbar.pack(side=tk.RIGHT, fill='y')
-
-            text_widget.config(yscrollcommand=scrollbar.set)
-            text_widget.insert(tk.END, message)
-            text_widget.config(state=tk.DISABLED)
+            viewer = LogViewer(message_window, spill_path=new_log_path("message"))
+            viewer.frame.pack(expand=True, fill='both')
+            viewer.append_text(message)
         else:
             messagebox.showinfo("Message", message)
 
     def close_application(self):
+        self.dispatcher.stop()
+        if self._engine is not None:
+            self._engine.close()
+        if self._scheduler is not None:
+            self._scheduler.shutdown(wait=False)
+        self.connection_manager.close_connections()
+        if self._journal is not None:
+            self._journal.close()
+        if self.connection_manager.metrics.samples():
+            from app_paths import app_path
+            self.connection_manager.metrics.write_jsonl(app_path("metrics.jsonl"))
         self.root.destroy()
 
 
@@ -0,0 +1,114 @@
+import json
+import sqlite3
+import threading
+import time
+
+from app_paths import app_path
+from lshca_parser import DeviceRecord
+
+
+class InventoryEntry:
+    __slots__ = ('host', 'devices', 'scanned_at', 'ttl', 'dirty')
+
+    def __init__(self, host, devices, scanned_at, ttl, dirty):
+        self.host = host
+        self.devices = devices
+        self.scanned_at = scanned_at
+        self.ttl = ttl
+        self.dirty = dirty
+
+    @property
+    def age(self):
+        return time.time() - self.scanned_at
+
+    @property
+    def stale(self):
+        return self.dirty or self.age > self.ttl
+
+
+class InventoryStore:
+    DEFAULT_TTL = 3600
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL):
+        """
+        Initialize the on-disk inventory cache.
+
+        Every host has one entry with its device records, scan time and TTL. Entries become
+        stale when the TTL runs out or when an install touches the host (mark_dirty).
+
+        Args:
+            path (str): SQLite database path; defaults to the application directory.
+            ttl (float): Default seconds an entry stays fresh.
+        """
+        self.path = path or app_path("inventory.sqlite3")
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS hosts ("
+            "host TEXT PRIMARY KEY, devices TEXT NOT NULL, scanned_at REAL NOT NULL, "
+            "ttl REAL NOT NULL, dirty INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.commit()
+
+    def get(self, host):
+        """
+        Return the cached inventory of a host, fresh or not.
+
+        Args:
+            host (str): The host name or IP address.
+
+        Returns:
+            InventoryEntry: The entry, or None if the host was never scanned.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT host, devices, scanned_at, ttl, dirty FROM hosts WHERE host = ?",
+                                   (host,)).fetchone()
+        return self._entry(row) if row else None
+
+    def get_many(self, hosts):
+        """Return {host: InventoryEntry} for the hosts that have an entry."""
+        hosts = list(hosts)
+        rows = []
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for i in range(0, len(hosts), 500):
+                chunk = hosts[i:i + 500]
+                rows += self._db.execute("SELECT host, devices, scanned_at, ttl, dirty FROM hosts "
+                                         f"WHERE host IN ({', '.join('?' * len(chunk))})", chunk).fetchall()
+        return {row[0]: self._entry(row) for row in rows}
+
+    def put(self, host, devices, ttl=None):
+        """
+        Store a fresh scan of a host, clearing its dirty flag.
+
+        Args:
+            host (str): The host name or IP address.
+            devices (list): The DeviceRecord objects of the host.
+            ttl (float): Seconds the entry stays fresh; defaults to the store TTL.
+        """
+        data = json.dumps([device.to_dict() for device in devices])
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO hosts (host, devices, scanned_at, ttl, dirty) "
+                             "VALUES (?, ?, ?, ?, 0)", (host, data, time.time(), ttl or self.ttl))
+            self._db.commit()
+
+    def mark_dirty(self, host):
+        """Flag a host as changed (e.g. after an install) so the next lookup re-scans it."""
+        with self._lock:
+            self._db.execute("UPDATE hosts SET dirty = 1 WHERE host = ?", (host,))
+            self._db.commit()
+
+    def stale_hosts(self, hosts):
+        """Return the hosts, in order, that have no entry or only a stale one."""
+        entries = self.get_many(hosts)
+        return [host for host in hosts if host not in entries or entries[host].stale]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _entry(self, row):
+        host, devices, scanned_at, ttl, dirty = row
+        records = [DeviceRecord.from_dict(device) for device in json.loads(devices)]
+        return InventoryEntry(host, records, scanned_at, ttl, bool(dirty))
@@ -0,0 +1,242 @@
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+
+from app_paths import app_path
+
+# State of a journaled step
+STARTED = 'started'
+DONE = 'done'
+FAILED = 'failed'
+
+KEEP_RUNS = 50
+LEASE_SECONDS = 60  # A run whose lease file was not refreshed for this long is no longer running
+
+
+class JournalEntry:
+    __slots__ = ('run', 'host', 'step', 'device', 'version', 'state', 'started', 'finished', 'detail')
+
+    def __init__(self, run, host, step, device, version, started):
+        self.run = run
+        self.host = host
+        self.step = step
+        self.device = device
+        self.version = version
+        self.state = STARTED
+        self.started = started
+        self.finished = None
+        self.detail = {}
+
+    @property
+    def key(self):
+        return (self.host, self.step, self.device)
+
+    def describe(self):
+        target = f" {self.device}" if self.device else ""
+        return f"{self.host}{target}: {self.step} {self.version or ''}".rstrip()
+
+
+def read_events(path):
+    """
+    Read the events of a journal file, skipping a line torn by a crash mid-write.
+
+    Args:
+        path (str): The journal file.
+
+    Returns:
+        list: The event dictionaries in the order they were written.
+    """
+    events = []
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return events
+
+
+class JobJournal:
+    def __init__(self, path=None, resume=None, description=None):
+        """
+        Open an append-only journal of install steps.
+
+        Every step writes a start event before it runs and an end event with its result
+        after it finished; each event is fsynced, so after a crash, sleep or kill the journal
+        tells which steps completed and which were in flight. Events belong to a run; a new
+        journal starts a run, and resume continues an earlier one so its completed steps can
+        be skipped.
+
+        While the journal is open, a background thread keeps refreshing a lease file for the
+        run, so another process sharing the journal file (e.g. a second GUI) can tell the
+        run's in-flight steps from interrupted ones.
+
+        Args:
+            path (str): The journal file; defaults to journal.jsonl in the application directory.
+            resume (str or bool): A run id to continue, or True for the most recent run.
+            description (str): Stored with a new run, e.g. the command line.
+
+        Raises:
+            ValueError: If there is no run to resume.
+        """
+        self.path = path or app_path("journal.jsonl")
+        self._lock = threading.Lock()
+        events = read_events(self.path)
+        runs = [event['run'] for event in events if event.get('event') == 'run']
+        self.history = {}  # (host, step, device) -> latest JournalEntry of any run
+        self.entries = {}  # (host, step, device) -> JournalEntry of this run
+        if resume:
+            self.run_id = runs[-1] if resume is True and runs else resume
+            if self.run_id not in runs:
+                raise ValueError(f"No run {'to resume' if resume is True else resume} in {self.path}")
+        else:
+            self.run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+            if len(runs) >= KEEP_RUNS:
+                events = self._compact(events, set(runs[-(KEEP_RUNS - 1):]))
+        for event in events:
+            self._apply(event)
+        self._file = open(self.path, 'a')
+        if self._file.tell() and not self._ends_with_newline():
+            self._file.write("\n")  # Terminate a line torn by a crash so the next event stays parseable
+        if not resume:
+            self._write({"event": "run", "run": self.run_id, "ts": time.time(), "description": description})
+        self._closed = threading.Event()
+        self._prune_leases()
+        self._touch_lease()
+        threading.Thread(target=self._keep_lease, name="journal-lease", daemon=True).start()
+
+    def begin(self, host, step, device=None, version=None, **detail):
+        """Record that a step is about to run; call before any change is made on the host."""
+        self._write({"event": "start", "run": self.run_id, "ts": time.time(), "host": host, "step": step,
+                     "device": device, "version": version, **detail})
+
+    def finish(self, host, step, device=None, version=None, ok=True, **detail):
+        """Record the result of a step started with begin()."""
+        self._write({"event": "end", "run": self.run_id, "ts": time.time(), "host": host, "step": step,
+                     "device": device, "version": version, "ok": bool(ok), **detail})
+
+    def entry(self, host, step, device=None):
+        """Return this run's JournalEntry for a step, or None if it never started in this run."""
+        with self._lock:
+            return self.entries.get((host, step, device))
+
+    def last(self, host, step, device=None):
+        """Return the latest JournalEntry for a step across all runs, or None."""
+        with self._lock:
+            return self.history.get((host, step, device))
+
+    def completed(self, host, step, device=None, version=None):
+        """Return True if this run already finished the step successfully at this version."""
+        entry = self.entry(host, step, device)
+        return entry is not None and entry.state == DONE and entry.version == version
+
+    def interrupted(self, include_current=False):
+        """
+        Return the steps that started but never finished, e.g. because the tool was killed.
+
+        Args:
+            include_current (bool): Also return steps of this run that are still running.
+
+        Returns:
+            list: JournalEntry objects, oldest first.
+        """
+        with self._lock:
+            entries = [entry for entry in self.history.values()
+                       if entry.state == STARTED and (include_current or entry.run != self.run_id)]
+        live = {run for run in {entry.run for entry in entries} if run != self.run_id and self.is_running(run)}
+        return sorted((entry for entry in entries if entry.run not in live), key=lambda entry: entry.started)
+
+    def is_running(self, run_id):
+        """Return True if a process still has run_id open, judging by the freshness of its lease file."""
+        try:
+            return time.time() - os.stat(self._lease_path(run_id)).st_mtime < LEASE_SECONDS
+        except OSError:
+            return False
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+        try:
+            os.remove(self._lease_path(self.run_id))
+        except OSError:
+            pass
+
+    def _lease_path(self, run_id):
+        return f"{self.path}.{run_id}.lease"
+
+    def _touch_lease(self):
+        if self._closed.is_set():
+            return
+        try:
+            with open(self._lease_path(self.run_id), 'a'):
+                pass
+            os.utime(self._lease_path(self.run_id))
+        except OSError:
+            pass  # Without a lease other processes treat the run's open steps as interrupted
+
+    def _keep_lease(self):
+        while not self._closed.wait(LEASE_SECONDS / 4):
+            self._touch_lease()
+
+    def _prune_leases(self):
+        # Leases left behind by runs that crashed
+        for path in glob.glob(glob.escape(self.path) + ".*.lease"):
+            try:
+                if time.time() - os.stat(path).st_mtime >= LEASE_SECONDS:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def _write(self, event):
+        line = json.dumps(event, sort_keys=True)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._apply_locked(event)
+
+    def _apply(self, event):
+        with self._lock:
+            self._apply_locked(event)
+
+    def _apply_locked(self, event):
+        kind = event.get('event')
+        if kind not in ('start', 'end'):
+            return
+        key = (event.get('host'), event.get('step'), event.get('device'))
+        entry = self.history.get(key)
+        if kind == 'start' or entry is None or entry.run != event.get('run'):
+            entry = JournalEntry(event.get('run'), key[0], key[1], key[2], event.get('version'), event.get('ts'))
+            self.history[key] = entry
+        if kind == 'end':
+            entry.state = DONE if event.get('ok') else FAILED
+            entry.finished = event.get('ts')
+        entry.detail = {name: value for name, value in event.items()
+                        if name not in ('event', 'run', 'ts', 'host', 'step', 'device', 'version', 'ok')}
+        if entry.run == self.run_id:
+            self.entries[key] = entry
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _compact(self, events, keep):
+        # Rewrite the file with only the newest runs, atomically so a crash keeps the old file
+        events = [event for event in events if event.get('run') in keep]
+        temp = f"{self.path}.tmp"
+        with open(temp, 'w') as f:
+            for event in events:
+                f.write(json.dumps(event, sort_keys=True) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+        return events
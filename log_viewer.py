@@ -0,0 +1,281 @@
+import bisect
+import glob
+import gzip
+import itertools
+import os
+import re
+import time
+import tkinter as tk
+from array import array
+from collections import deque
+
+from app_paths import app_path
+
+ERROR_PATTERN = re.compile(r"\b(error|errors|failed|failure|fatal)\b|^-E-", re.IGNORECASE)
+KEEP_LOG_FILES = 50
+
+
+def new_log_path(title):
+    """Return a fresh path for a spilled log in the application's logs directory, pruning old logs."""
+    directory = os.path.dirname(app_path("logs", "x"))
+    for old in sorted(glob.glob(os.path.join(directory, "*.log.gz")))[:-KEEP_LOG_FILES]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", title).strip('-').lower() or "log"
+    return os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{time.monotonic_ns() % 10 ** 6}-{slug}.log.gz")
+
+
+class LogBuffer:
+    def __init__(self, max_lines=10000, spill_path=None, max_errors=10000):
+        """
+        Keep the newest lines of a log in memory and the complete log in a gzip file.
+
+        The numbers of the newest max_errors error lines are kept as well; errors before them
+        are found again in the spill file.
+
+        Args:
+            max_lines (int): Lines kept in the in-memory ring.
+            spill_path (str): Where the complete log is written; None keeps only the ring.
+            max_errors (int): Error line numbers kept in memory.
+        """
+        self.ring = deque(maxlen=max_lines)
+        self.total = 0
+        self.max_errors = max_errors
+        self.errors = array('q')  # ascending numbers of the retained lines matching ERROR_PATTERN
+        self.error_count = 0
+        self._errors_from = 0  # errors is complete from this line number on
+        self.spill_path = spill_path
+        self._spill = gzip.open(spill_path, 'wt', encoding='utf-8', compresslevel=1) if spill_path else None
+
+    @property
+    def first_in_ring(self):
+        return self.total - len(self.ring)
+
+    def append(self, lines):
+        for line in lines:
+            if ERROR_PATTERN.search(line):
+                self.errors.append(self.total)
+                self.error_count += 1
+            self.ring.append(line)
+            self.total += 1
+        if len(self.errors) > self.max_errors:
+            # Drop the older half at once, so trimming costs O(1) per error
+            drop = len(self.errors) - self.max_errors // 2
+            self._errors_from = self.errors[drop - 1] + 1
+            del self.errors[:drop]
+        if self._spill:
+            self._spill.write(''.join(line + '\n' for line in lines))
+
+    def close(self):
+        if self._spill:
+            self._spill.close()
+            self._spill = None
+
+    def lines(self, start, count):
+        """Return up to count lines starting at line number start, from the ring or, for older lines, the spill file."""
+        start = max(0, start)
+        end = min(start + count, self.total)
+        if start >= self.first_in_ring:
+            offset = start - self.first_in_ring
+            return list(itertools.islice(self.ring, offset, offset + end - start))
+        return list(itertools.islice(self._spilled(), start, end))
+
+    def find(self, text, start=0):
+        """
+        Find the first line at or after start that contains text, ignoring case.
+
+        Args:
+            text (str): The text to look for.
+            start (int): The line number to start at.
+
+        Returns:
+            int: The line number, or None if no later line matches.
+        """
+        needle = text.lower()
+        if start >= self.first_in_ring or self.spill_path is None:
+            offset = max(0, start - self.first_in_ring)
+            lines = enumerate(itertools.islice(self.ring, offset, None), self.first_in_ring + offset)
+        else:
+            lines = enumerate(itertools.islice(self._spilled(), start, None), start)
+        for number, line in lines:
+            if needle in line.lower():
+                return number
+        return None
+
+    def next_error(self, after):
+        """
+        Return the number of the first error line after line number after, or None.
+
+        Errors older than the retained line numbers are searched in the spill file; without
+        one, the search starts at the oldest retained error.
+        """
+        if after + 1 < self._errors_from and self.spill_path is not None:
+            lines = itertools.islice(self._spilled(), after + 1, self._errors_from)
+            for number, line in enumerate(lines, after + 1):
+                if ERROR_PATTERN.search(line):
+                    return number
+        index = bisect.bisect_right(self.errors, after)
+        return self.errors[index] if index < len(self.errors) else None
+
+    def _spilled(self):
+        if self._spill:
+            self._spill.flush()
+        with gzip.open(self.spill_path, 'rt', encoding='utf-8') as f:
+            try:
+                for line in f:
+                    yield line.rstrip('\n')
+            except EOFError:
+                return  # The writer is still open; everything flushed so far has been read
+
+
+class LogViewer:
+    POLL_MS = 30
+
+    def __init__(self, parent, max_widget_lines=2000, chunk_lines=500, spill_path=None, max_lines=10000):
+        """
+        Show a log of any size without handing all of it to the Text widget.
+
+        Appended lines are inserted in chunks from the Tk loop and the widget keeps at most
+        max_widget_lines; older lines stay in the LogBuffer ring and the complete log is spilled
+        to a gzip file. Search and jump-to-error load the matching region into the widget.
+
+        Args:
+            parent (tk.Widget): The parent widget; pack or grid self.frame.
+            max_widget_lines (int): Lines kept in the Text widget.
+            chunk_lines (int): Lines inserted per Tk loop iteration.
+            spill_path (str): Where the complete log is written; None keeps only the ring.
+            max_lines (int): Lines kept in memory.
+        """
+        self.max_widget_lines = max_widget_lines
+        self.chunk_lines = chunk_lines
+        self.buffer = LogBuffer(max_lines=max_lines, spill_path=spill_path)
+        self._pending = deque(maxlen=max_widget_lines)  # (line number, line) not inserted yet
+        self._first = 0  # number of the first line in the widget
+        self._last = 0  # number after the last line in the widget
+        self._follow = True
+        self._position = -1  # line of the last search hit or error jump
+        self._after_id = None
+
+        self.frame = tk.Frame(parent)
+        toolbar = tk.Frame(self.frame)
+        toolbar.pack(fill='x')
+        self.search_entry = tk.Entry(toolbar)
+        self.search_entry.pack(side=tk.LEFT, fill='x', expand=True)
+        self.search_entry.bind("<Return>", lambda event: self.find_next())
+        tk.Button(toolbar, text="Find Next", command=self.find_next).pack(side=tk.LEFT)
+        tk.Button(toolbar, text="Next Error", command=self.next_error).pack(side=tk.LEFT)
+        self.follow_button = tk.Button(toolbar, text="Following", command=self.follow, state=tk.DISABLED)
+        self.follow_button.pack(side=tk.LEFT)
+        self.status_label = tk.Label(self.frame, text="", anchor='w')
+        self.status_label.pack(fill='x')
+
+        self.text = tk.Text(self.frame, wrap=tk.NONE)
+        self.text.tag_config('hit', background='yellow')
+        scrollbar = tk.Scrollbar(self.frame, command=self.text.yview)
+        self.text.config(yscrollcommand=scrollbar.set, state=tk.DISABLED)
+        scrollbar.pack(side=tk.RIGHT, fill='y')
+        self.text.pack(side=tk.LEFT, expand=True, fill='both')
+        self._schedule()
+
+    def append(self, lines):
+        """Add lines to the log; call from the Tk thread."""
+        first = self.buffer.total
+        self.buffer.append(lines)
+        if self._follow:
+            self._pending.extend(zip(itertools.count(first), lines))
+
+    def append_text(self, text):
+        self.append(text.splitlines())
+
+    def close(self):
+        if self._after_id is not None:
+            self.frame.after_cancel(self._after_id)
+            self._after_id = None
+        self.buffer.close()
+
+    def find_next(self):
+        text = self.search_entry.get()
+        if not text:
+            return
+        number = self.buffer.find(text, self._position + 1)
+        if number is None:
+            self._set_status(f"'{text}' not found after line {self._position + 1}")
+            self._position = -1  # Wrap around on the next search
+            return
+        self.show_line(number)
+
+    def next_error(self):
+        number = self.buffer.next_error(self._position)
+        if number is None:
+            self._set_status("No further errors")
+            self._position = -1
+            return
+        self.show_line(number)
+
+    def show_line(self, number):
+        """Stop following the tail and show line number, loading its surroundings if needed."""
+        self._follow = False
+        self._pending.clear()
+        self.follow_button.config(text="Follow Tail", state=tk.NORMAL)
+        if not self._first <= number < self._last:
+            start = max(0, number - self.max_widget_lines // 2)
+            self._replace(start, self.buffer.lines(start, self.max_widget_lines))
+        self._position = number
+        index = f"{number - self._first + 1}.0"
+        self.text.tag_remove('hit', '1.0', tk.END)
+        self.text.tag_add('hit', index, f"{index} lineend")
+        self.text.see(index)
+        self._set_status()
+
+    def follow(self):
+        self._follow = True
+        self._position = -1
+        self.follow_button.config(text="Following", state=tk.DISABLED)
+        start = max(0, self.buffer.total - self.max_widget_lines)
+        self._replace(start, self.buffer.lines(start, self.max_widget_lines))
+        self.text.see(tk.END)
+
+    def _replace(self, start, lines):
+        self.text.config(state=tk.NORMAL)
+        self.text.delete('1.0', tk.END)
+        if lines:
+            self.text.insert(tk.END, '\n'.join(lines) + '\n')
+        self.text.config(state=tk.DISABLED)
+        self._first = start
+        self._last = start + len(lines)
+
+    def _schedule(self):
+        self._after_id = self.frame.after(self.POLL_MS, self._pump)
+
+    def _pump(self):
+        if not self.frame.winfo_exists():
+            self.buffer.close()
+            return
+        if self._pending:
+            chunk = [self._pending.popleft() for _ in range(min(self.chunk_lines, len(self._pending)))]
+            self.text.config(state=tk.NORMAL)
+            if chunk[0][0] != self._last:
+                # Lines were dropped because the widget could not keep up; restart at the chunk
+                self.text.delete('1.0', tk.END)
+                self._first = chunk[0][0]
+            self.text.insert(tk.END, '\n'.join(line for _, line in chunk) + '\n')
+            self._last = chunk[-1][0] + 1
+            excess = (self._last - self._first) - self.max_widget_lines
+            if excess > 0:
+                self.text.delete('1.0', f"{excess + 1}.0")
+                self._first += excess
+            self.text.config(state=tk.DISABLED)
+            self.text.see(tk.END)
+            self._set_status()
+        self._schedule()
+
+    def _set_status(self, note=None):
+        text = (f"{self.buffer.total} lines, {self.buffer.error_count} errors; "
+                f"showing {self._first + 1}-{self._last}")
+        if self.buffer.spill_path:
+            text += f"; full log: {self.buffer.spill_path}"
+        if note:
+            text += f" | {note}"
+        self.status_label.config(text=text)
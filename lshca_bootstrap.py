@@ -0,0 +1,156 @@
+import glob
+import os
+import shlex
+import subprocess
+import sys
+import threading
+
+from app_paths import app_path
+from remote_exec import run_command
+
+
+class LshcaBootstrap:
+    # Exit status of the bootstrap script when lshca is missing and nothing was pushed yet
+    MISSING_EXIT_STATUS = 97
+    # Prints a new private directory for the pushed packages, then the host's Python version and machine
+    PREPARE_SCRIPT = (
+        "mktemp -d /tmp/card_configurator_packages.XXXXXXXX && "
+        "python3 -c 'import platform, sys; print(\"%d.%d %s\" % (sys.version_info[0], sys.version_info[1], "
+        "platform.machine()))'"
+    )
+    # Wheel platforms tried for a host machine such as x86_64 or aarch64; 'any' wheels always match
+    PLATFORM_TAGS = ("manylinux2014_{machine}", "manylinux_2_17_{machine}", "linux_{machine}")
+    PACKAGE_PATTERNS = ("*.whl", "*.tar.gz")
+
+    def __init__(self, package_dir=None):
+        """
+        Initialize the bootstrap with a local package cache shared by all hosts.
+
+        Args:
+            package_dir (str): Directory holding the lshca wheel and its dependencies;
+                defaults to the application directory.
+        """
+        self.package_dir = package_dir or app_path("packages")
+        os.makedirs(self.package_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def script(self, structured=False, install_from=None):
+        """
+        Build the remote script that checks for lshca, installs it if needed and runs it.
+
+        Installation output goes to stderr so stdout only carries the lshca output.
+
+        Args:
+            structured (bool): Ask lshca for JSON output, falling back to text if unsupported.
+            install_from (str): Remote directory with pushed packages to install lshca from.
+
+        Returns:
+            str: The shell script.
+        """
+        if install_from:
+            packages = shlex.quote(install_from)
+            install = (f"pip3 install --no-index --find-links {packages} lshca >&2; status=$?; rm -rf {packages}; "
+                       f"[ $status = 0 ] || exit {self.MISSING_EXIT_STATUS}")
+        else:
+            install = f"echo 'lshca is not installed' >&2; exit {self.MISSING_EXIT_STATUS}"
+        run = "lshca -j 2>/dev/null || lshca" if structured else "lshca"
+        return (f"if command -v lshca >/dev/null 2>&1 || pip3 show lshca >/dev/null 2>&1; "
+                f"then echo 'lshca is already installed.' >&2; else {install}; fi; {run}")
+
+    def run(self, ssh, structured=False, on_line=None, timeout=None):
+        """
+        Check, install and run lshca in one round trip, pushing packages over SFTP only if lshca is missing.
+
+        Args:
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+            structured (bool): Ask lshca for JSON output.
+            on_line (callable): Called with every output line while the script runs.
+            timeout (float): Seconds the script may stay silent before socket.timeout is raised.
+
+        Returns:
+            CommandResult: lshca output on stdout, install messages on stderr.
+        """
+        result = run_command(ssh, self.script(structured), on_line=on_line, timeout=timeout)
+        if result.exit_status != self.MISSING_EXIT_STATUS:
+            return result
+        remote_dir = self.push(ssh)
+        return run_command(ssh, self.script(structured, install_from=remote_dir), on_line=on_line, timeout=timeout)
+
+    def local_packages(self, target=None):
+        """
+        Return the cached lshca packages for a target, downloading them once on this machine if needed.
+
+        For a target, wheels built for its Python version and machine are downloaded; if some
+        package has none, source packages are downloaded instead, which pure-Python packages
+        install from on any host.
+
+        Args:
+            target (tuple): (Python version such as '3.6', machine such as 'x86_64') of the host
+                the packages are for; None for this machine's interpreter.
+
+        Returns:
+            list: Paths of the cached package files.
+
+        Raises:
+            RuntimeError: If the cache is empty and the download fails.
+        """
+        directory = self.package_dir if target is None else os.path.join(self.package_dir, "py{}-{}".format(*target))
+        with self._lock:
+            packages = self._cached_packages(directory)
+            if not packages:
+                error = None
+                for command in self._download_commands(directory, target):
+                    try:
+                        subprocess.check_call(command)
+                        break
+                    except (OSError, subprocess.CalledProcessError) as e:
+                        error = e
+                packages = self._cached_packages(directory)
+                if not packages:
+                    raise RuntimeError(f"No cached lshca package in {directory} and download failed: {error}")
+            return packages
+
+    def _download_commands(self, directory, target):
+        download = [sys.executable, "-m", "pip", "download", "--quiet", "--dest", directory]
+        if target is None:
+            return [download + ["lshca"]]
+        python_version, machine = target
+        platforms = [option for tag in self.PLATFORM_TAGS for option in ("--platform", tag.format(machine=machine))]
+        return [download + ["--only-binary=:all:", "--python-version", python_version] + platforms + ["lshca"],
+                download + ["--no-binary=:all:", "lshca"]]
+
+    def push(self, ssh):
+        """
+        Copy the packages matching the host's Python to a new private directory on the host.
+
+        The directory is created with mktemp, so concurrent pushes and other users of the host
+        never share it; the install script removes it again.
+
+        Args:
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+
+        Returns:
+            str: The remote directory holding the packages.
+
+        Raises:
+            RuntimeError: If the host has no python3 or the directory cannot be created.
+        """
+        result = run_command(ssh, self.PREPARE_SCRIPT)
+        fields = result.stdout.split()
+        if not result.ok or len(fields) != 3:
+            raise RuntimeError(f"Cannot prepare the lshca install: {result.stderr.strip() or result.exit_status}")
+        remote_dir, python_version, machine = fields
+        packages = self.local_packages((python_version, machine))
+        sftp = ssh.open_sftp()
+        try:
+            for path in packages:
+                sftp.put(path, f"{remote_dir}/{os.path.basename(path)}")
+        finally:
+            sftp.close()
+        return remote_dir
+
+    def _cached_packages(self, directory):
+        packages = []
+        for pattern in self.PACKAGE_PATTERNS:
+            packages += glob.glob(os.path.join(directory, pattern))
+        return sorted(packages)
@@ -0,0 +1,305 @@
+import itertools
+import json
+import re
+
+PCI_ADDRESS = re.compile(r"^(?:[0-9a-fA-F]{4}:)?[0-9a-fA-F]{2}:[0-9a-fA-F]{2}\.[0-7]")
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+
+class PciEntry:
+    __slots__ = ('address', 'columns')
+
+    def __init__(self, address, columns):
+        self.address = address
+        self.columns = columns
+
+    def __str__(self):
+        return ' | '.join(self.columns)
+
+
+class DeviceRecord:
+    # lshca field name -> attribute; anything else goes to extra
+    FIELDS = {'Dev': 'dev', 'Desc': 'desc', 'PN': 'pn', 'PSID': 'psid', 'SN': 'sn', 'FW': 'fw',
+              'Driver': 'driver', 'Tempr': 'tempr', 'Host': 'host'}
+
+    __slots__ = ('dev', 'desc', 'pn', 'psid', 'sn', 'fw', 'driver', 'tempr', 'host', 'pci', 'pci_header', 'extra')
+
+    def __init__(self, dev=None):
+        self.dev = dev
+        self.desc = self.pn = self.psid = self.sn = self.fw = self.driver = self.tempr = self.host = None
+        self.pci = []
+        self.pci_header = None
+        self.extra = None
+
+    @property
+    def first_pci(self):
+        return self.pci[0].address if self.pci else None
+
+    @property
+    def key(self):
+        """Stable identity of the device: host plus the first PCI address, falling back to the serial number."""
+        return f"{self.host or ''}/{self.first_pci or self.sn or self.dev}"
+
+    def get(self, key, default=None):
+        """Dictionary-style access with the field names used by lshca (e.g. 'Desc', 'First_PCI', 'PCI')."""
+        if key == 'First_PCI':
+            value = self.first_pci
+        elif key == 'PCI':
+            lines = ([' | '.join(self.pci_header)] if self.pci_header else []) + [str(entry) for entry in self.pci]
+            value = '\n'.join(lines) if lines else None
+        elif key in self.FIELDS:
+            value = getattr(self, self.FIELDS[key])
+        else:
+            value = self.extra.get(key) if self.extra else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self.FIELDS:
+            setattr(self, self.FIELDS[key], value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def to_dict(self):
+        data = {name: getattr(self, attr) for name, attr in self.FIELDS.items() if getattr(self, attr) is not None}
+        if self.extra:
+            data.update(self.extra)
+        data['PCI_Entries'] = [list(entry.columns) for entry in self.pci]
+        if self.pci_header:
+            data['PCI_Header'] = list(self.pci_header)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls()
+        for key, value in data.items():
+            if key == 'PCI_Entries':
+                record.pci = [PciEntry(columns[0], tuple(columns)) for columns in value]
+            elif key == 'PCI_Header':
+                record.pci_header = tuple(value)
+            else:
+                record[key] = value
+        return record
+
+    def __repr__(self):
+        return f"DeviceRecord({self.dev!r}, desc={self.desc!r}, pci={self.first_pci!r})"
+
+
+def iter_records(lines):
+    """
+    Parse lshca text output incrementally.
+
+    Records are yielded as soon as the next 'Dev #' header (or the end of input) is seen,
+    so lines can be fed straight from a remote channel. Anything before the first device,
+    such as pip output, is ignored. Values repeated across devices (descriptions, firmware
+    versions, PCI table headers, link states) are shared between records to keep large
+    inventories compact.
+
+    Args:
+        lines (iterable): Lines of lshca output.
+
+    Yields:
+        DeviceRecord: One record per device.
+    """
+    fields = DeviceRecord.FIELDS
+    shared = {}
+    record = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        first = line[0]
+        if first == 'D' and line.startswith('Dev #'):
+            if record is not None:
+                yield record
+            record = DeviceRecord(line)
+            continue
+        if record is None or first == '-':
+            continue
+        if first in _HEX_DIGITS and PCI_ADDRESS.match(line):
+            columns = tuple([shared.setdefault(column, column) for column in map(str.strip, line.split('|'))])
+            record.pci.append(PciEntry(columns[0], columns))
+        elif '|' in line:
+            header = tuple(map(str.strip, line.split('|')))
+            record.pci_header = shared.setdefault(header, header)
+        else:
+            key, separator, value = line.partition(':')
+            if not separator:
+                continue
+            key = key.rstrip()
+            value = value.lstrip()
+            attr = fields.get(key)
+            if attr is None:
+                record[key] = value
+            else:
+                setattr(record, attr, shared.setdefault(value, value) if attr != 'sn' else value)
+    if record is not None:
+        yield record
+
+
+# Names lshca uses for the PCI address column of the per-function table, compared case-insensitively
+PCI_ADDRESS_KEYS = ('pci_addr', 'pci_address', 'pci', 'bdf')
+# A line opening a JSON list or object; pip notices such as '[notice] ...' are no JSON
+_JSON_START = re.compile(r"^[ \t]*(?:\[(?=[\s{\]])|\{(?=[\s\"}]))", re.MULTILINE)
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _pci_address_key(function):
+    for name in function:
+        if name.lower() in PCI_ADDRESS_KEYS:
+            return name
+    # Unknown naming: the first field holding an address
+    for name, value in function.items():
+        if isinstance(value, str) and PCI_ADDRESS.match(value):
+            return name
+    return None
+
+
+def json_record(index, item, shared):
+    """
+    Convert one device object of lshca structured output to a DeviceRecord.
+
+    Scalar fields map onto the record; a list of objects is taken as the per-function PCI
+    table. Its address column is found by name and put first, as in the text table.
+
+    Args:
+        index (int): The device number, for the 'Dev #' field.
+        item (dict): The device object.
+        shared (dict): Values interned across the records of one output.
+
+    Returns:
+        DeviceRecord: The record.
+    """
+    record = DeviceRecord(f"Dev #{index}")
+    for key, value in item.items():
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            address_key = _pci_address_key(value[0])
+            header = tuple(value[0].keys())
+            if address_key is not None:
+                header = (address_key,) + tuple(name for name in header if name != address_key)
+            record.pci_header = shared.setdefault(header, header)
+            for function in value:
+                columns = tuple([shared.setdefault(column, column)
+                                 for column in (str(function.get(name, '')) for name in header)])
+                record.pci.append(PciEntry(columns[0] if address_key is not None else None, columns))
+        elif not isinstance(value, (list, dict)):
+            value = str(value)
+            record[key] = shared.setdefault(value, value)
+    return record
+
+
+def parse_json(text):
+    """
+    Parse lshca structured (JSON) output.
+
+    Accepts a list of devices or an object holding such a list.
+
+    Args:
+        text (str): The JSON document.
+
+    Returns:
+        list: DeviceRecord objects.
+    """
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = next((value for value in data.values() if isinstance(value, list)), [data])
+    shared = {}
+    return [json_record(index, item, shared) for index, item in enumerate(data, 1)]
+
+
+def parse(text):
+    """
+    Parse lshca output in either text or structured (JSON) form.
+
+    Args:
+        text (str): The lshca output, possibly preceded by other command output.
+
+    Returns:
+        list: DeviceRecord objects.
+    """
+    match = _JSON_START.search(text)
+    if match:
+        try:
+            return parse_json(text[match.end() - 1:])
+        except ValueError:
+            pass
+    return list(iter_records(text.splitlines()))
+
+
+def iter_parse(chunks):
+    """
+    Parse lshca output in either form incrementally, from text chunks as they arrive.
+
+    Text output and a JSON list of devices are both parsed record by record, so every
+    device is yielded as soon as its output is complete. A JSON object wrapping the list
+    is only parsed once all output has arrived. As in parse(), anything before the output
+    (such as pip output) is skipped, and output that is not JSON after all is parsed as text.
+
+    Args:
+        chunks (iterable): Pieces of the lshca output, split anywhere.
+
+    Yields:
+        DeviceRecord: One record per device.
+    """
+    chunks = iter(chunks)
+    buffer = ''
+    for chunk in chunks:
+        buffer += chunk
+        match = _JSON_START.search(buffer)
+        text_start = buffer.find('Dev #')
+        if match and (text_start < 0 or match.start() < text_start):
+            start = match.end() - 1
+            if buffer[start] == '[':
+                yield from _iter_json_list(buffer[:start], buffer[start + 1:], chunks)
+            else:
+                yield from parse(buffer + ''.join(chunks))
+            return
+        if text_start >= 0:
+            yield from iter_records(_iter_lines(itertools.chain([buffer], chunks)))
+            return
+    yield from parse(buffer)
+
+
+def _iter_json_list(prefix, text, chunks):
+    # text follows the '[' opening the list; every complete device object in it is decoded
+    shared = {}
+    index = 0
+    position = 0
+    for chunk in itertools.chain([''], chunks):
+        text = text[position:] + chunk
+        position = 0
+        while True:
+            while position < len(text) and text[position] in ' \t\r\n,':
+                position += 1
+            if position == len(text) or text[position] == ']':
+                break
+            try:
+                item, position = _JSON_DECODER.raw_decode(text, position)
+            except ValueError:
+                break  # Incomplete so far
+            if isinstance(item, dict):
+                index += 1
+                yield json_record(index, item, shared)
+    if index == 0:
+        # Nothing decoded, so all of the output is still here
+        yield from parse(prefix + '[' + text)
+
+
+def _iter_lines(chunks):
+    partial = ''
+    for chunk in chunks:
+        lines = (partial + chunk).split('\n')
+        partial = lines.pop()
+        yield from lines
+    if partial:
+        yield partial
@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 
+import logging
 from tkinter import Tk
 import tkinter as tk
 
 from gui import GUI
 from connection_manager import ConnectionManager
 from action import Action
+from app_paths import app_path
 
 # if __name__ == "__main__":
 #     root = Tk()  # Create a Tkinter root window
@@ -18,6 +20,9 @@ from action import Action
 
 
 if __name__ == "__main__":
+    # Background errors go to the console and, for runs without one, to a log file in the app directory
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+                        handlers=[logging.StreamHandler(), logging.FileHandler(app_path("card_configurator.log"))])
     root = tk.Tk()
     connection_manager = ConnectionManager()
     action = Action(connection_manager)
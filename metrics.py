@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+METRIC_NAME = "card_configurator_phase_seconds"
+
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    def __init__(self, max_samples=100000):
+        """
+        Collect per-phase latencies per host and device.
+
+        Count, sum and max per series are kept for the whole run; individual samples are only
+        kept until write_jsonl writes them, and at most the newest max_samples of them.
+
+        Phases used by the tool:
+            connect        TCP connect to port 22
+            auth           SSH key exchange and authentication
+            command_start  opening the channel and sending the command
+            first_byte     command start until its first output
+            exit           command start until its exit status
+            <step>         a whole step such as 'scan', 'firmware' or 'ofed'
+
+        Args:
+            max_samples (int): Samples kept until they are written.
+        """
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=max_samples)  # samples not yet appended to the JSON-lines file
+        self._series = {}  # labels -> [count, sum, max], for write_prometheus
+
+    def observe(self, phase, seconds, host=None, device=None, step=None):
+        """
+        Record one latency sample.
+
+        Args:
+            phase (str): The phase name.
+            seconds (float): The measured latency.
+            host (str): The host the sample belongs to.
+            device (str): The device PCI address, for device-level work.
+            step (str): The step the phase belongs to, e.g. 'firmware'.
+        """
+        sample = {"ts": time.time(), "phase": phase, "seconds": seconds, "host": host}
+        if device is not None:
+            sample["device"] = device
+        if step is not None:
+            sample["step"] = step
+        labels = tuple((name, sample[name]) for name in ('phase', 'host', 'device', 'step')
+                       if sample.get(name) is not None)
+        with self._lock:
+            self._samples.append(sample)
+            series = self._series.get(labels)
+            if series is None:
+                self._series[labels] = [1, seconds, seconds]
+            else:
+                series[0] += 1
+                series[1] += seconds
+                series[2] = max(series[2], seconds)
+
+    def observe_command(self, result, host=None, device=None, step=None):
+        """Record the command_start, first_byte and exit latencies of a CommandResult."""
+        if result.command is None:
+            return  # Never ran, e.g. skipped or rejected before reaching the host
+        for phase, seconds in (('command_start', result.start_latency), ('first_byte', result.first_byte),
+                               ('exit', result.duration)):
+            if seconds is not None:
+                self.observe(phase, seconds, host=host, device=device, step=step)
+
+    @contextmanager
+    def timed(self, phase, host=None, device=None, step=None):
+        """Record the time spent in a with-block, also when it raises."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.monotonic() - start, host=host, device=device, step=step)
+
+    def samples(self):
+        """Return the samples not written by write_jsonl yet."""
+        with self._lock:
+            return list(self._samples)
+
+    def write_jsonl(self, path):
+        """
+        Append the samples not yet written to a JSON-lines file and drop them from memory.
+
+        Args:
+            path (str): The file to append to.
+        """
+        with self._lock:
+            new = list(self._samples)
+            self._samples.clear()
+        with open(path, 'a') as f:
+            for sample in new:
+                f.write(json.dumps(sample, sort_keys=True) + "\n")
+
+    def write_prometheus(self, path):
+        """
+        Write count, sum and max per phase, host and device in the Prometheus text format.
+
+        The file is replaced atomically so the node_exporter textfile collector never reads
+        a partial file.
+
+        Args:
+            path (str): The .prom file to write.
+        """
+        with self._lock:
+            series = {labels: tuple(values) for labels, values in self._series.items()}
+
+        lines = [f"# HELP {METRIC_NAME} Latency of card configurator phases.",
+                 f"# TYPE {METRIC_NAME} summary"]
+        maxima = [f"# HELP {METRIC_NAME}_max Slowest observation of a phase.",
+                  f"# TYPE {METRIC_NAME}_max gauge"]
+        for labels, (count, total, peak) in sorted(series.items()):
+            text = ",".join(f'{name}="{_label_value(value)}"' for name, value in labels)
+            lines.append(f"{METRIC_NAME}_count{{{text}}} {count}")
+            lines.append(f"{METRIC_NAME}_sum{{{text}}} {total:.6f}")
+            maxima.append(f"{METRIC_NAME}_max{{{text}}} {peak:.6f}")
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write("\n".join(lines + maxima) + "\n")
+        os.replace(tmp_path, path)
@@ -1,4 +1,12 @@
+import shlex
+
+from remote_exec import CommandResult, run_command
+
+
 class OFED:
+    RELEASE_ROOT = "/.autodirect/mswg/release/MLNX_OFED"
+    INSTALL_OPTIONS = "--ovs-dpdk --bluefield --without-fw-update --add-kernel-support"
+
     def __init__(self, connection_manager):
         """
         Initialize the OFED class with a connection manager.
@@ -8,25 +16,64 @@ class OFED:
         """
         self.connection_manager = connection_manager
 
-    def install(self, version, ssh):
+    def source(self, version):
+        return f"{self.RELEASE_ROOT}/MLNX_OFED_LINUX-{version}/"
+
+    def prestage(self, version, ssh):
         """
-        Install OFED for the given device and version.
+        Start staging the OFED release directory to the host's local storage.
 
         Args:
-            device (dict): The device information dictionary.
             version (str): The version of the OFED.
             ssh (paramiko.SSHClient): The SSH client for the connection.
 
         Returns:
-            str: The output of the installation command.
+            Future: Resolves to a StagedCopy; None if staging is disabled.
+        """
+        return self.connection_manager.prestager.stage(ssh, self.source(version))
+
+    def install(self, version, ssh, on_line=None, keep_output=True):
+        """
+        Install OFED for the given version.
+
+        A staged copy of the release is installed with its own mlnxofedinstall; without one
+        the release tree's mlnx_ofed_install picks the build from NFS.
+
+        Args:
+            version (str): The version of the OFED.
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+            on_line (callable): Called with every output line while the installation runs.
+            keep_output (bool): Keep the output in the result; disable when on_line already shows it.
+
+        Returns:
+            CommandResult: The exit status and output of the installation command.
         """
         # Command to execute on the remote machine to install OFED
-        command = (
-            f"build=MLNX_OFED_LINUX-{version} /.autodirect/mswg/release/MLNX_OFED/mlnx_ofed_install --ovs-dpdk --bluefield --without-fw-update --add-kernel-support"
-        )
+        source = self.source(version)
+        path = self.connection_manager.prestager.local(ssh, source, on_line)
+        if path == source:
+            command = f"build=MLNX_OFED_LINUX-{version} {self.RELEASE_ROOT}/mlnx_ofed_install {self.INSTALL_OPTIONS}"
+        else:
+            command = f"cd {shlex.quote(path)} && ./mlnxofedinstall {self.INSTALL_OPTIONS}"
 
         # Execute the command on the remote machine
-        stdin, stdout, stderr = ssh.exec_command(command)
-        stdout.channel.recv_exit_status()
-        output = stdout.read().decode('utf-8') + stderr.read().decode('utf-8')
-        return output
+        return run_command(ssh, command, on_line=on_line, keep_output=keep_output)
+
+    def install_latest(self, ssh, on_line=None, keep_output=True):
+        """
+        Install the newest OFED release found in the release index.
+
+        Args:
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+            on_line (callable): Called with every output line while the installation runs.
+            keep_output (bool): Keep the output in the result; disable when on_line already shows it.
+
+        Returns:
+            CommandResult: The exit status and output of the installation command.
+        """
+        version = self.connection_manager.release_index.latest(ssh, 'ofed')
+        if not version:
+            return CommandResult(None, None, '', "No OFED release found", 0.0)
+        if on_line:
+            on_line(f"Latest OFED release: {version}")
+        return self.install(version, ssh, on_line=on_line, keep_output=keep_output)
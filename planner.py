@@ -0,0 +1,226 @@
+import re
+import shlex
+
+from batch_exec import run_batch
+from device_catalog import catalog
+from device_jobs import device_label
+from prestage import STAGE_ROOT
+from rshim import RSHIM_MAP_SCRIPT, assign_rshims, parse_rshim_map
+
+INSTALL = 'install'
+SKIP = 'skip'
+
+# One command per pre-flight check; all of them run as one batch (see batch_exec.py)
+PREFLIGHT_COMMANDS = (
+    ('ofed', "ofed_info -s | sed 's/^MLNX_OFED_LINUX-//; s/:$//'"),
+    ('doca', "dpkg-query -W -f='${Version}' doca-runtime 2>/dev/null || "
+             "rpm -q --qf '%{VERSION}' doca-runtime | grep -v 'not installed'"),
+    # Free KB on the filesystem images are staged to, whether or not the directory exists yet
+    ('disk_free_kb', "p={stage_root}; while [ ! -e \"$p\" ]; do p=$(dirname \"$p\"); done; "
+                     "df -Pk \"$p\" | awk 'NR==2 {{print $4}}'"),
+    ('rshim', RSHIM_MAP_SCRIPT),
+)
+
+
+def firmware_target(state, device):
+    """Return the firmware version wanted for a device, or None if the state does not cover it."""
+    target = state.get('firmware')
+    if isinstance(target, dict):
+        return target.get(device.get('PSID'), target.get('default'))
+    return target
+
+
+def is_bluefield(device):
+    model = catalog().lookup(device)
+    if model is not None:
+        return model.is_bluefield
+    return 'bluefield' in device.get('Desc', '').lower()
+
+
+def numeric_version(version):
+    return tuple(int(part) for part in re.findall(r"\d+", version or ''))
+
+
+def doca_release(version):
+    """Extract the DOCA release number from a bundle name such as 'DOCA_2.5.2_BSP_4.5.2_Ubuntu_22.04-...'."""
+    match = re.search(r"DOCA_(\d+(?:\.\d+)*)", version)
+    if match:
+        return match.group(1)
+    match = re.match(r"\d+(?:\.\d+)*", version)
+    return match.group(0) if match else version
+
+
+def is_current(component, current, target):
+    """
+    Check whether the installed version of a component already matches the target.
+
+    Args:
+        component (str): 'firmware', 'ofed', 'bfb' or 'doca'.
+        current (str): The installed version, or None if unknown.
+        target (str): The wanted version; None (the latest release) never counts as current.
+
+    Returns:
+        bool: True if installing the target would change nothing.
+    """
+    if not current or not target:
+        return False
+    if component == 'firmware':
+        return numeric_version(current) == numeric_version(target)
+    if component == 'doca':
+        return numeric_version(doca_release(current)) == numeric_version(doca_release(target))
+    return current.strip() == target.strip()
+
+
+class HostPreflight:
+    __slots__ = ('installed', 'disk_free_kb', 'rshim', 'results')
+
+    def __init__(self, results):
+        """
+        Interpret the results of the pre-flight commands.
+
+        Args:
+            results (dict): Check name (see PREFLIGHT_COMMANDS) -> CommandResult.
+        """
+        self.results = results
+        values = {name: result.stdout.strip() if result.ok else '' for name, result in results.items()}
+        self.installed = {'ofed': values.get('ofed') or None, 'doca': values.get('doca') or None}
+        self.disk_free_kb = int(values['disk_free_kb']) if values.get('disk_free_kb', '').isdigit() else None
+        self.rshim = parse_rshim_map(values.get('rshim', ''))
+
+    def to_dict(self):
+        rshim = sorted(name for slot, names in self.rshim.items() for name in ([names] if slot else names))
+        return {"installed": self.installed, "disk_free_kb": self.disk_free_kb, "rshim": rshim}
+
+
+def preflight(ssh, devices=(), timeout=None, stage_root=STAGE_ROOT):
+    """
+    Run a host's pre-flight checks in one round trip.
+
+    The batch reads the installed OFED and DOCA versions, the free space below stage_root,
+    the rshim devices and the PCI device IDs of the scanned devices. The device IDs are
+    stored in the devices as 'DevID' (see DeviceCatalog.identify) and BlueFields get their
+    'RShim' (see assign_rshims), so installers need no round trips of their own for them.
+
+    Args:
+        ssh (paramiko.SSHClient): The SSH client for the connection.
+        devices (list): The host's device records.
+        timeout (float): Seconds a single check may stay silent before socket.timeout is raised.
+        stage_root (str): The staging directory whose free space is checked.
+
+    Returns:
+        HostPreflight: The results.
+    """
+    names = [name for name, _ in PREFLIGHT_COMMANDS]
+    commands = [command.format(stage_root=shlex.quote(stage_root)) if name == 'disk_free_kb' else command
+                for name, command in PREFLIGHT_COMMANDS]
+    id_script, pending = catalog().identify_script(devices)
+    if id_script:
+        names.append('pci_ids')
+        commands.append(id_script)
+    results = dict(zip(names, run_batch(ssh, commands, timeout=timeout)))
+    if id_script:
+        catalog().store_ids(pending, results.pop('pci_ids').stdout)
+    checks = HostPreflight(results)
+    assign_rshims(ssh, [device for device in devices if is_bluefield(device)], mapping=checks.rshim)
+    return checks
+
+
+class PlanStep:
+    __slots__ = ('host', 'component', 'device', 'current', 'target')
+
+    def __init__(self, host, component, device, current, target):
+        self.host = host
+        self.component = component
+        self.device = device
+        self.current = current
+        self.target = target
+
+    @property
+    def needed(self):
+        return not is_current(self.component, self.current, self.target)
+
+    @property
+    def action(self):
+        return INSTALL if self.needed else SKIP
+
+    def to_dict(self):
+        step = {"host": self.host, "component": self.component, "action": self.action,
+                "current": self.current, "target": self.target}
+        if self.device is not None:
+            step["device"] = device_label(self.device)
+            step["psid"] = self.device.get('PSID')
+        return step
+
+    def __repr__(self):
+        return f"PlanStep({self.host!r}, {self.component!r}, {self.current!r} -> {self.target!r}: {self.action})"
+
+
+class Planner:
+    def __init__(self, state):
+        """
+        Initialize the Planner with a desired state.
+
+        Args:
+            state (dict): Component name -> version (or, for firmware, PSID -> version).
+        """
+        self.state = state
+
+    def plan(self, host, devices, installed=None):
+        """
+        Compare a host's inventory with the desired state.
+
+        Firmware is compared per device against the FW field lshca reported; OFED and DOCA
+        against the versions found by the pre-flight. BFB and DOCA get one step per BlueField.
+        BFB versions cannot be read from the host, so a BFB step is always needed.
+
+        Args:
+            host (str): The host name or IP address.
+            devices (list): The host's device records.
+            installed (dict): The installed versions, see HostPreflight.installed.
+
+        Returns:
+            list: PlanStep objects in install order, including the ones that can be skipped.
+        """
+        installed = installed or {}
+        steps = []
+        for device in devices:
+            target = firmware_target(self.state, device)
+            if target:
+                steps.append(PlanStep(host, 'firmware', device, device.get('FW') or None, target))
+        if self.state.get('ofed'):
+            steps.append(PlanStep(host, 'ofed', None, installed.get('ofed'), self.state['ofed']))
+        bluefields = [device for device in devices if is_bluefield(device)]
+        for component in ('bfb', 'doca'):
+            if self.state.get(component):
+                steps.extend(PlanStep(host, component, device, installed.get(component), self.state[component])
+                             for device in bluefields)
+        return steps
+
+
+def recheck(host, entries, devices, installed):
+    """
+    Compare interrupted journal entries of one host with what the host reports now.
+
+    Firmware is compared with the FW lshca reports, OFED and DOCA with the pre-flight's
+    installed versions. BFB versions cannot be read from the host and an entry without a
+    version stands for the latest release, so such steps always run again.
+
+    Args:
+        host (str): The host name or IP address.
+        entries (list): The host's interrupted JournalEntry objects.
+        devices (list): The host's device records, as freshly scanned.
+        installed (dict): The installed versions, see HostPreflight.installed.
+
+    Returns:
+        list: One PlanStep per entry, or None where the entry's device is no longer found.
+    """
+    by_label = {device_label(device): device for device in devices}
+    steps = []
+    for entry in entries:
+        device = by_label.get(entry.device) if entry.device else None
+        if entry.device and device is None:
+            steps.append(None)
+            continue
+        current = device.get('FW') if entry.step == 'firmware' else installed.get(entry.step)
+        steps.append(PlanStep(host, entry.step, device, current or None, entry.version))
+    return steps
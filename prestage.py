@@ -0,0 +1,249 @@
+import posixpath
+import shlex
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from remote_exec import run_command
+
+# Host-local directory staged images are copied to; /dev/shm/card_configurator stages to tmpfs
+STAGE_ROOT = "/var/tmp/card_configurator/stage"
+RESERVE_KB = 1024 * 1024  # Free space left on the staging filesystem after a copy
+KEEP_DAYS = 14  # Staged copies not used for this long are deleted by the next stage on the host
+REVERIFY_AFTER = 600  # Seconds a finished stage is trusted before its copy is checked again
+
+
+def host_key(ssh):
+    """Return the (address, port) of the host an SSH client is connected to."""
+    return ssh.get_transport().getpeername()[:2]
+
+
+class StagedCopy:
+    __slots__ = ('source', 'local', 'ok', 'reused', 'elapsed', 'error', 'verified_at')
+
+    def __init__(self, source, local, ok, reused=False, elapsed=0.0, error=None):
+        self.source = source
+        self.local = local
+        self.ok = ok
+        self.reused = reused
+        self.elapsed = elapsed
+        self.error = error
+        self.verified_at = time.monotonic()  # When the copy was last known to match the source
+
+    @property
+    def fresh(self):
+        return time.monotonic() - self.verified_at < REVERIFY_AFTER
+
+
+def evict_script(stage_root, keep_days=KEEP_DAYS):
+    """
+    Build the shell snippet that deletes staged copies whose manifest was not used for keep_days.
+
+    A staged directory's manifest is '.staged.sha256' inside it; a staged file's is
+    '.<name>.sha256' next to it. Reusing a copy touches its manifest. Directories left empty
+    are removed once they are an hour old, so a copy being created is never affected.
+    """
+    root = shlex.quote(stage_root)
+    return (
+        f"find {root} -name '.*.sha256' -mtime +{int(keep_days)} 2>/dev/null | while IFS= read -r m; do "
+        f"d=$(dirname \"$m\"); b=$(basename \"$m\"); "
+        f"if [ \"$b\" = .staged.sha256 ]; then rm -rf \"$d\"; "
+        f"else n=${{b#.}}; rm -f \"$d/${{n%.sha256}}\" \"$m\"; fi; done; "
+        f"find {root} -mindepth 1 -type d -empty -mmin +60 -delete 2>/dev/null || true; "
+    )
+
+
+def _paths(source, local):
+    # (source directory, local directory, manifest) of a staged file or directory
+    if source.endswith('/'):
+        return source, local, posixpath.join(local, ".staged.sha256")
+    dst_dir = posixpath.dirname(local)
+    return posixpath.dirname(source), dst_dir, posixpath.join(dst_dir, f".{posixpath.basename(source)}.sha256")
+
+
+def verify_script(source, local):
+    """Build the shell script that exits 0 if the staged copy of source still matches its manifest."""
+    _, dst_dir, manifest = _paths(source, local)
+    dst_dir, manifest = shlex.quote(dst_dir), shlex.quote(manifest)
+    return f"[ -f {manifest} ] && cd {dst_dir} && sha256sum -c --quiet {manifest} >/dev/null 2>&1 && touch {manifest}"
+
+
+def stage_script(source, local, reserve_kb=RESERVE_KB, stage_root=None, keep_days=KEEP_DAYS):
+    """
+    Build the shell script that copies a release file or directory to host-local storage.
+
+    Every file is read from NFS once: tee writes the copy while sha256sum hashes the bytes
+    read, and the copy is hashed again from local disk; a mismatch fails the stage. The
+    hashes go into a manifest next to the copy, so a later stage of the same source only
+    re-verifies the local files. Before copying, copies below stage_root unused for
+    keep_days are deleted; nothing is copied unless the staging filesystem then has room
+    for the source plus reserve_kb.
+
+    Args:
+        source (str): The release file, or directory ending in '/'.
+        local (str): The local path, mirroring source below the staging root.
+        reserve_kb (int): Free space to leave on the staging filesystem.
+        stage_root (str): The staging root to evict old copies from; None evicts nothing.
+        keep_days (int): Days an unused staged copy is kept.
+
+    Returns:
+        str: The script; it prints 'STAGED reused' or 'STAGED copied' on success.
+    """
+    src_dir, dst_dir, manifest = _paths(source, local)
+    if source.endswith('/'):
+        files = "find . -type f ! -name '*.part'"
+    else:
+        files = f"echo ./{shlex.quote(posixpath.basename(source))}"
+    src_dir, dst_dir, manifest = shlex.quote(src_dir), shlex.quote(dst_dir), shlex.quote(manifest)
+    return (
+        f"set -e; "
+        f"if [ -f {manifest} ] && (cd {dst_dir} && sha256sum -c --quiet {manifest}) >/dev/null 2>&1; then "
+        f"touch {manifest}; echo 'STAGED reused'; exit 0; fi; "
+        f"{evict_script(stage_root, keep_days) if stage_root else ''}"
+        f"mkdir -p {dst_dir}; "
+        f"need=$(du -sk {shlex.quote(source)} | cut -f1); avail=$(df -Pk {dst_dir} | awk 'NR==2 {{print $4}}'); "
+        f"if [ $((need + {reserve_kb})) -gt \"$avail\" ]; then "
+        f"echo \"-E- $need KB needed, $avail KB free in {dst_dir}\" >&2; exit 3; fi; "
+        f"cd {src_dir}; rm -f {manifest}.part; "
+        f"{files} | while IFS= read -r f; do "
+        f"mkdir -p {dst_dir}/\"$(dirname \"$f\")\"; "
+        f"sum=$(tee {dst_dir}/\"$f.part\" < \"$f\" | sha256sum | cut -d' ' -f1); "
+        f"[ \"$(sha256sum < {dst_dir}/\"$f.part\" | cut -d' ' -f1)\" = \"$sum\" ] || "
+        f"{{ echo \"-E- checksum mismatch for $f\" >&2; exit 4; }}; "
+        f"chmod --reference=\"$f\" {dst_dir}/\"$f.part\"; mv {dst_dir}/\"$f.part\" {dst_dir}/\"$f\"; "
+        f"echo \"$sum  $f\" >> {manifest}.part; "
+        f"done; "
+        f"mv {manifest}.part {manifest}; echo 'STAGED copied'"
+    )
+
+
+class Prestager:
+    def __init__(self, stage_root=STAGE_ROOT, max_workers_per_host=2, enabled=True, keep_days=KEEP_DAYS):
+        """
+        Copy install payloads from the release NFS trees to host-local storage in the background.
+
+        Steps that know their payloads early (e.g. right after the scan) call stage(); the
+        copies then run while earlier steps such as firmware burns are busy. Installers call
+        local() for the path to install from: the verified local copy when one was staged for
+        that host (waiting for it only if it is already copying), otherwise the NFS path. A
+        copy that has not started yet is cancelled, so a queued, failed or missing stage never
+        blocks an install. Every host has its own copy workers, so one host's large copies
+        never delay another host. Stages are deduplicated per host and source, so identical
+        cards resolving to the same image copy it once. A finished stage is only trusted for
+        REVERIFY_AFTER seconds; after that the copy is checked against its manifest again,
+        since another run may have evicted it meanwhile.
+
+        Args:
+            stage_root (str): The directory on the hosts that copies are staged to.
+            max_workers_per_host (int): Maximum number of copies running at the same time on one host.
+            enabled (bool): False makes stage() a no-op, so installers read from NFS.
+            keep_days (int): Staged copies unused for this many days are deleted by later stages.
+        """
+        self.stage_root = stage_root
+        self.enabled = enabled
+        self.keep_days = keep_days
+        self.max_workers_per_host = max_workers_per_host
+        self._lock = threading.Lock()
+        self._executors = {}  # host key -> ThreadPoolExecutor
+        self._closed = False
+        self._stages = {}  # (host key, source) -> Future of StagedCopy
+
+    def local_path(self, source):
+        return posixpath.join(self.stage_root, source.lstrip('/'))
+
+    def stage(self, ssh, source):
+        """
+        Start copying a release file, or directory ending in '/', to the host unless already staged.
+
+        Args:
+            ssh (paramiko.SSHClient): The SSH client for the host.
+            source (str): The path in the release tree.
+
+        Returns:
+            Future: Resolves to a StagedCopy; None if staging is disabled.
+        """
+        if not self.enabled:
+            return None
+        key = (host_key(ssh), source)
+        with self._lock:
+            future = self._stages.get(key)
+            # A copy no longer trusted is staged again, which only re-verifies it if it is intact
+            if future is None or (future.done() and (future.cancelled() or not future.result().ok
+                                                     or not future.result().fresh)):
+                if self._closed:
+                    return None
+                executor = self._executors.get(key[0])
+                if executor is None:
+                    executor = self._executors[key[0]] = ThreadPoolExecutor(
+                        max_workers=self.max_workers_per_host, thread_name_prefix="prestage")
+                future = self._stages[key] = executor.submit(self._copy, ssh, source)
+            return future
+
+    def local(self, ssh, source, on_line=None):
+        """
+        Return the path an installer should read source from.
+
+        Args:
+            ssh (paramiko.SSHClient): The SSH client for the host.
+            source (str): The path in the release tree.
+            on_line (callable): Told whether the local copy or NFS is used.
+
+        Returns:
+            str: The staged local copy, or source itself if none was staged or staging failed.
+        """
+        with self._lock:
+            future = self._stages.get((host_key(ssh), source))
+        if future is None or future.cancelled():
+            return source
+        if future.cancel():
+            # Still queued behind other copies: installing from NFS now beats waiting for them
+            if on_line:
+                on_line(f"Staging {source} had not started; installing from the release tree")
+            return source
+        if on_line and not future.done():
+            on_line(f"Waiting for {source} to finish staging")
+        copy = future.result()
+        if not copy.ok:
+            if on_line:
+                on_line(f"Staging {source} failed ({copy.error}); installing from the release tree")
+            return source
+        if not copy.fresh and not self._verify(ssh, copy):
+            with self._lock:
+                if self._stages.get((host_key(ssh), source)) is future:
+                    del self._stages[(host_key(ssh), source)]
+            if on_line:
+                on_line(f"Staged copy {copy.local} is gone or changed; installing from the release tree")
+            return source
+        if on_line:
+            on_line(f"Using staged copy {copy.local}")
+        return copy.local
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            executors, self._executors = list(self._executors.values()), {}
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _verify(self, ssh, copy):
+        try:
+            ok = run_command(ssh, verify_script(copy.source, copy.local)).ok
+        except Exception:
+            ok = False
+        if ok:
+            copy.verified_at = time.monotonic()
+        return ok
+
+    def _copy(self, ssh, source):
+        local = self.local_path(source)
+        start = time.monotonic()
+        try:
+            result = run_command(ssh, stage_script(source, local, stage_root=self.stage_root,
+                                                   keep_days=self.keep_days))
+        except Exception as e:
+            return StagedCopy(source, local, False, elapsed=time.monotonic() - start, error=e)
+        elapsed = time.monotonic() - start
+        if not result.ok or 'STAGED' not in result.stdout:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit {result.exit_status}"
+            return StagedCopy(source, local, False, elapsed=elapsed, error=error)
+        return StagedCopy(source, local, True, reused='STAGED reused' in result.stdout, elapsed=elapsed)
@@ -0,0 +1,122 @@
+import json
+import os
+import re
+import shlex
+import threading
+import time
+
+from app_paths import app_path
+from fw_image_resolver import FW_RELEASE_ROOT
+from remote_exec import run_command
+
+OFED_RELEASE_ROOT = "/.autodirect/mswg/release/MLNX_OFED"
+BFB_RELEASE_ROOT = "/mswg/release/bfb"
+DOCA_RELEASE_ROOT = "/mswg/release/doca"
+
+# product -> (release tree, pattern extracting the version from a directory name)
+PRODUCTS = {
+    'firmware': (FW_RELEASE_ROOT + "/{image_family}", re.compile(r"^[\w.-]+?-rel-(\d+(?:_\d+)+)-build-001$")),
+    'ofed': (OFED_RELEASE_ROOT, re.compile(r"^MLNX_OFED_LINUX-(\d[\w.-]*)$")),
+    'bfb': (BFB_RELEASE_ROOT, re.compile(r"^bfb-(.+)$")),
+    'doca': (DOCA_RELEASE_ROOT, re.compile(r"^doca-(.+)$")),
+}
+
+
+def version_key(version):
+    """Natural sort key: numeric runs compare as numbers, so 24.10 sorts after 24.4."""
+    return [(0, int(token), '') if token.isdigit() else (1, 0, token) for token in re.findall(r"\d+|[A-Za-z]+", version)]
+
+
+class ReleaseIndex:
+    DEFAULT_TTL = 900
+
+    def __init__(self, ttl=DEFAULT_TTL, cache_file=None):
+        """
+        Initialize the release index with an in-memory cache backed by a JSON file.
+
+        Args:
+            ttl (float): Seconds a product listing stays valid.
+            cache_file (str): Path of the on-disk cache; defaults to the application directory.
+        """
+        self.ttl = ttl
+        self.cache_file = cache_file or app_path("release_index.json")
+        self._lock = threading.Lock()
+        self._cache = self._load()
+
+    def release_root(self, product, image_family=None):
+        if product not in PRODUCTS:
+            raise ValueError(f"Unknown product: {product}")
+        if product == 'firmware' and not image_family:
+            raise ValueError("Firmware releases are listed per image family")
+        return PRODUCTS[product][0].format(image_family=image_family)
+
+    def versions(self, ssh, product, image_family=None):
+        """
+        Return the released versions of a product, oldest first.
+
+        The release tree is listed with one remote command and cached for ttl seconds. An
+        empty listing is not cached, so a tree that is published (or mounted) later is seen
+        on the next call.
+
+        Args:
+            ssh (paramiko.SSHClient): The SSH client used if the listing has to be refreshed.
+            product (str): 'firmware', 'ofed', 'bfb' or 'doca'.
+            image_family (str): The firmware release directory such as 'fw-4125'; required for firmware.
+
+        Returns:
+            list: Version strings in the form the installers expect (dotted for firmware).
+
+        Raises:
+            RuntimeError: If the release tree cannot be listed, e.g. because NFS is not mounted.
+        """
+        key = f"{product}/{image_family}" if product == 'firmware' else product
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is None or not entry['versions'] or time.time() - entry['listed_at'] > self.ttl:
+            entry = {'listed_at': time.time(), 'versions': self._list(ssh, product, image_family)}
+            if entry['versions']:
+                with self._lock:
+                    self._cache[key] = entry
+                    self._save()
+        return entry['versions']
+
+    def latest(self, ssh, product, image_family=None):
+        """Return the newest released version of a product, or None if the tree is empty."""
+        versions = self.versions(ssh, product, image_family)
+        return versions[-1] if versions else None
+
+    def invalidate(self, product=None):
+        with self._lock:
+            if product is None:
+                self._cache.clear()
+            else:
+                for key in [key for key in self._cache if key.split('/')[0] == product]:
+                    del self._cache[key]
+            self._save()
+
+    def _list(self, ssh, product, image_family):
+        root = self.release_root(product, image_family)
+        pattern = PRODUCTS[product][1]
+        result = run_command(ssh, f"ls -1 {shlex.quote(root)}")
+        if not result.ok:
+            raise RuntimeError(f"Cannot list {root} on the host: {result.stderr.strip() or result.exit_status}")
+        versions = []
+        for name in result.stdout.split():
+            match = pattern.match(name)
+            if match:
+                version = match.group(1)
+                versions.append(version.replace('_', '.') if product == 'firmware' else version)
+        return sorted(set(versions), key=version_key)
+
+    def _load(self):
+        try:
+            with open(self.cache_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        tmp_file = self.cache_file + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self._cache, f, indent=1)
+        os.replace(tmp_file, self.cache_file)
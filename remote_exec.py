@@ -0,0 +1,204 @@
+import codecs
+import re
+import select
+import socket
+import time
+
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+
+class CommandResult:
+    __slots__ = ('command', 'exit_status', 'stdout', 'stderr', 'duration', 'start_latency', 'first_byte')
+
+    def __init__(self, command, exit_status, stdout, stderr, duration, start_latency=None, first_byte=None):
+        self.command = command
+        self.exit_status = exit_status
+        self.stdout = stdout
+        self.stderr = stderr
+        self.duration = duration
+        self.start_latency = start_latency  # seconds until the channel was open and the command sent
+        self.first_byte = first_byte  # seconds until the first output arrived, None if there was none
+
+    @property
+    def output(self):
+        return self.stdout + self.stderr
+
+    @property
+    def ok(self):
+        return self.exit_status == 0
+
+    def __str__(self):
+        return self.output
+
+
+class LineSplitter:
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._partial = ''
+
+    def feed(self, data):
+        text = self._decoder.decode(data)
+        pieces = _LINE_BREAK.split(self._partial + text)
+        self._partial = pieces.pop()
+        return text, [line for line in pieces if line]
+
+    def flush(self):
+        text = self._decoder.decode(b'', final=True)
+        line = self._partial + text
+        self._partial = ''
+        return text, [line] if line else []
+
+
+class ChannelReader:
+    CHUNK_SIZE = 32768
+
+    def __init__(self, channel, command, timeout=None, start=None, deadline=None):
+        """
+        Drain the stdout and stderr of a non-blocking channel; shared by RemoteCommand and AsyncEngine.
+
+        Both streams are read whenever data is available, so a chatty command can never stall
+        on a full channel window. The caller decides how to wait for more data.
+
+        Args:
+            channel (paramiko.Channel): A channel in non-blocking mode running the command.
+            command (str): The command, for the timeout message.
+            timeout (float): Seconds the command may stay silent before socket.timeout is raised.
+            start (float): time.monotonic() when the command was started, for first_byte.
+            deadline (float): time.monotonic() by which the command must have finished, even if
+                it keeps printing; socket.timeout is raised after it.
+        """
+        self.channel = channel
+        self.command = command
+        self.timeout = timeout
+        self.deadline = deadline
+        self.start = time.monotonic() if start is None else start
+        self.first_byte = None
+        self.last_data = time.monotonic()
+        self._streams = {
+            'stdout': (channel.recv_ready, channel.recv, LineSplitter()),
+            'stderr': (channel.recv_stderr_ready, channel.recv_stderr, LineSplitter()),
+        }
+
+    def read(self):
+        """Return the ('stdout' | 'stderr', text, lines) chunks that can be read without waiting."""
+        chunks = []
+        for name, (ready, recv, splitter) in self._streams.items():
+            while ready():
+                data = recv(self.CHUNK_SIZE)
+                if not data:
+                    break
+                if self.first_byte is None:
+                    self.first_byte = time.monotonic() - self.start
+                text, lines = splitter.feed(data)
+                chunks.append((name, text, lines))
+        if chunks:
+            self.last_data = time.monotonic()
+        return chunks
+
+    def finished(self):
+        """Return True once the command exited and all of its output was read."""
+        channel = self.channel
+        return channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready()
+
+    def check_timeout(self):
+        now = time.monotonic()
+        if self.timeout is not None and now - self.last_data > self.timeout:
+            raise socket.timeout(f"No output from '{self.command}' for {self.timeout}s")
+        if self.deadline is not None and now > self.deadline:
+            raise socket.timeout(f"'{self.command}' did not finish before its deadline")
+
+    def flush(self):
+        """Return the chunks holding the unterminated last line of each stream."""
+        chunks = []
+        for name, (_, _, splitter) in self._streams.items():
+            text, lines = splitter.flush()
+            if text or lines:
+                chunks.append((name, text, lines))
+        return chunks
+
+
+class RemoteCommand:
+    def __init__(self, ssh, command, timeout=None, poll_interval=0.2, deadline=None):
+        """
+        Run a command on its own channel and stream its output while it runs.
+
+        Iterating yields ('stdout' | 'stderr', text, lines) chunks as soon as data arrives,
+        where lines are the complete lines finished by that chunk. Both streams are drained
+        continuously, so a chatty command can never stall on a full channel window. After
+        iteration exit_status holds the command's exit code; start_latency and first_byte are set
+        as soon as they are known.
+
+        Args:
+            ssh (paramiko.SSHClient): The SSH client for the connection.
+            command (str): The shell command to run.
+            timeout (float): Seconds the command may stay silent before socket.timeout is raised.
+            poll_interval (float): Seconds to wait for data before checking the exit status again.
+            deadline (float): time.monotonic() by which the command must have finished, even if
+                it keeps printing; socket.timeout is raised after it.
+        """
+        self.ssh = ssh
+        self.command = command
+        self.timeout = timeout
+        self.deadline = deadline
+        self.poll_interval = poll_interval
+        self.exit_status = None
+        self.duration = 0.0
+        self.start_latency = None
+        self.first_byte = None
+
+    def __iter__(self):
+        start = time.monotonic()
+        channel = self.ssh.get_transport().open_session()
+        try:
+            channel.exec_command(self.command)
+            self.start_latency = time.monotonic() - start
+            channel.setblocking(0)
+            reader = ChannelReader(channel, self.command, self.timeout, start, self.deadline)
+            while True:
+                chunks = reader.read()
+                self.first_byte = reader.first_byte
+                reader.check_timeout()  # Also while output keeps arriving, for the deadline
+                if chunks:
+                    yield from chunks
+                    continue
+                if reader.finished():
+                    break
+                select.select([channel], [], [], self.poll_interval)
+
+            yield from reader.flush()
+            self.exit_status = channel.recv_exit_status()
+        finally:
+            channel.close()
+            self.duration = time.monotonic() - start
+
+    def lines(self):
+        """Yield (stream, line) tuples as the command produces them."""
+        for name, _, lines in self:
+            for line in lines:
+                yield name, line
+
+
+def run_command(ssh, command, on_line=None, timeout=None, keep_output=True):
+    """
+    Run a command, streaming its output lines to a callback while it runs.
+
+    Args:
+        ssh (paramiko.SSHClient): The SSH client for the connection.
+        command (str): The shell command to run.
+        on_line (callable): Called as on_line(line) for every stdout and stderr line.
+        timeout (float): Seconds the command may stay silent before socket.timeout is raised.
+        keep_output (bool): Collect stdout/stderr into the result; disable for huge outputs.
+
+    Returns:
+        CommandResult: The exit status, collected output and duration.
+    """
+    remote = RemoteCommand(ssh, command, timeout=timeout)
+    collected = {'stdout': [], 'stderr': []}
+    for name, text, lines in remote:
+        if keep_output:
+            collected[name].append(text)
+        if on_line:
+            for line in lines:
+                on_line(line)
+    return CommandResult(command, remote.exit_status, ''.join(collected['stdout']),
+                         ''.join(collected['stderr']), remote.duration, remote.start_latency, remote.first_byte)
@@ -0,0 +1,160 @@
+import time
+
+from scheduler import DONE, FAILED
+
+# Outcome of one host in a rollout
+SUCCEEDED = 'succeeded'
+UNREACHABLE = 'unreachable'
+NOT_STARTED = 'not started'
+
+
+def plan_waves(hosts, canaries=1, wave_size=10):
+    """
+    Split hosts into a canary wave followed by waves of wave_size hosts.
+
+    Args:
+        hosts (list): The hosts in rollout order.
+        canaries (int): Hosts in the first wave.
+        wave_size (int): Hosts in every later wave; 0 puts all remaining hosts into one wave.
+
+    Returns:
+        list: Lists of hosts, one per wave.
+    """
+    waves = [hosts[:canaries]] if canaries else []
+    rest = hosts[canaries:]
+    step = wave_size or len(rest) or 1
+    waves += [rest[i:i + step] for i in range(0, len(rest), step)]
+    return [wave for wave in waves if wave]
+
+
+def host_outcome(jobs):
+    """
+    Classify the job chain of one host.
+
+    A host that could not be connected to was never touched, so it counts as unreachable
+    rather than as a failed install. A scan or pre-flight that ran and failed is a failure.
+
+    Args:
+        jobs (list): The host's jobs, scan first.
+
+    Returns:
+        str: SUCCEEDED, FAILED or UNREACHABLE.
+    """
+    if jobs[0].state == FAILED and getattr(jobs[0].result, 'unreachable', False):
+        return UNREACHABLE
+    return SUCCEEDED if all(job.state == DONE for job in jobs) else FAILED
+
+
+class WaveResult:
+    __slots__ = ('index', 'chains', 'outcomes', 'elapsed')
+
+    def __init__(self, index, chains, outcomes, elapsed):
+        self.index = index
+        self.chains = chains  # host -> its jobs
+        self.outcomes = outcomes
+        self.elapsed = elapsed
+
+    @property
+    def hosts(self):
+        return list(self.chains)
+
+    @property
+    def canary(self):
+        return self.index == 0
+
+    def count(self, outcome):
+        return sum(1 for value in self.outcomes.values() if value == outcome)
+
+
+class RolloutResult:
+    def __init__(self, waves, outcomes, halted_reason=None):
+        self.waves = waves
+        self.outcomes = outcomes
+        self.halted_reason = halted_reason
+
+    @property
+    def halted(self):
+        return self.halted_reason is not None
+
+    def count(self, outcome):
+        return sum(1 for value in self.outcomes.values() if value == outcome)
+
+    @property
+    def failure_rate(self):
+        attempted = self.count(SUCCEEDED) + self.count(FAILED)
+        return self.count(FAILED) / attempted if attempted else 0.0
+
+    def summary(self):
+        text = (f"{len(self.waves)} waves: {self.count(SUCCEEDED)} succeeded, {self.count(FAILED)} failed, "
+                f"{self.count(UNREACHABLE)} unreachable, {self.count(NOT_STARTED)} not started "
+                f"(failure rate {self.failure_rate:.0%})")
+        if self.halted:
+            text += f"; halted: {self.halted_reason}"
+        return text
+
+
+class RolloutController:
+    def __init__(self, runner, scheduler, canaries=1, wave_size=10, max_failure_rate=0.1, on_wave=None):
+        """
+        Roll a desired state out to canary hosts first, then to the rest of the fleet in waves.
+
+        The rollout halts before the next wave if a canary failed, if no canary succeeded (e.g.
+        all of them were unreachable, so there is no signal about the image), or if the failure
+        rate of all hosts attempted so far exceeds max_failure_rate. Failures are failed scans,
+        pre-flights and installer steps; unreachable hosts do not count against the image.
+        Within a wave all hosts run concurrently, bounded only by the scheduler limits.
+
+        Args:
+            runner (HeadlessRunner): Queues the job chain of a host.
+            scheduler (JobScheduler): The scheduler running the jobs.
+            canaries (int): Hosts in the first wave, which must all succeed.
+            wave_size (int): Hosts per later wave; 0 runs all remaining hosts in one wave.
+            max_failure_rate (float): Highest tolerated share of failed hosts, between 0 and 1.
+            on_wave (callable): Called with every finished WaveResult.
+        """
+        self.runner = runner
+        self.scheduler = scheduler
+        self.canaries = canaries
+        self.wave_size = wave_size
+        self.max_failure_rate = max_failure_rate
+        self.on_wave = on_wave
+
+    def run(self, hosts):
+        """
+        Run the rollout.
+
+        Args:
+            hosts (list): The hosts in rollout order; the first ones are the canaries.
+
+        Returns:
+            RolloutResult: Per-host outcomes and the reason the rollout halted, if it did.
+        """
+        outcomes = dict.fromkeys(hosts, NOT_STARTED)
+        waves = []
+        halted_reason = None
+        for index, wave in enumerate(plan_waves(list(hosts), self.canaries, self.wave_size)):
+            start = time.monotonic()
+            chains = {host: self.runner.add_host_jobs(self.scheduler, host) for host in wave}
+            self.scheduler.wait([job for jobs in chains.values() for job in jobs])
+            wave_outcomes = {host: host_outcome(jobs) for host, jobs in chains.items()}
+            outcomes.update(wave_outcomes)
+            result = WaveResult(index, chains, wave_outcomes, time.monotonic() - start)
+            waves.append(result)
+            if self.on_wave:
+                self.on_wave(result)
+
+            halted_reason = self.check(result, RolloutResult(waves, outcomes))
+            if halted_reason:
+                break
+        return RolloutResult(waves, outcomes, halted_reason)
+
+    def check(self, wave, progress):
+        """Return why the rollout must stop after this wave, or None to continue."""
+        if wave.canary and self.canaries:
+            if wave.count(FAILED):
+                return f"{wave.count(FAILED)} of {len(wave.hosts)} canary hosts failed"
+            if not wave.count(SUCCEEDED):
+                return f"no canary host succeeded ({wave.count(UNREACHABLE)} of {len(wave.hosts)} unreachable)"
+        if progress.failure_rate > self.max_failure_rate:
+            return f"failure rate {progress.failure_rate:.0%} exceeds {self.max_failure_rate:.0%}"
+        return None
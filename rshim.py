@@ -0,0 +1,83 @@
+from device_jobs import device_label
+from remote_exec import run_command
+
+# Prints '<misc file> <DEV_NAME>' per rshim device, e.g. '/dev/rshim0/misc pcie-0000:03:00.2'
+RSHIM_MAP_SCRIPT = (
+    "for f in /dev/rshim*/misc; do [ -e \"$f\" ] && "
+    "echo \"$f $(awk '$1 == \"DEV_NAME\" {print $2; exit}' \"$f\")\"; done; true"
+)
+
+
+def pci_slot(address):
+    """Return the 'domain:bus:device' part of a PCI address, so all functions of a card compare equal."""
+    address = address.strip().lower()
+    if address.count(':') == 1:
+        address = f"0000:{address}"
+    return address.rsplit('.', 1)[0]
+
+
+def rshim_map(ssh):
+    """
+    Map the PCI slots of a host's BlueField DPUs to their rshim devices in one round trip.
+
+    Args:
+        ssh (paramiko.SSHClient): The SSH client for the host.
+
+    Returns:
+        dict: See parse_rshim_map.
+    """
+    return parse_rshim_map(run_command(ssh, RSHIM_MAP_SCRIPT).stdout)
+
+
+def parse_rshim_map(output):
+    """
+    Parse the output of RSHIM_MAP_SCRIPT.
+
+    Args:
+        output (str): The script's stdout.
+
+    Returns:
+        dict: PCI slot (see pci_slot) -> rshim name such as 'rshim0'; rshim devices whose
+        misc file names no PCI address are listed under None.
+    """
+    mapping = {}
+    for line in output.splitlines():
+        path, _, dev_name = line.partition(' ')
+        parts = path.split('/')
+        if len(parts) < 3 or not parts[2].startswith('rshim'):
+            continue
+        dev_name = dev_name.strip()
+        slot = pci_slot(dev_name[len('pcie-'):]) if dev_name.startswith('pcie-') else None
+        mapping.setdefault(slot, []).append(parts[2])
+    return {slot: names if slot is None else names[0] for slot, names in mapping.items()}
+
+
+def assign_rshims(ssh, devices, mapping=None):
+    """
+    Store the rshim device of each BlueField as 'RShim', reading the host's rshim devices once.
+
+    Devices that already have an rshim device are not looked up again; devices marked
+    'unknown' are, since the rshim driver may have come up since. A device whose PCI slot no
+    rshim device names gets the host's only unnamed rshim device, if there is exactly one
+    such device and one such BlueField; otherwise it gets 'unknown', and installers refuse
+    to guess which DPU it is.
+
+    Args:
+        ssh (paramiko.SSHClient): The SSH client for the host.
+        devices (list): The BlueField device information dictionaries.
+        mapping (dict): The host's rshim map if it was already read (see rshim_map).
+    """
+    pending = [device for device in devices if device.get('RShim') in (None, '', 'unknown')]
+    if not pending:
+        return
+    mapping = dict(rshim_map(ssh) if mapping is None else mapping)
+    unnamed = mapping.pop(None, [])
+    unmatched = []
+    for device in pending:
+        rshim = mapping.get(pci_slot(device_label(device)))
+        if rshim:
+            device['RShim'] = rshim
+        else:
+            unmatched.append(device)
+    for device in unmatched:
+        device['RShim'] = unnamed[0] if len(unnamed) == 1 and len(unmatched) == 1 else 'unknown'
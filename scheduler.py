@@ -0,0 +1,195 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    __slots__ = ('host', 'name', 'fn', 'deps', 'uses_nfs', 'state', 'result', 'error', 'started', 'finished')
+
+    def __init__(self, host, name, fn, deps=(), uses_nfs=False):
+        self.host = host
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+        self.uses_nfs = uses_nfs
+        self.state = PENDING
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+
+    @property
+    def ok(self):
+        return self.state == DONE
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def __repr__(self):
+        return f"Job({self.host!r}, {self.name!r}, {self.state})"
+
+
+class JobScheduler:
+    def __init__(self, max_workers=16, max_nfs_hosts=4, on_event=None):
+        """
+        Run per-host job DAGs with a global worker limit and a limit on hosts reading the release NFS trees.
+
+        A job starts once all of its dependencies are done. If a dependency fails or is
+        skipped, the job is skipped. Jobs marked uses_nfs only start while fewer than
+        max_nfs_hosts other hosts have NFS jobs running; jobs of a host that already holds
+        an NFS slot share it.
+
+        Args:
+            max_workers (int): Maximum number of jobs running at the same time.
+            max_nfs_hosts (int): Maximum number of hosts running NFS-reading jobs at the same time.
+            on_event (callable): Called as on_event(job) whenever a job changes state.
+        """
+        self.max_workers = max_workers
+        self.max_nfs_hosts = max_nfs_hosts
+        self.on_event = on_event
+        self._cond = threading.Condition()
+        self._pending = []
+        self._running = 0
+        self._nfs_hosts = {}  # host -> number of its running NFS jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._loop = None
+        self._closed = False
+
+    def add(self, host, name, fn, deps=(), uses_nfs=False):
+        """
+        Queue a job; it runs as soon as its dependencies and the limits allow.
+
+        Args:
+            host (str): The host the job works on.
+            name (str): The step name, e.g. 'firmware' or 'ofed'.
+            fn (callable): Called without arguments on a worker thread. A result with a false
+                'ok' attribute or a raised exception marks the job failed.
+            deps (iterable): Jobs that must be done first.
+            uses_nfs (bool): The job reads images from the shared release NFS trees.
+
+        Returns:
+            Job: The queued job.
+        """
+        job = Job(host, name, fn, deps, uses_nfs)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Scheduler is shut down")
+            self._pending.append(job)
+            if self._loop is None:
+                self._loop = threading.Thread(target=self._schedule, name="job-scheduler", daemon=True)
+                self._loop.start()
+            self._cond.notify_all()
+        return job
+
+    def wait(self, jobs, timeout=None):
+        """
+        Block until the given jobs have finished.
+
+        Args:
+            jobs (iterable): The jobs to wait for.
+            timeout (float): Maximum seconds to wait.
+
+        Returns:
+            bool: True if all jobs finished.
+        """
+        jobs = list(jobs)
+        with self._cond:
+            return self._cond.wait_for(lambda: all(job.state not in (PENDING, RUNNING) for job in jobs), timeout)
+
+    def shutdown(self, wait=True):
+        """
+        Stop starting jobs; jobs that have not started yet are skipped.
+
+        Args:
+            wait (bool): Block until the running jobs have finished.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._executor.shutdown(wait=wait)
+
+    def _schedule(self):
+        with self._cond:
+            while not (self._closed and not self._pending):
+                progressed = False
+                for job in list(self._pending):
+                    if self._closed or any(dep.state in (FAILED, SKIPPED) for dep in job.deps):
+                        self._pending.remove(job)
+                        job.state = SKIPPED
+                        self._notify(job)
+                        progressed = True
+                    elif (all(dep.state == DONE for dep in job.deps) and self._running < self.max_workers
+                          and self._admit_nfs(job)):
+                        self._pending.remove(job)
+                        self._start(job)
+                        progressed = True
+                if progressed:
+                    # Skipped jobs may unblock (or skip) their own dependents
+                    self._cond.notify_all()
+                    continue
+                self._cond.wait()
+
+    def _admit_nfs(self, job):
+        if not job.uses_nfs:
+            return True
+        if job.host in self._nfs_hosts:
+            return True
+        return len(self._nfs_hosts) < self.max_nfs_hosts
+
+    def _start(self, job):
+        self._running += 1
+        if job.uses_nfs:
+            self._nfs_hosts[job.host] = self._nfs_hosts.get(job.host, 0) + 1
+        job.state = RUNNING
+        job.started = time.monotonic()
+        self._notify(job)
+        try:
+            self._executor.submit(self._execute, job)
+        except RuntimeError as e:
+            # The executor was shut down meanwhile; the job never runs
+            self._finish(job, None, e)
+            self._notify(job)
+
+    def _execute(self, job):
+        try:
+            result = job.fn()
+        except Exception as e:
+            result, error = None, e
+        else:
+            error = None
+
+        with self._cond:
+            self._finish(job, result, error)
+        self._notify(job)
+
+    def _finish(self, job, result, error):
+        # Called with the condition held; frees the job's worker and NFS slot
+        job.result = result
+        job.error = error
+        job.finished = time.monotonic()
+        job.state = FAILED if error is not None or getattr(result, 'ok', True) is False else DONE
+        self._running -= 1
+        if job.uses_nfs:
+            self._nfs_hosts[job.host] -= 1
+            if not self._nfs_hosts[job.host]:
+                del self._nfs_hosts[job.host]
+        self._cond.notify_all()
+
+    def _notify(self, job):
+        if self.on_event:
+            try:
+                self.on_event(job)
+            except Exception:
+                logger.exception("Scheduler event handler failed for %s", job)
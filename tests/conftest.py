@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# The modules live at the repository root, next to this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep caches, journals and a user device catalog of the machine out of the tests
+os.environ["CARD_CONFIGURATOR_HOME"] = tempfile.mkdtemp(prefix="card_configurator_tests_")
@@ -0,0 +1,47 @@
+import asyncio
+
+from async_engine import AsyncEngine
+
+
+def _peak(engine, hosts):
+    running = []
+    peak = [0]
+
+    async def work(host):
+        async with engine.host_slot(host):
+            running.append(host)
+            peak[0] = max(peak[0], len(running))
+            await asyncio.sleep(0.01)
+            running.remove(host)
+
+    async def main():
+        await asyncio.gather(*(work(host) for host in hosts))
+
+    engine.run(main())
+    return peak[0]
+
+
+def test_semaphores_are_created_on_the_loop():
+    engine = AsyncEngine(None, max_concurrency=2)
+    try:
+        assert engine._limit is None
+        _peak(engine, ["a"])
+        assert engine._limit is not None
+    finally:
+        engine.close()
+
+
+def test_host_slot_limits_global_concurrency():
+    engine = AsyncEngine(None, max_concurrency=3, max_per_host=10)
+    try:
+        assert _peak(engine, ["h%d" % i for i in range(10)]) == 3
+    finally:
+        engine.close()
+
+
+def test_host_slot_limits_per_host_concurrency():
+    engine = AsyncEngine(None, max_concurrency=10, max_per_host=2)
+    try:
+        assert _peak(engine, ["a"] * 6) == 2
+    finally:
+        engine.close()
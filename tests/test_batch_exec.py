@@ -0,0 +1,48 @@
+import base64
+
+from batch_exec import BATCH_FUNCTION, batch_script, parse_record
+
+NONCE = "f00dcafe"
+COMMANDS = ["uname -r", "df -Pk /tmp"]
+
+
+def record(index, status, stdout=b"", stderr=b"", start="1000000000", end="3500000000", nonce=NONCE):
+    return (f"{nonce}:{index}:{status}:{start}:{end}:"
+            f"{base64.b64encode(stdout).decode()}:{base64.b64encode(stderr).decode()}\n")
+
+
+def test_parse_record():
+    index, result = parse_record(record(1, 0, b"used: 10%\n", b"warning\n"), NONCE, COMMANDS)
+    assert index == 1
+    assert result.command == "df -Pk /tmp"
+    assert result.exit_status == 0
+    assert result.stdout == "used: 10%\n"
+    assert result.stderr == "warning\n"
+    assert result.duration == 2.5
+
+
+def test_output_may_contain_the_delimiter():
+    _, result = parse_record(record(0, 2, b"a:b:c\n" * 3), NONCE, COMMANDS)
+    assert result.exit_status == 2
+    assert result.stdout == "a:b:c\n" * 3
+
+
+def test_date_without_nanoseconds():
+    _, result = parse_record(record(0, 0, start="1700000000%N", end="1700000001%N"), NONCE, COMMANDS)
+    assert result.duration == 0.0
+
+
+def test_foreign_lines_are_ignored():
+    assert parse_record("Welcome to host1\n", NONCE, COMMANDS) is None
+    assert parse_record(record(0, 0, nonce="other"), NONCE, COMMANDS) is None
+    assert parse_record(record(2, 0), NONCE, COMMANDS) is None
+    assert parse_record(record(0, 0).replace(":0:", ":x:", 1), NONCE, COMMANDS) is None
+    assert parse_record(f"{NONCE}:0:0:1:2:abc:\n", NONCE, COMMANDS) is None  # Truncated base64
+
+
+def test_batch_script_calls_every_command_in_order():
+    script = batch_script(COMMANDS + ["echo 'quoted'"], NONCE)
+    calls = [line for line in script.splitlines() if line.startswith(BATCH_FUNCTION + " ")]
+    assert calls == [f"{BATCH_FUNCTION} 0 'uname -r'", f"{BATCH_FUNCTION} 1 'df -Pk /tmp'",
+                     f"{BATCH_FUNCTION} 2 'echo '\"'\"'quoted'\"'\"''"]
+    assert f"__cc_nonce={NONCE}" in script
@@ -0,0 +1,137 @@
+import threading
+
+import pytest
+
+from connection_pool import ConnectionPool
+
+
+class FakeTransport:
+    def __init__(self):
+        self.active = True
+
+    def is_active(self):
+        return self.active
+
+    def send_ignore(self):
+        if not self.active:
+            raise EOFError()
+
+
+class FakeClient:
+    def __init__(self, host):
+        self.host = host
+        self.transport = FakeTransport()
+        self.closed = False
+
+    def get_transport(self):
+        return None if self.closed else self.transport
+
+    def close(self):
+        self.closed = True
+
+
+class Connector:
+    def __init__(self):
+        self.opened = []
+
+    def __call__(self, server_name, username, password, timeout=None):
+        client = FakeClient(server_name)
+        self.opened.append(client)
+        return client
+
+
+@pytest.fixture
+def connector():
+    return Connector()
+
+
+def test_released_clients_are_reused(connector):
+    pool = ConnectionPool(connector)
+    first = pool.acquire('h1', 'root', 'pw')
+    assert pool.checked_out(first)
+    pool.release(first)
+    assert not pool.checked_out(first)
+    assert pool.acquire('h1', 'root', 'pw') is first
+    assert pool.acquire('h2', 'root', 'pw') is not first
+    assert len(connector.opened) == 2
+
+
+def test_unhealthy_clients_are_replaced(connector):
+    pool = ConnectionPool(connector)
+    first = pool.acquire('h1', 'root', 'pw')
+    pool.release(first)
+    first.transport.active = False
+    second = pool.acquire('h1', 'root', 'pw')
+    assert second is not first
+    assert first.closed
+
+
+def test_max_per_host_blocks_until_a_client_is_released(connector):
+    pool = ConnectionPool(connector, max_per_host=1)
+    first = pool.acquire('h1', 'root', 'pw')
+    with pytest.raises(TimeoutError):
+        pool.acquire('h1', 'root', 'pw', timeout=0.05)
+    threading.Timer(0.05, pool.release, (first,)).start()
+    assert pool.acquire('h1', 'root', 'pw', timeout=5) is first
+
+
+def test_discarded_clients_free_their_slot(connector):
+    pool = ConnectionPool(connector, max_per_host=1)
+    first = pool.acquire('h1', 'root', 'pw')
+    pool.discard(first)
+    assert first.closed
+    second = pool.acquire('h1', 'root', 'pw', timeout=0.05)
+    assert second is not first
+
+
+def test_failed_connect_frees_its_slot():
+    def connect(server_name, username, password, timeout=None):
+        raise OSError("connection refused")
+
+    pool = ConnectionPool(connect, max_per_host=1)
+    for _ in range(2):
+        with pytest.raises(OSError):
+            pool.acquire('h1', 'root', 'pw', timeout=0.05)
+
+
+def test_idle_clients_are_evicted(connector):
+    pool = ConnectionPool(connector, idle_timeout=0)
+    first = pool.acquire('h1', 'root', 'pw')
+    pool.release(first)
+    pool.evict_idle()
+    assert first.closed
+    assert pool.acquire('h1', 'root', 'pw') is not first
+
+
+def test_close_all_closes_idle_and_later_released_clients(connector):
+    pool = ConnectionPool(connector)
+    idle = pool.acquire('h1', 'root', 'pw')
+    busy = pool.acquire('h1', 'root', 'pw')
+    pool.release(idle)
+
+    pool.close_all()
+    assert idle.closed and not busy.closed
+    pool.release(busy)
+    assert busy.closed
+    with pytest.raises(RuntimeError):
+        pool.acquire('h1', 'root', 'pw')
+    assert len(connector.opened) == 2
+
+
+def test_close_all_wakes_waiting_acquires(connector):
+    pool = ConnectionPool(connector, max_per_host=1)
+    pool.acquire('h1', 'root', 'pw')
+    errors = []
+
+    def wait_for_slot():
+        try:
+            pool.acquire('h1', 'root', 'pw', timeout=5)
+        except RuntimeError as e:
+            errors.append(e)
+
+    waiter = threading.Thread(target=wait_for_slot)
+    waiter.start()
+    threading.Timer(0.05, pool.close_all).start()
+    waiter.join(5)
+    assert not waiter.is_alive()
+    assert len(errors) == 1
@@ -0,0 +1,96 @@
+import json
+import os
+
+import pytest
+
+import device_catalog
+from device_catalog import DeviceCatalog, normalize_device_id
+
+BUNDLED = os.path.join(os.path.dirname(os.path.abspath(device_catalog.__file__)), "device_catalog.json")
+
+
+def write(path, *models):
+    path.write_text(json.dumps({'models': list(models)}))
+    return str(path)
+
+
+@pytest.fixture
+def bundled():
+    return DeviceCatalog(paths=[BUNDLED], check_interval=0)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ('0xA2DC', '0xa2dc'), ('a2dc', '0xa2dc'), ('41692', '0xa2dc'), ('4129', '0x1021'),
+    ('', None), (None, None), ('unknown', None)])
+def test_normalize_device_id(value, expected):
+    assert normalize_device_id(value) == expected
+
+
+def test_lookup_prefers_the_device_id(bundled):
+    model = bundled.lookup({'DevID': '0x1021', 'PSID': 'MT_0000000436', 'Desc': "BlueField-3 DPU"})
+    assert model.name == "ConnectX-7"
+    assert bundled.by_device_id('4129') is model
+
+
+@pytest.mark.parametrize("psid, name", [
+    ('MT_0000000436', "ConnectX-6 Dx"), ('MT_0000000838', "ConnectX-7"), ('MT_0000000540', "BlueField-2")])
+def test_lookup_by_psid(bundled, psid, name):
+    assert bundled.lookup({'DevID': 'unknown', 'PSID': psid, 'Desc': ""}).name == name
+
+
+def test_every_psid_belongs_to_one_model(bundled):
+    psids = [psid for model in bundled.models() for psid in model.psids]
+    assert psids and len(psids) == len(set(psids))
+
+
+def test_lookup_by_longest_description(bundled):
+    assert bundled.lookup({'Desc': "Nvidia ConnectX-6 Dx EN adapter card"}).name == "ConnectX-6 Dx"
+    assert bundled.lookup({'Desc': "connectx-6 VPI adapter card"}).name == "ConnectX-6"
+    assert bundled.lookup({'Desc': "Some other NIC"}) is None
+
+
+def test_user_catalog_is_merged_over_the_bundled_one(tmp_path):
+    user = write(tmp_path / "user.json",
+                 {'name': "ConnectX-7 custom", 'device_id': '0x1021', 'family': 'connectx', 'signed': True},
+                 {'name': "ConnectX-9", 'device_id': '0x1025', 'family': 'connectx', 'psids': ['MT_9']})
+    catalog = DeviceCatalog(paths=[user, BUNDLED], check_interval=0)
+    assert catalog.by_device_id('0x1021').name == "ConnectX-7 custom"
+    assert catalog.lookup({'PSID': 'MT_9'}).name == "ConnectX-9"
+    assert catalog.by_device_id('0xa2dc').name == "BlueField-3"
+    assert catalog.by_device_id('0x1025').fw_code == str(0x1025)
+
+
+def test_changed_file_is_reloaded(tmp_path):
+    path = tmp_path / "catalog.json"
+    write(path, {'name': "A", 'device_id': '0x1', 'family': 'connectx'})
+    catalog = DeviceCatalog(paths=[str(path)], check_interval=0)
+    write(path, {'name': "B", 'device_id': '0x1', 'family': 'connectx'})
+    os.utime(path, (1, 1))
+    assert catalog.by_device_id('0x1').name == "B"
+
+
+def test_broken_file_keeps_the_loaded_catalog(tmp_path):
+    path = tmp_path / "catalog.json"
+    write(path, {'name': "A", 'device_id': '0x1', 'family': 'connectx'})
+    catalog = DeviceCatalog(paths=[str(path)], check_interval=0)
+    path.write_text('{"models": [')
+    os.utime(path, (1, 1))
+    assert catalog.by_device_id('0x1').name == "A"
+
+
+def test_broken_file_is_skipped_on_first_load(tmp_path):
+    broken = tmp_path / "broken.json"
+    broken.write_text('{"models": [{"name": "X"}]}')
+    catalog = DeviceCatalog(paths=[str(broken), BUNDLED], check_interval=0)
+    assert catalog.by_device_id('0x1021').name == "ConnectX-7"
+
+
+def test_identify_script_and_store_ids():
+    devices = [{'First_PCI': '17:00.0'}, {'First_PCI': '0000:81:00.0'}, {'First_PCI': '', 'DevID': None},
+               {'First_PCI': '0000:ca:00.0', 'DevID': '0x1021'}]
+    script, pending = DeviceCatalog.identify_script(devices)
+    assert list(pending) == ['0000:17:00.0', '0000:81:00.0']
+    assert '0000:ca:00.0' not in script
+    DeviceCatalog.store_ids(pending, "0000:17:00.0 0x101d\n0000:81:00.0 \n")
+    assert [device.get('DevID') for device in devices] == ['0x101d', 'unknown', None, '0x1021']
+    assert DeviceCatalog.identify_script(devices[:2]) == (None, {})
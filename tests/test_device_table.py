@@ -0,0 +1,151 @@
+import random
+import types
+
+import pytest
+
+import device_table
+from device_table import DeviceTable, _sort_key, device_values
+from lshca_parser import DeviceRecord, PciEntry
+
+
+class Widget:
+    def __init__(self, *args, **kwargs):
+        self.options = kwargs
+
+    def pack(self, **kwargs):
+        pass
+
+    def bind(self, *args):
+        pass
+
+    def config(self, **kwargs):
+        self.options.update(kwargs)
+
+    def set(self, *args):
+        pass
+
+
+class Frame(Widget):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.idle = []
+
+    def after_idle(self, callback):
+        self.idle.append(callback)
+
+    def winfo_exists(self):
+        return True
+
+    def run_idle(self):
+        while self.idle:
+            self.idle.pop(0)()
+
+
+class StringVar:
+    def trace_add(self, *args):
+        pass
+
+
+class Treeview(Widget):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rows = {}
+        self.writes = 0
+        self.selected = ()
+
+    def heading(self, *args, **kwargs):
+        pass
+
+    def column(self, *args, **kwargs):
+        pass
+
+    def insert(self, parent, index, iid, values):
+        self.rows[iid] = values
+
+    def item(self, iid, values, tags):
+        self.rows[iid] = values
+        self.writes += 1
+
+    def selection_set(self, items):
+        self.selected = tuple(items)
+
+    def selection(self):
+        return self.selected
+
+
+@pytest.fixture
+def table(monkeypatch):
+    monkeypatch.setattr(device_table, 'tk', types.SimpleNamespace(
+        Frame=Frame, Label=Widget, Entry=Widget, StringVar=StringVar, LEFT='left', RIGHT='right', END='end'))
+    monkeypatch.setattr(device_table, 'ttk', types.SimpleNamespace(Treeview=Treeview, Scrollbar=Widget))
+    return DeviceTable(None, visible_rows=5)
+
+
+def device(host, desc="ConnectX-7", fw="28.39.1002", tempr="50"):
+    record = DeviceRecord()
+    record.host, record.desc, record.fw, record.tempr = host, desc, fw, tempr
+    record.pci = [PciEntry("0000:17:00.0", ("0000:17:00.0",))]
+    return record
+
+
+def expected_view(table):
+    keys = [key for key, values in table._values.items() if table._matches(values)]
+    if table._sort_column is None:
+        return keys
+    index = [name for name, _ in table.COLUMNS].index(table._sort_column)
+    return sorted(keys, key=lambda key: _sort_key(table._values[key][index]), reverse=table._sort_reverse)
+
+
+def shown(table):
+    return [table.tree.rows[f"slot{slot}"] for slot in range(table.visible_rows)]
+
+
+def test_rows_render_in_insertion_order(table):
+    table.upsert([device(f"h{i}") for i in range(3)])
+    table.frame.run_idle()
+    assert [row[0] for row in shown(table)[:3]] == ['h0', 'h1', 'h2']
+    assert shown(table)[3:] == [(), ()]
+    assert table.count_label.options['text'] == "3 of 3 devices"
+
+
+def test_updates_keep_the_view_sorted(table):
+    rng = random.Random(7)
+    table.sort_by('Tempr')
+    for step in range(300):
+        if step == 100:
+            table.sort_by('Tempr')  # descending
+        if step == 200:
+            table.set_filter("bluefield")
+        hosts = [f"h{rng.randrange(40)}" for _ in range(rng.randrange(1, 4))]
+        if rng.random() < 0.2:
+            table.remove([f"{host}/0000:17:00.0" for host in hosts])
+        else:
+            table.upsert(device(host, desc=rng.choice(["ConnectX-7", "BlueField-3"]),
+                                tempr=rng.choice(["45", "50", "7", "n/a", ""])) for host in hosts)
+        table.frame.run_idle()
+        assert table._view == expected_view(table)
+        visible = table._view[table._offset:table._offset + table.visible_rows]
+        assert shown(table)[:len(visible)] == [table._values[key] for key in visible]
+
+
+def test_only_changed_slots_are_redrawn(table):
+    table.upsert([device(f"h{i}", tempr=str(40 + i)) for i in range(10)])
+    table.sort_by('Tempr')
+    table.frame.run_idle()
+    writes = table.tree.writes
+    table.upsert([device("h2", fw="28.40.1000", tempr="42")])
+    table.frame.run_idle()
+    assert table.tree.writes == writes + 1
+    assert shown(table)[2] == device_values(device("h2", fw="28.40.1000", tempr="42"))
+
+
+def test_selection_follows_rows(table):
+    table.upsert([device(f"h{i}", tempr=str(40 + i)) for i in range(10)])
+    table.frame.run_idle()
+    table.select(["h7/0000:17:00.0"])
+    assert table.selected()[0].host == 'h7'
+    table.scroll(5)
+    assert table.tree.selection() == ("slot2",)
+    table.remove(["h7/0000:17:00.0"])
+    table.frame.run_idle()
+    assert table.selected() == [] and table.tree.selection() == ()
@@ -0,0 +1,95 @@
+import threading
+import types
+
+import pytest
+
+import dpu_installer
+import rshim
+from bfb import BFB
+from doca import DOCA
+from remote_exec import CommandResult
+
+MAP_OUTPUT = "/dev/rshim0/misc pcie-0000:03:00.2\n/dev/rshim1/misc pcie-0000:81:00.2\n"
+
+
+class Host:
+    """Stands in for run_command: answers the rshim map script and records installations."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.map_reads = 0
+        self.installs = []
+
+    def rshim_command(self, ssh, command, **kwargs):
+        with self.lock:
+            self.map_reads += 1
+        return CommandResult(command, 0, MAP_OUTPUT, '', 0.0)
+
+    def install_command(self, ssh, command, on_line=None, keep_output=True):
+        with self.lock:
+            self.installs.append(command)
+        if on_line:
+            on_line("done")
+        return CommandResult(command, 0, "done\n", '', 0.0)
+
+
+class Prestager:
+    def local(self, ssh, source, on_line=None):
+        return "/local" + source
+
+
+class ReleaseIndex:
+    def __init__(self, latest):
+        self._latest = latest
+
+    def latest(self, ssh, component):
+        return self._latest.get(component)
+
+
+@pytest.fixture
+def host(monkeypatch):
+    host = Host()
+    monkeypatch.setattr(rshim, 'run_command', host.rshim_command)
+    monkeypatch.setattr(dpu_installer, 'run_command', host.install_command)
+    return host
+
+
+def manager(latest=None):
+    return types.SimpleNamespace(prestager=Prestager(), release_index=ReleaseIndex(latest or {}))
+
+
+def bluefield(pci):
+    return {'First_PCI': pci, 'Desc': 'BlueField-2 DPU'}
+
+
+@pytest.mark.parametrize("installer, command", [(BFB, "bfbinstall --prefix /local/mswg/release/bfb/bfb-4.5/"),
+                                                (DOCA, "docainstall --prefix /local/mswg/release/doca/doca-4.5/")])
+def test_install_uses_the_device_rshim(host, installer, command):
+    result = installer(manager()).install(bluefield("0000:81:00.0"), "4.5", None)
+    assert result.ok
+    assert host.installs == [f"{command} --rshim /dev/rshim1"]
+
+
+def test_install_refuses_without_rshim(host):
+    result = BFB(manager()).install(bluefield("0000:c1:00.0"), "4.5", None)
+    assert not result.ok and "0000:c1:00.0" in result.stderr
+    assert host.installs == []
+
+
+def test_install_many_reads_the_rshim_map_once(host):
+    lines = []
+    devices = [bluefield("0000:03:00.0"), bluefield("0000:81:00.0")]
+    results = DOCA(manager()).install_many(devices, "2.7", None, on_line=lines.append)
+    assert [item.ok for item in results] == [True, True]
+    assert host.map_reads == 1
+    assert sorted(command.rsplit(' ', 1)[1] for command in host.installs) == ["/dev/rshim0", "/dev/rshim1"]
+    assert sorted(lines) == ["[0000:03:00.0] done", "[0000:81:00.0] done"]
+
+
+def test_install_latest(host):
+    lines = []
+    result = BFB(manager({'bfb': "4.6"})).install_latest(bluefield("0000:03:00.0"), None, on_line=lines.append)
+    assert result.ok and lines[0] == "Latest BFB release: 4.6"
+    assert "bfb-4.6" in host.installs[0]
+    result = DOCA(manager({'bfb': "4.6"})).install_latest(bluefield("0000:03:00.0"), None)
+    assert not result.ok and result.stderr == "No DOCA release found"
@@ -0,0 +1,85 @@
+import pytest
+
+import fw_image_resolver
+from fw_image_resolver import FW_RELEASE_ROOT, FirmwareImageResolver
+from remote_exec import CommandResult
+
+BASE = f"{FW_RELEASE_ROOT}/fw-4125/fw-4125-rel-22_39_1002-build-001/"
+
+
+class Listing:
+    """Stands in for run_command, answering image listings with fixed output."""
+
+    def __init__(self, monkeypatch, files=(), psid_hits=()):
+        self.output = "".join(f"F {BASE}{path}\n" for path in files) + "".join(f"P {BASE}{path}\n" for path in psid_hits)
+        self.scripts = []
+        monkeypatch.setattr(fw_image_resolver, 'run_command', self)
+
+    def __call__(self, ssh, script):
+        self.scripts.append(script)
+        return CommandResult(script, 0, self.output, '', 0.0)
+
+
+@pytest.fixture
+def resolver(tmp_path):
+    return FirmwareImageResolver(cache_file=str(tmp_path / "fw_image_cache.json"))
+
+
+def cx6_device(pn="MCX623106AC-CDAT", psid="MT_0000000436"):
+    return {'PN': pn, 'PSID': psid}
+
+
+def test_release_dir(resolver):
+    assert resolver.release_dir('fw-4125', '22.39.1002') == BASE
+
+
+def test_longest_part_number_prefix_wins(resolver, monkeypatch):
+    Listing(monkeypatch, files=["etc/bin/fw-4125-rel-MCX623106AN-CDA_Ax-FlexBoot.bin",
+                                "etc/bin/fw-4125-rel-MCX623106AC-CDA_Ax-FlexBoot.bin",
+                                "etc/bin/README.txt"])
+    image = resolver.resolve(None, 'fw-4125', '22.39.1002', cx6_device())
+    assert image.image == BASE + "etc/bin/fw-4125-rel-MCX623106AC-CDA_Ax-FlexBoot.bin"
+    assert image.directory == BASE + "etc/bin/"
+    assert image.reason == "part number MCX623106AC-CDAT"
+
+
+def test_signed_devices_skip_unsigned_images(resolver, monkeypatch):
+    Listing(monkeypatch, files=["etc/bin/need_to_be_signed/fw-4125-rel-MCX623106AC-CDA_Ax.bin",
+                                "etc/bin/signed/fw-4125-rel-MCX623106AC-CDA_Ax.bin"])
+    unsigned = resolver.resolve(None, 'fw-4125', '22.39.1002', cx6_device())
+    signed = resolver.resolve(None, 'fw-4125', '22.39.1002', cx6_device(), signed=True)
+    assert unsigned.directory == BASE + "etc/bin/need_to_be_signed/"
+    assert signed.directory == BASE + "etc/bin/signed/"
+
+
+def test_psid_match_when_no_file_name_matches(resolver, monkeypatch):
+    Listing(monkeypatch, files=["etc/bin/fw-4125-rel-custom.bin"], psid_hits=["etc/bin/fw-4125-rel-custom.bin"])
+    image = resolver.resolve(None, 'fw-4125', '22.39.1002', cx6_device(pn="MCX999999-XXXX"))
+    assert image.image == BASE + "etc/bin/fw-4125-rel-custom.bin"
+    assert image.reason == "PSID MT_0000000436"
+
+
+def test_no_guessing(resolver, monkeypatch):
+    Listing(monkeypatch, files=["etc/bin/fw-4125-rel-MCX623106AC-CDA_Ax.bin"])
+    assert resolver.resolve(None, 'fw-4125', '22.39.1002', cx6_device(pn="MCX75310AAS-NEAT", psid="")) is None
+
+
+def test_listings_are_cached_on_disk(resolver, monkeypatch):
+    listing = Listing(monkeypatch, files=["etc/bin/fw-4125-rel-MCX623106AC-CDA_Ax.bin"])
+    resolver.resolve(None, 'fw-4125', '22.39.1002', cx6_device())
+    resolver.resolve(None, 'fw-4125', '22.39.1002', cx6_device(pn="MCX623106AC-CDAT", psid="MT_0000000436"))
+    assert len(listing.scripts) == 1
+
+    reopened = FirmwareImageResolver(cache_file=resolver.cache_file)
+    assert reopened.resolve(None, 'fw-4125', '22.39.1002', cx6_device()) is not None
+    assert len(listing.scripts) == 1
+    # Another version is a different release directory
+    reopened.resolve(None, 'fw-4125', '22.40.1000', cx6_device())
+    assert len(listing.scripts) == 2
+
+
+def test_empty_listings_are_not_cached(resolver, monkeypatch):
+    listing = Listing(monkeypatch)
+    assert resolver.resolve(None, 'fw-4125', '22.39.1002', cx6_device()) is None
+    assert resolver.resolve(None, 'fw-4125', '22.39.1002', cx6_device()) is None
+    assert len(listing.scripts) == 2
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from inventory_store import InventoryStore
+from lshca_parser import parse
+
+LSHCA = """Dev #1
+ Desc: ConnectX-7 HHHL adapter card
+ PN: MCX75310AAS-NEAT
+ PSID: MT_0000000838
+ SN: MT2310X00001
+ FW: 28.39.1002
+ PCI_Addr     | Dev_Name | Port
+ 0000:17:00.0 | mlx5_0   | 1
+"""
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = InventoryStore(str(tmp_path / "inventory.sqlite3"), ttl=60)
+    yield store
+    store.close()
+
+
+def test_put_and_get_round_trip(store):
+    store.put('h1', parse(LSHCA))
+    entry = store.get('h1')
+    assert entry.host == 'h1' and not entry.stale
+    device, = entry.devices
+    assert device.pn == "MCX75310AAS-NEAT"
+    assert device.first_pci == "0000:17:00.0"
+    assert device.get('PCI') == "PCI_Addr | Dev_Name | Port\n0000:17:00.0 | mlx5_0 | 1"
+    assert store.get('h2') is None
+
+
+def test_entries_survive_reopening(store):
+    store.put('h1', parse(LSHCA))
+    reopened = InventoryStore(store.path)
+    try:
+        assert [device.sn for device in reopened.get('h1').devices] == ["MT2310X00001"]
+    finally:
+        reopened.close()
+
+
+def test_entries_go_stale_after_their_ttl(store):
+    store.put('h1', parse(LSHCA), ttl=0.01)
+    store.put('h2', parse(LSHCA))
+    time.sleep(0.05)
+    assert store.get('h1').stale
+    assert not store.get('h2').stale
+    assert store.stale_hosts(['h3', 'h2', 'h1']) == ['h3', 'h1']
+
+
+def test_dirty_hosts_are_stale_until_rescanned(store):
+    store.put('h1', parse(LSHCA))
+    store.mark_dirty('h1')
+    assert store.get('h1').stale
+    store.put('h1', parse(LSHCA))
+    assert not store.get('h1').stale
+
+
+def test_get_many_beyond_the_parameter_limit(store):
+    hosts = [f"node{i:04d}" for i in range(1200)]
+    for host in hosts[::100]:
+        store.put(host, [])
+    entries = store.get_many(hosts)
+    assert sorted(entries) == hosts[::100]
+    assert all(entry.devices == [] for entry in entries.values())
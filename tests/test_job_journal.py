@@ -0,0 +1,128 @@
+import json
+import os
+import time
+
+import pytest
+
+import job_journal
+from job_journal import DONE, FAILED, STARTED, JobJournal, read_events
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "journal.jsonl")
+
+
+def test_replay_restores_the_state_of_every_step(path):
+    journal = JobJournal(path, description="cli --hosts h1")
+    journal.begin("h1", "firmware", "0000:03:00.0", "22.39.1002")
+    journal.finish("h1", "firmware", "0000:03:00.0", "22.39.1002", ok=True, duration=12.5)
+    journal.begin("h1", "ofed", version="24.01")
+    journal.finish("h1", "ofed", version="24.01", ok=False, error="exit 1")
+    journal.begin("h2", "bfb", "0000:81:00.0", "4.5.0")
+    journal.close()
+
+    replayed = JobJournal(path, resume=True)
+    try:
+        assert replayed.run_id == journal.run_id
+        firmware = replayed.entry("h1", "firmware", "0000:03:00.0")
+        assert firmware.state == DONE and firmware.detail == {"duration": 12.5}
+        assert replayed.completed("h1", "firmware", "0000:03:00.0", "22.39.1002")
+        assert not replayed.completed("h1", "firmware", "0000:03:00.0", "22.40.1000")
+        assert replayed.entry("h1", "ofed").state == FAILED
+        assert replayed.entry("h2", "bfb", "0000:81:00.0").state == STARTED
+        assert [entry.key for entry in replayed.interrupted(include_current=True)] == [("h2", "bfb", "0000:81:00.0")]
+    finally:
+        replayed.close()
+
+
+def test_new_run_sees_interrupted_steps_of_earlier_runs(path):
+    first = JobJournal(path)
+    first.begin("h1", "ofed", version="24.01")
+    first.close()
+
+    second = JobJournal(path)
+    try:
+        assert second.run_id != first.run_id
+        assert second.entry("h1", "ofed") is None
+        assert second.last("h1", "ofed").run == first.run_id
+        assert [entry.describe() for entry in second.interrupted()] == ["h1: ofed 24.01"]
+        # Finishing the step in the new run settles it
+        second.begin("h1", "ofed", version="24.01")
+        second.finish("h1", "ofed", version="24.01")
+        assert second.interrupted(include_current=True) == []
+    finally:
+        second.close()
+
+
+def test_steps_of_a_live_run_are_not_interrupted(path):
+    live = JobJournal(path)
+    live.begin("h1", "firmware", "0000:03:00.0", "22.39.1002")
+    other = JobJournal(path)
+    try:
+        assert other.is_running(live.run_id)
+        assert other.interrupted() == []
+        live.close()
+        assert not other.is_running(live.run_id)
+        assert len(other.interrupted()) == 1
+    finally:
+        live.close()
+        other.close()
+
+
+def test_stale_lease_counts_as_interrupted(path):
+    crashed = JobJournal(path)
+    crashed.begin("h1", "doca", "0000:81:00.0", "2.7.0")
+    lease = f"{path}.{crashed.run_id}.lease"
+    crashed._closed.set()  # Stop refreshing the lease, as a killed process would
+    stale = time.time() - job_journal.LEASE_SECONDS - 1
+    os.utime(lease, (stale, stale))
+
+    other = JobJournal(path)
+    try:
+        assert not os.path.exists(lease)
+        assert [entry.step for entry in other.interrupted()] == ["doca"]
+    finally:
+        other.close()
+        crashed.close()
+
+
+def test_torn_last_line_is_skipped(path):
+    journal = JobJournal(path)
+    journal.begin("h1", "firmware", "0000:03:00.0", "22.39.1002")
+    journal.close()
+    with open(path, 'a') as f:
+        f.write('{"event": "end", "run": "')
+
+    resumed = JobJournal(path, resume=journal.run_id)
+    try:
+        resumed.finish("h1", "firmware", "0000:03:00.0", "22.39.1002")
+    finally:
+        resumed.close()
+    events = read_events(path)
+    assert [event['event'] for event in events] == ["run", "start", "end"]
+    replayed = JobJournal(path, resume=True)
+    try:
+        assert replayed.entry("h1", "firmware", "0000:03:00.0").state == DONE
+    finally:
+        replayed.close()
+
+
+def test_resume_needs_a_run(path):
+    with pytest.raises(ValueError):
+        JobJournal(path, resume=True)
+    JobJournal(path).close()
+    with pytest.raises(ValueError):
+        JobJournal(path, resume="no-such-run")
+
+
+def test_old_runs_are_compacted(path, monkeypatch):
+    monkeypatch.setattr(job_journal, "KEEP_RUNS", 3)
+    run_ids = []
+    for _ in range(5):
+        journal = JobJournal(path)
+        run_ids.append(journal.run_id)
+        journal.close()
+    with open(path) as f:
+        runs = [json.loads(line)['run'] for line in f]
+    assert runs == run_ids[-3:]
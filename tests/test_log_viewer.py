@@ -0,0 +1,51 @@
+import pytest
+
+from log_viewer import LogBuffer
+
+
+def log_lines(count, every=3):
+    return [f"line {i} error" if i % every == 0 else f"line {i} ok" for i in range(count)]
+
+
+@pytest.fixture
+def spilled(tmp_path):
+    buffer = LogBuffer(max_lines=10, spill_path=str(tmp_path / "log.gz"), max_errors=8)
+    yield buffer
+    buffer.close()
+
+
+def test_ring_and_spill(spilled):
+    spilled.append(log_lines(100))
+    assert spilled.total == 100 and spilled.first_in_ring == 90
+    assert spilled.lines(95, 3) == ["line 95 ok", "line 96 error", "line 97 ok"]
+    assert spilled.lines(0, 2) == ["line 0 error", "line 1 ok"]
+    assert spilled.find("LINE 42") == 42
+    assert spilled.find("line 42", start=43) is None
+
+
+def test_error_numbers_are_capped(spilled):
+    for start in range(0, 300, 7):
+        spilled.append(log_lines(300)[start:start + 7])
+    assert spilled.error_count == 100
+    assert len(spilled.errors) <= spilled.max_errors
+    assert list(spilled.errors) == sorted(spilled.errors) and spilled.errors[-1] == 297
+
+
+def test_next_error_walks_every_error(spilled):
+    spilled.append(log_lines(300))
+    found, number = [], -1
+    while True:
+        number = spilled.next_error(number)
+        if number is None:
+            break
+        found.append(number)
+    assert found == list(range(0, 300, 3))
+
+
+def test_next_error_without_spill_uses_the_retained_errors():
+    buffer = LogBuffer(max_lines=10, max_errors=4)
+    buffer.append(log_lines(30))
+    assert len(buffer.errors) <= 4
+    assert buffer.next_error(-1) == buffer.errors[0]
+    assert buffer.next_error(26) == 27
+    assert buffer.next_error(27) is None
@@ -0,0 +1,138 @@
+import json
+import random
+
+import pytest
+
+from lshca_parser import DeviceRecord, iter_parse, parse
+
+TEXT = """lshca is already installed.
+-------------------------------------------------------------------------------
+Dev #1
+ Desc: ConnectX-6 Dx EN adapter card; 100GbE
+ PN: MCX623106AC-CDAT
+ PSID: MT_0000000436
+ SN: MT2052X00001
+ FW: 22.32.1010
+ Driver: mlx5_core
+ ------------------------------------------------------------
+ PCI_Addr     | Dev_Name | Net     | Port
+ ------------------------------------------------------------
+ 0000:03:00.0 | mlx5_0   | ens3f0  | 1
+ 0000:03:00.1 | mlx5_1   | ens3f1  | 2
+-------------------------------------------------------------------------------
+Dev #2
+ Desc: BlueField-2 DPU 25GbE
+ PN: MBF2H332A-AEEOT
+ PSID: MT_0000000540
+ SN: MT2052X00002
+ FW: 24.35.2000
+ Bond: bond0
+ ------------------------------------------------------------
+ PCI_Addr     | Dev_Name | Net     | Port
+ ------------------------------------------------------------
+ 0000:81:00.0 | mlx5_2   | ens81f0 | 1
+"""
+
+DEVICES = [
+    {"Desc": "ConnectX-6 Dx EN adapter card", "PN": "MCX623106AC-CDAT", "PSID": "MT_0000000436",
+     "SN": "MT2052X00001", "FW": "22.32.1010",
+     "bdf_devices": [{"Dev_Name": "mlx5_0", "PCI_Addr": "0000:03:00.0", "Port": 1},
+                     {"Dev_Name": "mlx5_1", "PCI_Addr": "0000:03:00.1", "Port": 2}]},
+    {"Desc": "BlueField-2 DPU 25GbE", "PN": "MBF2H332A-AEEOT", "PSID": "MT_0000000540",
+     "SN": "MT2052X00002", "FW": "24.35.2000", "Tempr": 61,
+     "bdf_devices": [{"Dev_Name": "mlx5_2", "PCI_Addr": "0000:81:00.0", "Port": 1}]},
+]
+PIP_NOTICE = "[notice] A new release of pip is available: 23.0 -> 24.0\n"
+
+
+def summary(records):
+    return [(record.dev, record.pn, record.sn, record.fw, record.first_pci, [str(entry) for entry in record.pci])
+            for record in records]
+
+
+def test_parse_text():
+    first, second = parse(TEXT)
+    assert first.dev == "Dev #1"
+    assert first.desc == "ConnectX-6 Dx EN adapter card; 100GbE"
+    assert first['PSID'] == "MT_0000000436"
+    assert first.first_pci == "0000:03:00.0"
+    assert first.pci_header == ("PCI_Addr", "Dev_Name", "Net", "Port")
+    assert [entry.address for entry in first.pci] == ["0000:03:00.0", "0000:03:00.1"]
+    assert second.get('Bond') == "bond0"
+    assert second.get('Driver') is None
+    assert second.key == "/0000:81:00.0"
+
+
+def test_parse_json_puts_the_address_column_first():
+    first, second = parse(json.dumps(DEVICES))
+    assert first.dev == "Dev #1" and second.dev == "Dev #2"
+    assert first.pci_header == ("PCI_Addr", "Dev_Name", "Port")
+    assert first.first_pci == "0000:03:00.0"
+    assert str(first.pci[1]) == "0000:03:00.1 | mlx5_1 | 2"
+    assert second.tempr == "61"
+
+
+def test_parse_json_after_pip_output():
+    records = parse("Collecting lshca\n" + PIP_NOTICE + json.dumps(DEVICES, indent=1))
+    assert [record.sn for record in records] == ["MT2052X00001", "MT2052X00002"]
+
+
+def test_parse_json_object_wrapping_the_list():
+    records = parse(json.dumps({"version": "3.9", "devices": DEVICES}))
+    assert [record.pn for record in records] == ["MCX623106AC-CDAT", "MBF2H332A-AEEOT"]
+
+
+def test_pip_notice_is_not_taken_for_json():
+    assert summary(parse(PIP_NOTICE + TEXT)) == summary(parse(TEXT))
+
+
+def test_empty_output():
+    assert parse("") == []
+    assert parse("lshca: no devices found\n") == []
+
+
+def test_record_round_trips_through_a_dict():
+    record = parse(TEXT)[1]
+    copy = DeviceRecord.from_dict(json.loads(json.dumps(record.to_dict())))
+    assert summary([copy]) == summary([record])
+    assert copy.get('Bond') == "bond0"
+
+
+def chunked(text, seed):
+    rng = random.Random(seed)
+    chunks = []
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 40)
+        chunks.append(text[position:position + size])
+        position += size
+    return chunks
+
+
+@pytest.mark.parametrize("output", [
+    TEXT,
+    PIP_NOTICE + TEXT,
+    json.dumps(DEVICES),
+    "Collecting lshca\n" + PIP_NOTICE + json.dumps(DEVICES, indent=2),
+    json.dumps({"devices": DEVICES}),
+    "[not json\n",
+])
+@pytest.mark.parametrize("seed", range(5))
+def test_iter_parse_matches_parse(output, seed):
+    assert summary(iter_parse(chunked(output, seed))) == summary(parse(output))
+
+
+def test_iter_parse_yields_each_json_device_when_complete():
+    text = json.dumps(DEVICES)
+    split = text.index('}]}') + 3  # Just past the first device object
+    sent = []
+
+    def chunks():
+        for chunk in (text[:split], text[split:]):
+            sent.append(chunk)
+            yield chunk
+
+    records = iter_parse(chunks())
+    assert next(records).sn == "MT2052X00001"
+    assert len(sent) == 1
+    assert next(records).sn == "MT2052X00002"
@@ -0,0 +1,45 @@
+import json
+
+from metrics import METRIC_NAME, Metrics
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_write_jsonl_appends_only_new_samples_and_drops_them(tmp_path):
+    metrics = Metrics()
+    path = str(tmp_path / "metrics.jsonl")
+    metrics.observe('connect', 0.5, host='h1')
+    metrics.write_jsonl(path)
+    assert metrics.samples() == []
+    metrics.observe('auth', 0.25, host='h1', step='scan')
+    metrics.write_jsonl(path)
+    samples = read_jsonl(path)
+    assert [(sample['phase'], sample['seconds']) for sample in samples] == [('connect', 0.5), ('auth', 0.25)]
+    assert samples[1]['step'] == 'scan' and 'device' not in samples[1]
+
+
+def test_unwritten_samples_are_bounded():
+    metrics = Metrics(max_samples=3)
+    for i in range(10):
+        metrics.observe('exit', float(i), host='h1')
+    assert [sample['seconds'] for sample in metrics.samples()] == [7.0, 8.0, 9.0]
+
+
+def test_prometheus_aggregates_survive_writing_samples(tmp_path):
+    metrics = Metrics(max_samples=2)
+    for seconds in (1.0, 3.0, 2.0):
+        metrics.observe('exit', seconds, host='h"1', device='0000:17:00.0')
+    metrics.write_jsonl(str(tmp_path / "metrics.jsonl"))
+    metrics.observe('connect', 0.5, host='h2')
+    path = str(tmp_path / "metrics.prom")
+    metrics.write_prometheus(path)
+    with open(path) as f:
+        text = f.read()
+    labels = 'phase="exit",host="h\\"1",device="0000:17:00.0"'
+    assert f"{METRIC_NAME}_count{{{labels}}} 3\n" in text
+    assert f"{METRIC_NAME}_sum{{{labels}}} 6.000000\n" in text
+    assert f"{METRIC_NAME}_max{{{labels}}} 3.000000\n" in text
+    assert f'{METRIC_NAME}_count{{phase="connect",host="h2"}} 1\n' in text
@@ -0,0 +1,87 @@
+from job_journal import JournalEntry
+from planner import (INSTALL, SKIP, HostPreflight, Planner, doca_release, firmware_target, is_bluefield, is_current,
+                     recheck)
+from remote_exec import CommandResult
+
+CX6 = {'Desc': 'ConnectX-6 Dx EN adapter card', 'PSID': 'MT_0000000436', 'FW': '22.39.1002',
+       'First_PCI': '0000:03:00.0'}
+CX7 = {'Desc': 'ConnectX-7 HHHL adapter card', 'PSID': 'MT_0000000838', 'FW': '28.38.1002',
+       'First_PCI': '0000:17:00.0'}
+BF2 = {'Desc': 'BlueField-2 DPU 25GbE', 'PSID': 'MT_0000000540', 'FW': '24.35.2000', 'First_PCI': '0000:81:00.0'}
+
+
+def result(stdout, status=0):
+    return CommandResult('check', status, stdout, '', 0.0)
+
+
+def test_firmware_target_per_psid():
+    state = {'firmware': {'MT_0000000436': '22.40.1000', 'default': '28.39.1002'}}
+    assert firmware_target(state, CX6) == '22.40.1000'
+    assert firmware_target(state, CX7) == '28.39.1002'
+    assert firmware_target({'firmware': '22.39.1002'}, CX7) == '22.39.1002'
+    assert firmware_target({}, CX6) is None
+
+
+def test_is_current():
+    assert is_current('firmware', '22.39.1002', '22.039.1002')
+    assert not is_current('firmware', '22.39.1002', '22.40.1000')
+    assert is_current('ofed', '24.01-0.3.3.1', ' 24.01-0.3.3.1\n')
+    assert is_current('doca', '2.5.2-0.0.7', 'DOCA_2.5.2_BSP_4.5.2_Ubuntu_22.04-2.23-10.prod.bfb')
+    assert not is_current('bfb', None, '4.5.0')
+    assert not is_current('firmware', '22.39.1002', None)
+
+
+def test_doca_release():
+    assert doca_release('DOCA_2.5.2_BSP_4.5.2_Ubuntu_22.04-2.23-10.prod.bfb') == '2.5.2'
+    assert doca_release('2.7.0-0.0.3') == '2.7.0'
+    assert doca_release('latest') == 'latest'
+
+
+def test_is_bluefield():
+    assert is_bluefield(BF2)
+    assert not is_bluefield(CX6)
+    assert is_bluefield({'Desc': 'unknown card', 'DevID': '0xa2dc'})
+
+
+def test_plan():
+    state = {'firmware': {'MT_0000000436': '22.39.1002', 'default': '28.39.1002'}, 'ofed': '24.01-0.3.3.1',
+             'bfb': '4.5.0', 'doca': '2.5.2'}
+    steps = Planner(state).plan('h1', [CX6, CX7, BF2], installed={'ofed': '24.01-0.3.3.1', 'doca': '2.5.2-0.0.7'})
+    assert [(step.component, step.device and step.device['PSID'], step.action) for step in steps] == [
+        ('firmware', 'MT_0000000436', SKIP),
+        ('firmware', 'MT_0000000838', INSTALL),
+        ('firmware', 'MT_0000000540', INSTALL),
+        ('ofed', None, SKIP),
+        ('bfb', 'MT_0000000540', INSTALL),
+        ('doca', 'MT_0000000540', SKIP),
+    ]
+    assert steps[1].to_dict() == {"host": "h1", "component": "firmware", "action": INSTALL, "current": "28.38.1002",
+                                  "target": "28.39.1002", "device": "0000:17:00.0", "psid": "MT_0000000838"}
+
+
+def test_plan_covers_only_the_components_in_the_state():
+    steps = Planner({'ofed': '24.01-0.3.3.1'}).plan('h1', [CX6, BF2])
+    assert [(step.component, step.current, step.action) for step in steps] == [('ofed', None, INSTALL)]
+
+
+def test_host_preflight():
+    checks = HostPreflight({'ofed': result("24.01-0.3.3.1\n"), 'doca': result("", status=1),
+                            'disk_free_kb': result("104857600\n"),
+                            'rshim': result("/dev/rshim0/misc pcie-0000:81:00.2\n/dev/rshim1/misc usb-1\n")})
+    assert checks.installed == {'ofed': '24.01-0.3.3.1', 'doca': None}
+    assert checks.disk_free_kb == 104857600
+    assert checks.rshim == {'0000:81:00': 'rshim0', None: ['rshim1']}
+    assert checks.to_dict()["rshim"] == ['rshim0', 'rshim1']
+    assert HostPreflight({'disk_free_kb': result("df: no such file\n")}).disk_free_kb is None
+
+
+def test_recheck():
+    entries = [JournalEntry('run1', 'h1', 'firmware', '0000:03:00.0', '22.39.1002', 0.0),
+               JournalEntry('run1', 'h1', 'firmware', '0000:99:00.0', '22.39.1002', 0.0),
+               JournalEntry('run1', 'h1', 'ofed', None, '24.01-0.3.3.1', 0.0),
+               JournalEntry('run1', 'h1', 'bfb', '0000:81:00.0', '4.5.0', 0.0)]
+    firmware, missing, ofed, bfb = recheck('h1', entries, [CX6, BF2], {'ofed': '23.10-1.1.9.0'})
+    assert firmware.action == SKIP and firmware.device is CX6
+    assert missing is None
+    assert ofed.action == INSTALL and ofed.current == '23.10-1.1.9.0'
+    assert bfb.action == INSTALL and bfb.device is BF2
@@ -0,0 +1,142 @@
+import threading
+
+import pytest
+
+import prestage
+from prestage import Prestager, stage_script, verify_script
+from remote_exec import CommandResult
+
+SOURCE = "/mswg/release/bfb/bfb-4.5.0/"
+
+
+class FakeSSH:
+    def __init__(self, address='10.0.0.1'):
+        self.address = address
+
+    def get_transport(self):
+        return self
+
+    def getpeername(self):
+        return (self.address, 22)
+
+
+class Host:
+    """Stands in for run_command: stage scripts succeed, verify scripts exit with verify_status."""
+
+    def __init__(self, monkeypatch, stage_output="STAGED copied\n", verify_status=0, gate=None):
+        self.stage_output = stage_output
+        self.verify_status = verify_status
+        self.gate = gate
+        self.staged = []
+        self.verified = []
+        monkeypatch.setattr(prestage, 'run_command', self)
+
+    def __call__(self, ssh, script):
+        if "echo 'STAGED copied'" in script:
+            if self.gate:
+                self.gate.wait(5)
+            self.staged.append(script)
+            return CommandResult(script, 0 if 'STAGED' in self.stage_output else 3, self.stage_output,
+                                 '' if 'STAGED' in self.stage_output else "-E- 10 KB needed, 1 KB free\n", 0.0)
+        self.verified.append(script)
+        return CommandResult(script, self.verify_status, '', '', 0.0)
+
+
+@pytest.fixture
+def prestager():
+    prestager = Prestager(stage_root="/var/tmp/stage")
+    yield prestager
+    prestager.shutdown()
+
+
+def test_scripts_use_one_manifest():
+    local = "/var/tmp/stage/mswg/release/bfb/bfb-4.5.0/"
+    assert "/var/tmp/stage/mswg/release/bfb/bfb-4.5.0/.staged.sha256" in stage_script(SOURCE, local)
+    assert "/var/tmp/stage/mswg/release/bfb/bfb-4.5.0/.staged.sha256" in verify_script(SOURCE, local)
+    image = "/mswg/release/host_fw/fw-4125/etc/bin/image.bin"
+    local_image = "/var/tmp/stage" + image
+    assert "/var/tmp/stage/mswg/release/host_fw/fw-4125/etc/bin/.image.bin.sha256" in stage_script(image, local_image)
+    assert "/var/tmp/stage/mswg/release/host_fw/fw-4125/etc/bin/.image.bin.sha256" in verify_script(image, local_image)
+
+
+def test_staged_copy_is_used(prestager, monkeypatch):
+    host = Host(monkeypatch)
+    ssh = FakeSSH()
+    first = prestager.stage(ssh, SOURCE)
+    assert prestager.stage(ssh, SOURCE) is first
+    assert first.result().ok
+    lines = []
+    assert prestager.local(ssh, SOURCE, lines.append) == "/var/tmp/stage/mswg/release/bfb/bfb-4.5.0/"
+    assert lines == ["Using staged copy /var/tmp/stage/mswg/release/bfb/bfb-4.5.0/"]
+    assert len(host.staged) == 1 and host.verified == []
+
+
+def test_unstaged_or_failed_sources_come_from_nfs(prestager, monkeypatch):
+    Host(monkeypatch, stage_output="")
+    ssh = FakeSSH()
+    assert prestager.local(ssh, SOURCE) == SOURCE
+    prestager.stage(ssh, SOURCE).result()
+    lines = []
+    assert prestager.local(ssh, SOURCE, lines.append) == SOURCE
+    assert "KB free" in lines[0]
+
+
+def test_stages_are_per_host(prestager, monkeypatch):
+    host = Host(monkeypatch)
+    prestager.stage(FakeSSH('10.0.0.1'), SOURCE).result()
+    prestager.stage(FakeSSH('10.0.0.2'), SOURCE).result()
+    assert len(host.staged) == 2
+
+
+def test_disabled_prestager_stages_nothing(prestager, monkeypatch):
+    host = Host(monkeypatch)
+    prestager.enabled = False
+    assert prestager.stage(FakeSSH(), SOURCE) is None
+    assert prestager.local(FakeSSH(), SOURCE) == SOURCE
+    assert host.staged == []
+
+
+def test_queued_stage_is_cancelled_by_the_install(monkeypatch):
+    gate = threading.Event()
+    Host(monkeypatch, gate=gate)
+    prestager = Prestager(stage_root="/var/tmp/stage", max_workers_per_host=1)
+    ssh = FakeSSH()
+    try:
+        prestager.stage(ssh, "/mswg/release/doca/doca-2.7.0/")  # Occupies the only worker
+        queued = prestager.stage(ssh, SOURCE)
+        assert prestager.local(ssh, SOURCE) == SOURCE
+        assert queued.cancelled()
+    finally:
+        gate.set()
+        prestager.shutdown()
+
+
+def test_old_copies_are_verified_again(prestager, monkeypatch):
+    host = Host(monkeypatch)
+    ssh = FakeSSH()
+    prestager.stage(ssh, SOURCE).result()
+    monkeypatch.setattr(prestage, 'REVERIFY_AFTER', 0)
+    assert prestager.local(ssh, SOURCE) == "/var/tmp/stage/mswg/release/bfb/bfb-4.5.0/"
+    assert len(host.verified) == 1
+
+    host.verify_status = 1  # Evicted meanwhile
+    lines = []
+    assert prestager.local(ssh, SOURCE, lines.append) == SOURCE
+    assert "gone or changed" in lines[0]
+    # The evicted copy is forgotten, and staging again copies it anew
+    assert prestager.local(ssh, SOURCE) == SOURCE
+    assert len(host.verified) == 2
+    prestager.stage(ssh, SOURCE).result()
+    assert len(host.staged) == 2
+
+
+def test_staging_an_old_copy_again_restages_it(prestager, monkeypatch):
+    host = Host(monkeypatch)
+    ssh = FakeSSH()
+    first = prestager.stage(ssh, SOURCE)
+    first.result()
+    monkeypatch.setattr(prestage, 'REVERIFY_AFTER', 0)
+    second = prestager.stage(ssh, SOURCE)
+    assert second is not first
+    second.result()
+    assert len(host.staged) == 2
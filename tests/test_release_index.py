@@ -0,0 +1,73 @@
+import pytest
+
+import release_index
+from release_index import BFB_RELEASE_ROOT, FW_RELEASE_ROOT, ReleaseIndex, version_key
+from remote_exec import CommandResult
+
+
+class Listing:
+    """Stands in for run_command, answering 'ls -1 <root>' from a dict of release trees."""
+
+    def __init__(self, monkeypatch, trees):
+        self.trees = trees
+        self.roots = []
+        monkeypatch.setattr(release_index, 'run_command', self)
+
+    def __call__(self, ssh, command):
+        root = command.split()[-1].strip("'")
+        self.roots.append(root)
+        if root not in self.trees:
+            return CommandResult(command, 2, '', f"ls: cannot access '{root}'\n", 0.0)
+        return CommandResult(command, 0, "".join(name + "\n" for name in self.trees[root]), '', 0.0)
+
+
+@pytest.fixture
+def index(tmp_path):
+    return ReleaseIndex(cache_file=str(tmp_path / "release_index.json"))
+
+
+def test_version_key_sorts_naturally():
+    versions = ["24.10-1.1.4.0", "24.4-0.6.8.0", "23.10-2.1.3.1", "24.4-0.6.10.0"]
+    assert sorted(versions, key=version_key) == ["23.10-2.1.3.1", "24.4-0.6.8.0", "24.4-0.6.10.0",
+                                                 "24.10-1.1.4.0"]
+
+
+def test_firmware_versions_are_listed_per_image_family(index, monkeypatch):
+    Listing(monkeypatch, {
+        f"{FW_RELEASE_ROOT}/fw-4125": ["fw-4125-rel-22_39_1002-build-001", "fw-4125-rel-22_4_1000-build-001",
+                                       "fw-4125-rel-22_39_1002-build-001.tmp", "README"],
+    })
+    assert index.versions(None, 'firmware', 'fw-4125') == ["22.4.1000", "22.39.1002"]
+    assert index.latest(None, 'firmware', 'fw-4125') == "22.39.1002"
+    with pytest.raises(ValueError):
+        index.versions(None, 'firmware')
+    with pytest.raises(ValueError):
+        index.versions(None, 'kernel')
+
+
+def test_listings_are_cached_until_the_ttl_runs_out(index, monkeypatch):
+    listing = Listing(monkeypatch, {BFB_RELEASE_ROOT: ["bfb-4.5.0", "bfb-4.6.0"]})
+    assert index.latest(None, 'bfb') == "4.6.0"
+    listing.trees[BFB_RELEASE_ROOT].append("bfb-4.7.0")
+    assert index.latest(None, 'bfb') == "4.6.0"
+    assert ReleaseIndex(cache_file=index.cache_file).latest(None, 'bfb') == "4.6.0"
+    assert len(listing.roots) == 1
+
+    index.invalidate('bfb')
+    assert index.latest(None, 'bfb') == "4.7.0"
+    expired = ReleaseIndex(ttl=0, cache_file=index.cache_file)
+    listing.trees[BFB_RELEASE_ROOT].append("bfb-4.8.0")
+    assert expired.latest(None, 'bfb') == "4.8.0"
+
+
+def test_empty_listings_are_not_cached(index, monkeypatch):
+    listing = Listing(monkeypatch, {BFB_RELEASE_ROOT: []})
+    assert index.latest(None, 'bfb') is None
+    listing.trees[BFB_RELEASE_ROOT].append("bfb-4.5.0")
+    assert index.latest(None, 'bfb') == "4.5.0"
+
+
+def test_unlistable_tree_raises(index, monkeypatch):
+    Listing(monkeypatch, {})
+    with pytest.raises(RuntimeError, match="Cannot list"):
+        index.versions(None, 'doca')
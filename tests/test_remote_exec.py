@@ -0,0 +1,145 @@
+import os
+import socket
+import time
+
+import pytest
+
+from remote_exec import ChannelReader, LineSplitter, run_command
+
+
+class FakeChannel:
+    """A non-blocking channel replaying scripted output, then exiting with a status."""
+
+    def __init__(self, output=(), exit_status=0, exit_after_output=True):
+        self.output = list(output)  # ('stdout' | 'stderr', bytes)
+        self.exit_status = exit_status
+        self.exit_after_output = exit_after_output
+        self.command = None
+        self.closed = False
+        self._read_fd, self._write_fd = os.pipe()
+        os.write(self._write_fd, b"x")  # Always selectable, so polling never sleeps
+
+    def _ready(self, stream):
+        return bool(self.output) and self.output[0][0] == stream
+
+    def _recv(self, stream, size):
+        if not self._ready(stream):
+            return b""
+        data = self.output[0][1][:size]
+        rest = self.output[0][1][size:]
+        if rest:
+            self.output[0] = (stream, rest)
+        else:
+            self.output.pop(0)
+        return data
+
+    def recv_ready(self):
+        return self._ready('stdout')
+
+    def recv_stderr_ready(self):
+        return self._ready('stderr')
+
+    def recv(self, size):
+        return self._recv('stdout', size)
+
+    def recv_stderr(self, size):
+        return self._recv('stderr', size)
+
+    def exit_status_ready(self):
+        return self.exit_after_output and not self.output
+
+    def recv_exit_status(self):
+        return self.exit_status
+
+    def exec_command(self, command):
+        self.command = command
+
+    def setblocking(self, blocking):
+        pass
+
+    def fileno(self):
+        return self._read_fd
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            os.close(self._read_fd)
+            os.close(self._write_fd)
+
+
+class FakeSSH:
+    def __init__(self, channel):
+        self.channel = channel
+
+    def get_transport(self):
+        return self
+
+    def open_session(self):
+        return self.channel
+
+
+def test_line_splitter_handles_split_characters_and_line_breaks():
+    splitter = LineSplitter()
+    euro = "€".encode()
+    assert splitter.feed(b"a\r\nb" + euro[:1]) == ("a\r\nb", ["a"])
+    assert splitter.feed(euro[1:] + b"\rc\n\nd") == ("€\rc\n\nd", ["b€", "c"])
+    assert splitter.flush() == ("", ["d"])
+    assert splitter.flush() == ("", [])
+
+
+def test_reader_drains_both_streams():
+    channel = FakeChannel([('stdout', b"one\ntw"), ('stderr', b"warn\n"), ('stdout', b"o\n")])
+    reader = ChannelReader(channel, "cmd")
+    chunks = []
+    while not reader.finished():
+        chunks += reader.read()
+    chunks += reader.flush()
+    lines = {'stdout': [], 'stderr': []}
+    for name, _, chunk_lines in chunks:
+        lines[name] += chunk_lines
+    assert lines == {'stdout': ["one", "two"], 'stderr': ["warn"]}
+    assert reader.first_byte is not None
+
+
+def test_reader_times_out_on_silence():
+    reader = ChannelReader(FakeChannel(exit_after_output=False), "sleep 100", timeout=0.05)
+    reader.check_timeout()
+    time.sleep(0.1)
+    with pytest.raises(socket.timeout, match="No output"):
+        reader.check_timeout()
+
+
+def test_reader_deadline_fires_while_output_keeps_arriving():
+    reader = ChannelReader(FakeChannel(exit_after_output=False), "yes", timeout=10,
+                           deadline=time.monotonic() + 0.05)
+    time.sleep(0.1)
+    reader.last_data = time.monotonic()
+    with pytest.raises(socket.timeout, match="deadline"):
+        reader.check_timeout()
+
+
+def test_run_command_collects_output_and_status():
+    channel = FakeChannel([('stdout', b"22.39.1002\n"), ('stderr', b"-W- slow\n"), ('stdout', b"last")],
+                          exit_status=3)
+    seen = []
+    result = run_command(FakeSSH(channel), "flint q", on_line=seen.append)
+    assert channel.command == "flint q" and channel.closed
+    assert result.exit_status == 3 and not result.ok
+    assert result.stdout == "22.39.1002\nlast"
+    assert result.stderr == "-W- slow\n"
+    assert sorted(seen) == ["-W- slow", "22.39.1002", "last"]
+
+
+def test_run_command_without_keeping_output():
+    seen = []
+    result = run_command(FakeSSH(FakeChannel([('stdout', b"a\nb\n")])), "cmd", on_line=seen.append,
+                         keep_output=False)
+    assert result.ok and result.output == ""
+    assert seen == ["a", "b"]
+
+
+def test_run_command_timeout_closes_the_channel():
+    channel = FakeChannel(exit_after_output=False)
+    with pytest.raises(socket.timeout):
+        run_command(FakeSSH(channel), "hang", timeout=0.05)
+    assert channel.closed
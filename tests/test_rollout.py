@@ -0,0 +1,89 @@
+import pytest
+
+from rollout import NOT_STARTED, SUCCEEDED, UNREACHABLE, RolloutController, plan_waves
+from scheduler import FAILED, JobScheduler
+
+
+class Unreachable:
+    ok = False
+    unreachable = True
+
+
+class Runner:
+    """Queues a scan and an install per host; hosts in fail fail their install, hosts in down their scan."""
+
+    def __init__(self, fail=(), down=()):
+        self.fail = set(fail)
+        self.down = set(down)
+        self.started = []
+
+    def add_host_jobs(self, scheduler, host):
+        self.started.append(host)
+        scan = scheduler.add(host, 'scan', lambda: Unreachable() if host in self.down else None)
+        install = scheduler.add(host, 'firmware', self.installer(host), deps=[scan])
+        return [scan, install]
+
+    def installer(self, host):
+        def install():
+            if host in self.fail:
+                raise RuntimeError("mlxburn failed")
+        return install
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = JobScheduler(max_workers=8)
+    yield scheduler
+    scheduler.shutdown()
+
+
+HOSTS = [f"h{i}" for i in range(10)]
+
+
+def test_plan_waves():
+    assert plan_waves(HOSTS, canaries=1, wave_size=4) == [["h0"], HOSTS[1:5], HOSTS[5:9], ["h9"]]
+    assert plan_waves(HOSTS, canaries=2, wave_size=0) == [HOSTS[:2], HOSTS[2:]]
+    assert plan_waves(HOSTS[:1], canaries=3, wave_size=4) == [["h0"]]
+    assert plan_waves([], canaries=1) == []
+
+
+def test_all_waves_run_when_everything_succeeds(scheduler):
+    waves = []
+    result = RolloutController(Runner(), scheduler, canaries=1, wave_size=4, on_wave=waves.append).run(HOSTS)
+    assert not result.halted
+    assert result.count(SUCCEEDED) == 10
+    assert [wave.hosts for wave in waves] == [["h0"], HOSTS[1:5], HOSTS[5:9], ["h9"]]
+    assert waves[0].canary and not waves[1].canary
+
+
+def test_failed_canary_halts_the_rollout(scheduler):
+    runner = Runner(fail={"h0"})
+    result = RolloutController(runner, scheduler, canaries=1, wave_size=4).run(HOSTS)
+    assert result.halted_reason == "1 of 1 canary hosts failed"
+    assert runner.started == ["h0"]
+    assert result.outcomes["h0"] == FAILED
+    assert result.count(NOT_STARTED) == 9
+
+
+def test_unreachable_canaries_give_no_signal(scheduler):
+    result = RolloutController(Runner(down={"h0", "h1"}), scheduler, canaries=2, wave_size=4).run(HOSTS)
+    assert result.halted_reason == "no canary host succeeded (2 of 2 unreachable)"
+    assert result.count(UNREACHABLE) == 2
+
+
+def test_unreachable_hosts_do_not_count_as_failures(scheduler):
+    result = RolloutController(Runner(down={"h3", "h4", "h5"}), scheduler, canaries=1, wave_size=4,
+                               max_failure_rate=0.1).run(HOSTS)
+    assert not result.halted
+    assert result.count(UNREACHABLE) == 3
+    assert result.failure_rate == 0.0
+
+
+def test_failure_rate_halts_before_the_next_wave(scheduler):
+    runner = Runner(fail={"h1", "h2"})
+    result = RolloutController(runner, scheduler, canaries=1, wave_size=4, max_failure_rate=0.25).run(HOSTS)
+    # 2 of the 5 hosts attempted so far failed
+    assert result.halted_reason == "failure rate 40% exceeds 25%"
+    assert runner.started == HOSTS[:5]
+    assert result.failure_rate == pytest.approx(0.4)
+    assert "halted: failure rate 40%" in result.summary()
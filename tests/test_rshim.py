@@ -0,0 +1,61 @@
+from rshim import assign_rshims, parse_rshim_map, pci_slot
+
+MAP_OUTPUT = """/dev/rshim0/misc pcie-0000:03:00.2
+/dev/rshim1/misc pcie-81:00.2
+/dev/rshim2/misc usb-1
+"""
+
+
+def bluefield(pci, rshim=None):
+    device = {'First_PCI': pci, 'Desc': 'BlueField-2 DPU'}
+    if rshim is not None:
+        device['RShim'] = rshim
+    return device
+
+
+class NoSSH:
+    # assign_rshims must not read the map again when it is given one
+    def __getattr__(self, name):
+        raise AssertionError(f"unexpected use of the SSH client: {name}")
+
+
+def test_pci_slot():
+    assert pci_slot("0000:03:00.1") == "0000:03:00"
+    assert pci_slot(" 03:00.0 ") == "0000:03:00"
+    assert pci_slot("0000:AF:00.2") == "0000:af:00"
+
+
+def test_parse_rshim_map():
+    mapping = parse_rshim_map(MAP_OUTPUT + "/dev/rshim3/misc\nnot a misc file\n")
+    assert mapping == {"0000:03:00": "rshim0", "0000:81:00": "rshim1", None: ["rshim2", "rshim3"]}
+
+
+def test_devices_are_matched_by_pci_slot():
+    devices = [bluefield("0000:81:00.0 | mlx5_2"), bluefield("0000:03:00.0")]
+    assign_rshims(NoSSH(), devices, mapping=parse_rshim_map(MAP_OUTPUT))
+    assert [device['RShim'] for device in devices] == ["rshim1", "rshim0"]
+
+
+def test_single_unmatched_device_gets_the_only_unnamed_rshim():
+    devices = [bluefield("0000:03:00.0"), bluefield("0000:c1:00.0")]
+    assign_rshims(NoSSH(), devices, mapping=parse_rshim_map(MAP_OUTPUT))
+    assert [device['RShim'] for device in devices] == ["rshim0", "rshim2"]
+
+
+def test_ambiguous_devices_are_unknown():
+    mapping = parse_rshim_map(MAP_OUTPUT + "/dev/rshim3/misc\n")
+    devices = [bluefield("0000:c1:00.0"), bluefield("0000:e1:00.0")]
+    assign_rshims(NoSSH(), devices, mapping=mapping)
+    assert [device['RShim'] for device in devices] == ["unknown", "unknown"]
+
+
+def test_known_rshims_are_kept_and_unknown_ones_retried():
+    mapping = parse_rshim_map(MAP_OUTPUT)
+    devices = [bluefield("0000:03:00.0", rshim="rshim7"), bluefield("0000:81:00.0", rshim="unknown")]
+    assign_rshims(NoSSH(), devices, mapping=mapping)
+    assert [device['RShim'] for device in devices] == ["rshim7", "rshim1"]
+    assert None in mapping  # The caller's map is left as it was
+
+
+def test_nothing_to_assign_reads_nothing():
+    assign_rshims(NoSSH(), [bluefield("0000:03:00.0", rshim="rshim0")])
@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import DONE, FAILED, PENDING, RUNNING, SKIPPED, JobScheduler
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = JobScheduler(max_workers=8, max_nfs_hosts=2)
+    yield scheduler
+    scheduler.shutdown()
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.order = []
+        self.nfs_hosts = {}
+        self.max_nfs_hosts = 0
+
+    def job(self, host, name, uses_nfs=False, fail=False, duration=0.02):
+        def run():
+            with self.lock:
+                self.order.append((host, name))
+                if uses_nfs:
+                    self.nfs_hosts[host] = self.nfs_hosts.get(host, 0) + 1
+                    self.max_nfs_hosts = max(self.max_nfs_hosts, len(self.nfs_hosts))
+            time.sleep(duration)
+            with self.lock:
+                if uses_nfs:
+                    self.nfs_hosts[host] -= 1
+                    if not self.nfs_hosts[host]:
+                        del self.nfs_hosts[host]
+            if fail:
+                raise RuntimeError(f"{name} failed")
+            return name
+        return run
+
+
+def test_dependencies_run_first(scheduler):
+    recorder = Recorder()
+    firmware = scheduler.add('h1', 'firmware', recorder.job('h1', 'firmware'))
+    ofed = scheduler.add('h1', 'ofed', recorder.job('h1', 'ofed'), deps=[firmware])
+    reboot = scheduler.add('h1', 'reboot', recorder.job('h1', 'reboot'), deps=[ofed])
+
+    assert scheduler.wait([firmware, ofed, reboot], timeout=5)
+    assert recorder.order == [('h1', 'firmware'), ('h1', 'ofed'), ('h1', 'reboot')]
+    assert [job.state for job in (firmware, ofed, reboot)] == [DONE, DONE, DONE]
+    assert ofed.result == 'ofed'
+
+
+def test_failed_dependency_skips_dependents(scheduler):
+    recorder = Recorder()
+    firmware = scheduler.add('h1', 'firmware', recorder.job('h1', 'firmware', fail=True))
+    ofed = scheduler.add('h1', 'ofed', recorder.job('h1', 'ofed'), deps=[firmware])
+    reboot = scheduler.add('h1', 'reboot', recorder.job('h1', 'reboot'), deps=[ofed])
+    other = scheduler.add('h2', 'firmware', recorder.job('h2', 'firmware'))
+
+    assert scheduler.wait([firmware, ofed, reboot, other], timeout=5)
+    assert firmware.state == FAILED
+    assert isinstance(firmware.error, RuntimeError)
+    assert ofed.state == SKIPPED and reboot.state == SKIPPED
+    assert other.state == DONE
+    assert ('h1', 'ofed') not in recorder.order
+
+
+def test_result_with_false_ok_fails_the_job(scheduler):
+    class Result:
+        ok = False
+
+    job = scheduler.add('h1', 'firmware', Result)
+    assert scheduler.wait([job], timeout=5)
+    assert job.state == FAILED and job.error is None
+
+
+def test_nfs_hosts_are_capped(scheduler):
+    recorder = Recorder()
+    jobs = [scheduler.add(f"h{i}", 'ofed', recorder.job(f"h{i}", 'ofed', uses_nfs=True, duration=0.05), uses_nfs=True)
+            for i in range(6)]
+
+    assert scheduler.wait(jobs, timeout=10)
+    assert all(job.state == DONE for job in jobs)
+    assert recorder.max_nfs_hosts == 2
+
+
+def test_jobs_of_one_host_share_its_nfs_slot(scheduler):
+    recorder = Recorder()
+    # h1 and h2 hold both NFS slots with long jobs
+    first = scheduler.add('h1', 'bfb', recorder.job('h1', 'bfb', uses_nfs=True, duration=0.5), uses_nfs=True)
+    blocker = scheduler.add('h2', 'bfb', recorder.job('h2', 'bfb', uses_nfs=True, duration=0.5), uses_nfs=True)
+    time.sleep(0.1)
+    waiting = scheduler.add('h3', 'bfb', recorder.job('h3', 'bfb', uses_nfs=True), uses_nfs=True)
+    shared = scheduler.add('h1', 'doca', recorder.job('h1', 'doca', uses_nfs=True), uses_nfs=True)
+
+    # h1's second NFS job runs at once, while h3 waits for a free slot
+    assert scheduler.wait([shared], timeout=5)
+    assert shared.state == DONE
+    assert first.state == RUNNING and blocker.state == RUNNING
+    assert waiting.state == PENDING
+
+    assert scheduler.wait([first, blocker, waiting], timeout=5)
+    assert waiting.started >= min(first.finished, blocker.finished)
+    assert recorder.max_nfs_hosts == 2
+
+
+def test_shutdown_skips_pending_jobs(scheduler):
+    recorder = Recorder()
+    release = threading.Event()
+    running = scheduler.add('h1', 'firmware', release.wait)
+    ofed = scheduler.add('h1', 'ofed', recorder.job('h1', 'ofed'), deps=[running])
+    reboot = scheduler.add('h1', 'reboot', recorder.job('h1', 'reboot'), deps=[ofed])
+    while running.state != RUNNING:
+        time.sleep(0.01)
+
+    scheduler.shutdown(wait=False)
+    assert scheduler.wait([ofed, reboot], timeout=3)
+    assert ofed.state == SKIPPED and reboot.state == SKIPPED
+    release.set()
+    assert scheduler.wait([running], timeout=3)
+    assert running.state == DONE
+    assert recorder.order == []
+    with pytest.raises(RuntimeError):
+        scheduler.add('h2', 'firmware', recorder.job('h2', 'firmware'))
@@ -0,0 +1,78 @@
+import logging
+import queue
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class UIDispatcher:
+    def __init__(self, root, interval_ms=16, frame_budget_ms=10):
+        """
+        Run callbacks posted from worker threads on the Tk main thread.
+
+        Workers never touch widgets directly: they post() callbacks into a queue, and a
+        root.after() pump drains the queue every interval_ms, spending at most
+        frame_budget_ms per frame so the window stays responsive under heavy load.
+
+        Args:
+            root (tk.Tk): The Tk root window.
+            interval_ms (int): Milliseconds between pump runs.
+            frame_budget_ms (float): Maximum milliseconds of callbacks run per pump.
+        """
+        self.root = root
+        self.interval_ms = interval_ms
+        self.frame_budget = frame_budget_ms / 1000.0
+        self._queue = queue.SimpleQueue()
+        self._running = False
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self.root.after(self.interval_ms, self._pump)
+
+    def stop(self):
+        self._running = False
+
+    def post(self, callback, *args, **kwargs):
+        """Schedule callback(*args, **kwargs) on the main thread. Safe to call from any thread."""
+        self._queue.put((callback, args, kwargs, False))
+
+    def post_batched(self, callback, item):
+        """
+        Schedule callback(items) on the main thread, coalescing items posted within one frame.
+
+        Use this for high-rate events such as output lines, so a frame makes one widget update
+        per callback instead of one per item. Safe to call from any thread.
+        """
+        self._queue.put((callback, (item,), None, True))
+
+    def _pump(self):
+        if not self._running:
+            return
+        deadline = time.perf_counter() + self.frame_budget
+        batches = {}
+        while time.perf_counter() < deadline:
+            try:
+                callback, args, kwargs, batched = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if batched:
+                batches.setdefault(callback, []).append(args[0])
+                continue
+            # Deliver pending batches first so events keep their posting order
+            self._flush(batches)
+            self._run(callback, *args, **kwargs)
+        self._flush(batches)
+        self.root.after(self.interval_ms, self._pump)
+
+    def _flush(self, batches):
+        for callback, items in batches.items():
+            self._run(callback, items)
+        batches.clear()
+
+    def _run(self, callback, *args, **kwargs):
+        try:
+            callback(*args, **kwargs)
+        except Exception:
+            # A failing callback (e.g. a widget destroyed meanwhile) must not stop the pump
+            logger.exception("UI callback %r failed", callback)